@@ -0,0 +1,296 @@
+"""
+归档目录索引：(平台, 源 ID) / 规范化标题 → ``content_archive`` 下的内容目录。
+
+取代 ``fetch_feed.is_folder_exists`` 逐条 ``os.listdir`` 日期目录、再用截断到 50 字符的
+文件名做子串匹配的做法：
+
+- 索引与状态台账同存于 ``config/state.db``（表 ``archive_folders``）；
+- ``process_video`` / ``process_podcast`` 创建目录时调用 :func:`register_folder` 登记；
+- 首次使用时扫描一遍现有归档（读取各目录的 ``metadata.md``：完整标题 + 原始链接中的 ID）；
+  之后每轮 feed 扫描开始时重扫一次 mtime 变过的日期目录（``get_default_index(root, refresh=True)``），
+  手动拷进归档的目录也能被发现；逐条查找与登记只查索引，不碰文件系统；
+- 去重查找全部是索引查询，且不受发布日期目录限制；
+- 源 ID 相同即命中；标题相同但源 ID 不同视为不同内容，避免同名误判。
+
+命令行::
+
+    python3 archive_index.py rebuild [content_archive]
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from datetime import datetime
+
+from state_store import STATE_DB_PATH, open_connection
+
+DEFAULT_ARCHIVE_ROOT = "content_archive"
+PLATFORMS = ("youtube", "xiaoyuzhou")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_folders (
+    folder     TEXT PRIMARY KEY,
+    name       TEXT NOT NULL,
+    platform   TEXT NOT NULL DEFAULT '',
+    source_id  TEXT NOT NULL DEFAULT '',
+    title_key  TEXT NOT NULL DEFAULT '',
+    date       TEXT NOT NULL DEFAULT '',
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archive_source ON archive_folders (platform, source_id);
+CREATE INDEX IF NOT EXISTS idx_archive_title ON archive_folders (platform, title_key);
+CREATE INDEX IF NOT EXISTS idx_archive_name ON archive_folders (name);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def sanitize_filename(name: str) -> str:
+    """Same rule as ``process_video``/``process_podcast`` use for folder names."""
+    return re.sub(r'[\\/*?:"<>|]', "", name).replace(" ", "_")[:50]
+
+
+def normalize_title(title: str) -> str:
+    """Case-, width- and punctuation-insensitive key for a full title."""
+    text = unicodedata.normalize("NFKC", title or "").casefold()
+    return re.sub(r"[\W_]+", "", text)
+
+
+def source_id_from_url(url: str) -> str:
+    match = re.search(r"(?:v=|youtu\.be/)([a-zA-Z0-9_-]{11})", url or "")
+    if match:
+        return match.group(1)
+    match = re.search(r"xiaoyuzhoufm\.com/episode/([a-zA-Z0-9]+)", url or "")
+    return match.group(1) if match else ""
+
+
+def _read_metadata(folder: str) -> tuple[str, str]:
+    """``(title, source_url)`` from ``metadata.md``; empty strings when missing."""
+    try:
+        with open(os.path.join(folder, "metadata.md"), "r", encoding="utf-8") as f:
+            content = f.read()
+    except OSError:
+        return "", ""
+    title = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
+    url = re.search(r"##\s+原始链接\s*\n(.+)", content)
+    return (title.group(1).strip() if title else ""), (url.group(1).strip() if url else "")
+
+
+class ArchiveIndex:
+    """SQLite-backed lookup from source ID / title to archive folder."""
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_connection(self.path)
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def add(
+        self, folder: str, *, platform: str = "", source_id: str = "", title: str = "", date: str = ""
+    ) -> None:
+        folder = os.path.normpath(folder)
+        name = os.path.basename(folder)
+        if not platform:
+            platform = next((p for p in PLATFORMS if name.startswith(f"{p}_")), "")
+        if not date:
+            parent = os.path.basename(os.path.dirname(folder))
+            date = parent if re.fullmatch(r"\d{4}-\d{2}-\d{2}", parent) else ""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO archive_folders (folder, name, platform, source_id, title_key, date, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(folder) DO UPDATE SET
+                    platform = excluded.platform,
+                    source_id = CASE WHEN excluded.source_id != '' THEN excluded.source_id ELSE source_id END,
+                    title_key = CASE WHEN excluded.title_key != '' THEN excluded.title_key ELSE title_key END,
+                    date = excluded.date,
+                    indexed_at = excluded.indexed_at
+                """,
+                (
+                    folder,
+                    name,
+                    platform,
+                    source_id,
+                    normalize_title(title),
+                    date,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def index_folder(self, folder: str) -> None:
+        """Index an existing folder from its ``metadata.md``."""
+        title, url = _read_metadata(folder)
+        self.add(folder, source_id=source_id_from_url(url), title=title)
+
+    def rebuild(self, root: str = DEFAULT_ARCHIVE_ROOT) -> int:
+        """Re-scan ``root/<date>/<folder>`` from scratch; return the number of folders indexed."""
+        root = os.path.normpath(root)
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM archive_folders WHERE folder = ? OR folder LIKE ?", (root, f"{root}{os.sep}%")
+            )
+            conn.execute("DELETE FROM meta WHERE key LIKE ?", (f"archive_dir_mtime:{root}{os.sep}%",))
+        count = self.refresh(root)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"archive_index_built:{root}", datetime.now().isoformat(timespec="seconds")),
+            )
+        return count
+
+    def refresh(self, root: str = DEFAULT_ARCHIVE_ROOT) -> int:
+        """Index new folders in date directories whose mtime changed since the last scan."""
+        root = os.path.normpath(root)
+        if not os.path.isdir(root):
+            return 0
+        conn = self._connect()
+        scanned = dict(
+            conn.execute(
+                "SELECT key, value FROM meta WHERE key LIKE ?", (f"archive_dir_mtime:{root}{os.sep}%",)
+            ).fetchall()
+        )
+        count = 0
+        for date_entry in sorted(os.scandir(root), key=lambda e: e.name):
+            if not date_entry.is_dir():
+                continue
+            date_dir = os.path.join(root, date_entry.name)
+            key = f"archive_dir_mtime:{date_dir}"
+            # 先取 mtime 再扫描：扫描期间新建的目录会让下次 mtime 不一致，再扫一遍
+            mtime = str(date_entry.stat().st_mtime_ns)
+            if scanned.get(key) == mtime:
+                continue
+            known = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT folder FROM archive_folders WHERE folder LIKE ?", (f"{date_dir}{os.sep}%",)
+                )
+            }
+            for entry in os.scandir(date_dir):
+                folder = os.path.join(date_dir, entry.name)
+                if entry.is_dir() and folder not in known:
+                    self.index_folder(folder)
+                    count += 1
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, mtime))
+        return count
+
+    def ensure_built(self, root: str = DEFAULT_ARCHIVE_ROOT) -> None:
+        """Build the index on first use, then pick up folders added outside the pipeline."""
+        root = os.path.normpath(root)
+        row = (
+            self._connect()
+            .execute("SELECT 1 FROM meta WHERE key = ?", (f"archive_index_built:{root}",))
+            .fetchone()
+        )
+        if not row:
+            count = self.rebuild(root)
+            print(f"✅ 归档索引已建立: {count} 个目录")
+            return
+        count = self.refresh(root)
+        if count:
+            print(f"🔄 归档索引新增 {count} 个目录")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _live(self, rows: list[tuple[str, str]], source_id: str) -> str | None:
+        for folder, indexed_id in rows:
+            if source_id and indexed_id and indexed_id != source_id:
+                continue
+            if os.path.isdir(folder):
+                return folder
+            # 目录已被手动删除：清掉陈旧条目
+            with self._connect() as conn:
+                conn.execute("DELETE FROM archive_folders WHERE folder = ?", (folder,))
+        return None
+
+    def find(self, platform: str, *, source_id: str = "", title: str = "", channel: str = "") -> str | None:
+        """Archive folder already holding this item, or None."""
+        conn = self._connect()
+        if source_id:
+            rows = conn.execute(
+                "SELECT folder, source_id FROM archive_folders WHERE platform = ? AND source_id = ?",
+                (platform, source_id),
+            ).fetchall()
+            found = self._live(rows, source_id)
+            if found:
+                return found
+        title_key = normalize_title(title)
+        if title_key:
+            rows = conn.execute(
+                "SELECT folder, source_id FROM archive_folders WHERE platform = ? AND title_key = ?",
+                (platform, title_key),
+            ).fetchall()
+            found = self._live(rows, source_id)
+            if found:
+                return found
+        if title and channel:
+            # 没有 metadata.md 的旧目录只能按目录名精确匹配
+            name = f"{platform}_{sanitize_filename(channel)}_{sanitize_filename(title)}"
+            rows = conn.execute(
+                "SELECT folder, source_id FROM archive_folders WHERE name = ?", (name,)
+            ).fetchall()
+            return self._live(rows, source_id)
+        return None
+
+
+_default_index: ArchiveIndex | None = None
+_default_index_lock = threading.Lock()
+# 本进程内已同步过的归档根目录：之后的查找直接查索引，不再扫描日期目录
+_synced_roots: set[str] = set()
+
+
+def get_default_index(root: str | None = None, *, refresh: bool = False) -> ArchiveIndex:
+    """Process-wide index in ``config/state.db``.
+
+    With ``root``, the index is built / refreshed from it once per process; ``refresh=True``
+    rescans changed date directories again (once per feed scan, not per lookup).
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = ArchiveIndex()
+        if root is not None:
+            root = os.path.normpath(root)
+            if refresh or root not in _synced_roots:
+                _default_index.ensure_built(root)
+                _synced_roots.add(root)
+        return _default_index
+
+
+def register_folder(folder: str, *, platform: str, source_id: str, title: str, date: str = "") -> None:
+    """Best-effort registration for entry scripts that just created ``folder``."""
+    try:
+        get_default_index().add(folder, platform=platform, source_id=source_id, title=title, date=date)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"⚠️ 归档索引写入失败 ({folder}): {exc}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild":
+        target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ARCHIVE_ROOT
+        print(f"✅ 归档索引已重建: {ArchiveIndex().rebuild(target)} 个目录")
+    else:
+        print("Usage: python3 archive_index.py rebuild [content_archive]")
+        sys.exit(1)
@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
 """
 批量重写脚本 (增强版)
-支持分批执行、大文件检测和完整性检查
+支持大文件检测、完整性检查和自适应并发（见 ``rewrite_scheduler``）
 """
 
 import argparse
 import os
 import sys
-import time
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -15,11 +14,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import rewrite_service
 from distribution_pipeline.automation import generate_distribution_after_rewrite
+from llm_client import get_llm_client
+from rewrite_scheduler import (
+    PROMPT_OVERHEAD_TOKENS,
+    AdaptiveConcurrency,
+    QueueItem,
+    estimate_file_tokens,
+    resolve_max_concurrency,
+    run_queue,
+)
 from utils.content_validator import scan_content_archive
 
 # 阈值配置
-LARGE_FILE_THRESHOLD_KB = 40  # 超过此大小认为是"大文件"，单独处理
-BATCH_DELAY = 10  # 批次间延迟（秒）
+LARGE_FILE_THRESHOLD_KB = 40  # 超过此大小认为是"大文件"，最多占一半并发槽
 
 
 def categorize_by_size(transcript_paths: list) -> dict:
@@ -46,26 +53,32 @@ def categorize_by_size(transcript_paths: list) -> dict:
     return categories
 
 
-def process_batch(tasks: list, dry_run: bool = False, generate_distribution: bool = False) -> dict:
+def process_batch(
+    tasks: list,
+    dry_run: bool = False,
+    generate_distribution: bool = False,
+    max_concurrency: int | None = None,
+    use_cache: bool = True,
+) -> dict:
     """
-    处理一批 rewrite 任务
+    处理一批 rewrite 任务（并发数按 LLM 实际反馈自适应调节）
 
     Args:
         tasks: 任务列表，每个元素包含 transcript, metadata, output 路径
         dry_run: True 则只检查不执行
+        max_concurrency: 并发上限，默认取 settings.rewrite_max_concurrency
+        use_cache: False 则忽略改写缓存，强制重新生成
 
     Returns: {'success': int, 'failed': int, 'skipped': int}
     """
     results = {"success": 0, "failed": 0, "skipped": 0}
+    queue_items = []
 
     for task in tasks:
         transcript_path = task["transcript"]
-        metadata_path = task["metadata"]
         output_path = task["output"]
         content_name = Path(transcript_path).parent.name
 
-        print(f"\n▶️  处理: {content_name}")
-
         # 检查 transcript 是否存在
         if not os.path.exists(transcript_path):
             print(f"❌ Transcript 不存在: {transcript_path}")
@@ -76,7 +89,7 @@ def process_batch(tasks: list, dry_run: bool = False, generate_distribution: boo
         if os.path.exists(output_path):
             size = os.path.getsize(output_path)
             if size > 100:  # 文件存在且有意义（非空）
-                print(f"⏭️  已存在 rewritten.md ({size} bytes)，跳过")
+                print(f"⏭️  {content_name}: 已存在 rewritten.md ({size} bytes)，跳过")
                 if generate_distribution and not dry_run:
                     generate_distribution_after_rewrite(
                         Path(output_path).parent, context="batch_rewrite:skipped"
@@ -84,27 +97,50 @@ def process_batch(tasks: list, dry_run: bool = False, generate_distribution: boo
                 results["skipped"] += 1
                 continue
 
-        # 执行 rewrite
         if dry_run:
             print(f"🔍 [DRY RUN] 将会执行 rewrite: {transcript_path}")
             results["success"] += 1
-        else:
-            try:
-                success = rewrite_service.rewrite_content(transcript_path, metadata_path, output_path)
-
-                if success:
-                    print(f"✅ 成功: {content_name}")
-                    if generate_distribution:
-                        generate_distribution_after_rewrite(Path(output_path).parent, context="batch_rewrite")
-                    results["success"] += 1
-                else:
-                    print(f"❌ 失败: {content_name}")
-                    results["failed"] += 1
-
-            except Exception as e:
-                print(f"❌ 错误: {e}")
-                results["failed"] += 1
+            continue
+
+        queue_items.append(QueueItem(transcript_path, estimate_file_tokens(transcript_path), task))
+
+    if not queue_items:
+        return results
 
+    if max_concurrency is None:
+        max_concurrency = resolve_max_concurrency((rewrite_service.load_config() or {}).get("settings"))
+    controller = AdaptiveConcurrency(max_concurrency)
+    # 大文件阈值按同等体积的中文稿（UTF-8 每字 3 字节）折算成 token
+    large_tokens = LARGE_FILE_THRESHOLD_KB * 1024 // 3 + PROMPT_OVERHEAD_TOKENS
+    print(
+        f"\n🚦 并发改写 {len(queue_items)} 个任务（初始并发 {controller.limit}，上限 {controller.max_limit}）"
+    )
+
+    def rewrite(item: QueueItem) -> bool:
+        name = Path(item.key).parent.name
+        print(f"\n▶️  处理: {name} (~{item.tokens} tokens)")
+        task = item.payload
+        return rewrite_service.rewrite_content(
+            task["transcript"], task["metadata"], task["output"], use_cache=use_cache, slots=controller
+        )
+
+    def finished(item: QueueItem, ok: bool) -> None:
+        name = Path(item.key).parent.name
+        if not ok:
+            print(f"❌ 失败: {name}")
+            results["failed"] += 1
+            return
+        print(f"✅ 成功: {name}")
+        if generate_distribution:
+            generate_distribution_after_rewrite(Path(item.payload["output"]).parent, context="batch_rewrite")
+        results["success"] += 1
+
+    client = get_llm_client()
+    client.add_listener(controller.observe)
+    try:
+        run_queue(queue_items, rewrite, controller, large_tokens=large_tokens, on_done=finished)
+    finally:
+        client.remove_listener(controller.observe)
     return results
 
 
@@ -148,6 +184,10 @@ def main():
     parser.add_argument("--large-only", action="store_true", help="只处理大文件 (>40KB)")
     parser.add_argument("--small-only", action="store_true", help="只处理小文件 (<=40KB)")
     parser.add_argument("--archive-root", default="content_archive", help="内容存档根目录")
+    parser.add_argument("--no-cache", action="store_true", help="忽略改写缓存，强制重新调用 LLM")
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="并发上限（默认 settings.rewrite_max_concurrency）"
+    )
     parser.add_argument(
         "--generate-distribution", action="store_true", help="rewrite 成功或已存在后生成 Guizang 小红书分发包"
     )
@@ -189,7 +229,7 @@ def main():
         tasks_to_process = categories["small"]
         print("\n⚠️  只处理小文件")
     else:
-        # 默认：先处理小文件，再处理大文件
+        # 默认：全部，按预估 token 成本统一调度
         tasks_to_process = categories["small"] + categories["large"]
 
     if not tasks_to_process:
@@ -212,39 +252,18 @@ def main():
     print("开始处理...")
     print("=" * 60)
 
-    # 先处理小文件批次
-    if categories["small"]:
-        print(f"\n📦 第一批次: 小文件 ({len(categories['small'])} 个)")
-        small_transcripts = {x["transcript"] for x in categories["small"]}
-        small_tasks = [
-            {"transcript": t["transcript"], "metadata": t["metadata"], "output": t["output"]}
-            for t in all_tasks
-            if t["transcript"] in small_transcripts
-        ]
-        results1 = process_batch(small_tasks, generate_distribution=args.generate_distribution)
-
-        print(
-            f"\n小文件批次完成: {results1['success']} 成功, {results1['skipped']} 跳过, {results1['failed']} 失败"
-        )
-
-        if categories["large"]:
-            print(f"\n⏳ 等待 {BATCH_DELAY} 秒后处理大文件批次...")
-            time.sleep(BATCH_DELAY)
-
-    # 再处理大文件批次（每个之间增加延迟）
-    if categories["large"]:
-        print(f"\n📦 第二批次: 大文件 ({len(categories['large'])} 个)")
-        large_transcripts = {x["transcript"] for x in categories["large"]}
-        large_tasks = [
+    selected = {x["transcript"] for x in tasks_to_process}
+    results = process_batch(
+        [
             {"transcript": t["transcript"], "metadata": t["metadata"], "output": t["output"]}
             for t in all_tasks
-            if t["transcript"] in large_transcripts
-        ]
-
-        for i, task in enumerate(large_tasks, 1):
-            print(f"\n[{i}/{len(large_tasks)}] 处理大文件任务")
-            process_batch([task], generate_distribution=args.generate_distribution)
-            time.sleep(BATCH_DELAY)
+            if t["transcript"] in selected
+        ],
+        generate_distribution=args.generate_distribution,
+        max_concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+    )
+    print(f"\n完成: {results['success']} 成功, {results['skipped']} 跳过, {results['failed']} 失败")
 
     # 总结
     print("\n" + "=" * 60)
@@ -119,3 +119,16 @@ def mask_secret(value, visible=4):
         return "***"
     s = str(value)
     return s[:visible] + "***" + s[-visible:]
+
+
+def get_cache_dir(name=""):
+    """
+    返回本地缓存目录（不存在则创建）。
+
+    根目录默认 ./.chora_cache，可用环境变量 CHORA_CACHE_DIR 覆盖；
+    name 为子目录名，例如 get_cache_dir("video_info")。
+    """
+    root = os.getenv("CHORA_CACHE_DIR") or ".chora_cache"
+    path = os.path.join(root, name) if name else root
+    os.makedirs(path, exist_ok=True)
+    return path
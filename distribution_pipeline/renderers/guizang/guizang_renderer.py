@@ -147,31 +147,18 @@ def _select_mode_via_llm(package: dict, target: str) -> str | None:
         f"{payload_text}\n\n模式："
     )
 
+    from llm_client import PROVIDER_OPENAI, LLMEndpoint, LLMError, get_llm_client
+
+    endpoint = LLMEndpoint(PROVIDER_OPENAI, url, api_key, model)
     try:
-        import requests  # type: ignore[import-not-found]
-
-        response = requests.post(
-            url,
-            headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
-            json={
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 16,
-                "temperature": 0.1,
-            },
-            timeout=15,
+        # 單次嘗試：失敗直接交給啟發式，不值得為選風格等待退避
+        result = get_llm_client().generate(
+            endpoint, prompt, max_tokens=16, temperature=0.1, timeout=15, max_attempts=1
         )
-    except Exception as exc:  # noqa: BLE001 - any network failure → fallback
+    except LLMError as exc:
         print(f"[guizang_mode_llm] LLM 調用失敗: {exc}")
         return None
-    if response.status_code != 200:
-        print(f"[guizang_mode_llm] 非 200: {response.status_code}")
-        return None
-    try:
-        result = response.json()
-        text = (result.get("choices", [{}])[0].get("message", {}).get("content") or "").strip().lower()
-    except Exception:
-        return None
+    text = result.text.strip().lower()
     if "swiss" in text:
         return "swiss"
     if "editorial" in text:
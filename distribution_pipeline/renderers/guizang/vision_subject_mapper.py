@@ -110,7 +110,7 @@ def vision_timeout() -> int:
 
 
 # -----------------------------------------------------------------------------
-# 3. Gemini REST 调用（与戊项 generate_cover.py 同管线，不依赖 generate_cover）
+# 3. Gemini REST 调用（共享 llm_client 连接池与重试，不依赖 generate_cover）
 # -----------------------------------------------------------------------------
 
 
@@ -147,63 +147,34 @@ def _encode_image(image_path: Path) -> tuple[str, str]:
     return mime, data
 
 
-def _post_gemini_request(base_url: str, api_key: str, payload: dict):
-    import requests  # type: ignore[import-not-found]
+def _post_gemini_request(endpoint, parts: list):
+    from llm_client import get_llm_client
 
-    return requests.post(
-        base_url,
-        headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
-        json=payload,
+    return get_llm_client().generate(
+        endpoint,
+        parts,
+        temperature=0.2,
+        top_p=0.95,
+        top_k=40,
+        max_tokens=2048,
+        json_mode=True,
         timeout=vision_timeout(),
     )
 
 
 def call_gemini_vision(image_path: Path, prompt: str | None = None) -> str | None:
-    """调 Gemini REST（generateContent）做 vision 读图；返回 text（应为 JSON）。"""
-    api = _load_gemini_config()
-    base_url = api["base_url"]
-    api_key = api["api_key"]
+    """调 Gemini REST（generateContent，经共享 llm_client）做 vision 读图；返回 text（应为 JSON）。"""
+    api = _load_gemini_config()  # 顺带把仓库根目录放进 sys.path
+    from llm_client import ImagePart, LLMEndpoint, LLMError
+
+    endpoint = LLMEndpoint.from_config(api)
     mime, b64 = _encode_image(image_path)
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": prompt or _VISION_PROMPT},
-                    {"inline_data": {"mime_type": mime, "data": b64}},
-                ],
-            }
-        ],
-        "generationConfig": {
-            "temperature": 0.2,
-            "topK": 40,
-            "topP": 0.95,
-            "maxOutputTokens": 2048,
-            "responseMimeType": "application/json",
-        },
-    }
     try:
-        response = _post_gemini_request(base_url, api_key, payload)
-    except Exception as exc:
-        print(f"[vision_subject_mapper] Gemini vision 网络异常: {exc}")
+        result = _post_gemini_request(endpoint, [prompt or _VISION_PROMPT, ImagePart(mime, b64)])
+    except LLMError as exc:
+        print(f"[vision_subject_mapper] Gemini vision 调用失败: {exc}")
         return None
-    if response.status_code != 200:
-        print(f"[vision_subject_mapper] Gemini vision 非 200: {response.status_code} {response.text[:200]}")
-        return None
-    try:
-        result = response.json()
-    except json.JSONDecodeError:
-        return None
-    # Gemini 原生：candidates[0].content.parts[0].text
-    candidates = result.get("candidates") or []
-    if not candidates:
-        return None
-    parts = candidates[0].get("content", {}).get("parts", [])
-    for part in parts:
-        text = part.get("text")
-        if text:
-            return text
-    return None
+    return result.text
 
 
 # -----------------------------------------------------------------------------
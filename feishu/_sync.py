@@ -22,6 +22,8 @@ import os
 import subprocess
 import sys
 
+from state_store import record_stage
+
 
 def _auto_publish_enabled():
     """Whether new records should default to ``published=True``.
@@ -178,6 +180,7 @@ class SyncMixin:
                         # Record is complete, skip
                         print(f"⏭️  Skip (complete): {title}...")
                         skipped += 1
+                        record_stage(content_id, "synced", detail="already complete")
                         continue
 
                     # Record is incomplete or force update
@@ -207,6 +210,7 @@ class SyncMixin:
                     record_id = existing.get("record_id")
                     if self.update_record(record_id, item, available_fields, file_token):
                         updated += 1
+                        record_stage(content_id, "synced")
                     else:
                         failed += 1
                 else:
@@ -228,6 +232,7 @@ class SyncMixin:
 
                     if self.create_record(item, available_fields, file_token):
                         created += 1
+                        record_stage(content_id, "synced")
                     else:
                         failed += 1
 
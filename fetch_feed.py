@@ -1,12 +1,21 @@
+import argparse
 import json
 import os
-import re
 import subprocess
+import time
 from datetime import datetime, timedelta
 
-import yaml
-
+from archive_index import get_default_index as get_archive_index
 from config_loader import load_sources_config
+from ingestion.cursor import CursorTracker, ScanCursor, filters_fingerprint
+from ingestion.feed_parser import FeedEntry, iter_xiaoyuzhou_entries, iter_youtube_entries
+from ingestion.http_cache import cached_fetch
+from ingestion.http_cache import get_default_cache as get_http_cache
+from ingestion.http_client import get_client as get_http_client
+from ingestion.scan import XIAOYUZHOU_HOST, YOUTUBE_HOST, ScanJob, resolve_scan_settings, run_scan
+from ingestion.video_info import VideoInfo, get_default_cache, resolve_video_info
+from ingestion.watch import PollScheduler, resolve_watch_settings, run_watch
+from state_store import StateStore, get_default_store
 
 # 确保 Python 用户安装目录在 PATH 中
 user_bin = os.path.expanduser("~/Library/Python/3.9/bin")
@@ -15,7 +24,11 @@ os.environ["PATH"] = f"{user_bin}:{local_bin}:{os.environ.get('PATH', '')}"
 
 # 全局路径配置
 CONFIG_PATH = "config/sources.yaml"
-STATE_PATH = "config/state.yaml"
+
+# YouTube RSS 固定返回最近 15 条；yt-dlp 每页取 8 条，游标之后缺口最多向后翻 6 页
+RSS_PAGE_SIZE = 15
+YTDLP_PAGE_SIZE = 8
+YTDLP_MAX_PAGES = 6
 
 
 def load_config():
@@ -34,141 +47,142 @@ def load_config():
     return config
 
 
-def load_state():
-    if not os.path.exists(STATE_PATH):
-        return {"processed_ids": []}
-    with open(STATE_PATH, "r", encoding="utf-8") as f:
-        state = yaml.safe_load(f)
-        if not state or "processed_ids" not in state:
-            return {"processed_ids": []}
-        return state
-
-
-def save_state(state):
-    with open(STATE_PATH, "w", encoding="utf-8") as f:
-        yaml.safe_dump(state, f)
-
+def load_state() -> StateStore:
+    # 状态台账 config/state.db；首次使用时自动导入 config/state.yaml 的 processed_ids
+    return get_default_store()
 
-def get_safe_title(title):
-    # Match process_video.py: remove invalid chars, replace spaces, truncate to 50
-    clean = re.sub(r'[\\/*?:"<>|]', "", title).replace(" ", "_")
-    return clean[:50]
 
+def is_already_processed(state: StateStore, content_id):
+    return state.is_processed(content_id)
 
-def is_already_processed(state, content_id):
-    return content_id in state.get("processed_ids", [])
 
+def is_folder_exists(output_dir, date, platform, channel, title, content_id=""):
+    # 归档索引查找：按源 ID / 完整标题命中，不再逐个 listdir 日期目录（date 保留为兼容参数）
+    folder = get_archive_index(output_dir).find(platform, source_id=content_id, title=title, channel=channel)
+    return folder is not None
 
-def is_folder_exists(output_dir, date, platform, channel, title):
-    safe_title = get_safe_title(title)
-    # Sanitize channel too (handle spaces, special chars) to match folder naming convention
-    safe_channel = get_safe_title(channel)
 
-    date_dir = os.path.join(output_dir, date)
-    if not os.path.exists(date_dir):
-        return False
+def _open_cursor(state, key, include_keywords, min_duration):
+    """订阅的增量扫描游标；CHORA_SCAN_FULL=1 时忽略游标，按时间窗口全量扫描"""
+    full_scan = os.environ.get("CHORA_SCAN_FULL", "").strip().lower() in ("1", "true", "yes", "on")
+    cursor = None if full_scan else ScanCursor.from_dict(state.load_cursor(key))
+    return CursorTracker(cursor, filters_fingerprint(include_keywords, min_duration))
 
-    # Check for folder existence
-    # Expected format: {platform}_{channel}_{title}
-    # We check if any folder contains the safe_title and starts with platform
-    # We try to match channel if possible, but relax it if strict match fails (in case config name != metadata name)
 
-    prefix_strict = f"{platform}_{safe_channel}_"
-
-    for existing_folder in os.listdir(date_dir):
-        # Strict match (best)
-        if existing_folder.startswith(prefix_strict) and safe_title in existing_folder:
-            return True
-
-        # Relaxed match (if channel name doesn't match perfectly but title and platform do)
-        # Only if strict match didn't find anything, we might continue loop, but we can check here.
-        if existing_folder.startswith(f"{platform}_") and safe_title in existing_folder:
-            # To be safe, maybe we rely on this?
-            # For now, let's Stick to checking if safe_title is present in a platform folder.
-            return True
-
-    return False
+def _save_cursor(state, key, tracker):
+    cursor = tracker.advanced()
+    if cursor:
+        state.save_cursor(key, cursor.to_dict())
+    # 新看到的条目记入发布历史，--watch 模式据此估计频道更新频率
+    state.record_publishes(key, [(e.id, e.published) for e in tracker.examined.values()])
 
 
 def fetch_youtube_feed(channel_id, name, min_duration, days, include_keywords, state):
     print(f"正在扫描 YouTube: {name}")
     # 使用日期（不含时间）来比较，确保包含边界日期
     cutoff_date = (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    cursor_key = f"youtube:{channel_id}"
+    tracker = _open_cursor(state, cursor_key, include_keywords, min_duration)
 
-    # 方法 1: 尝试 RSS Feed
-    rss_items = _fetch_via_rss(channel_id, name, cutoff_date, min_duration, include_keywords, state)
-    if rss_items:
+    # 方法 1: 尝试 RSS Feed（到达上次的游标即停止）
+    rss_items = _fetch_via_rss(channel_id, name, cutoff_date, min_duration, include_keywords, state, tracker)
+    if rss_items is not None and not tracker.gap:
+        _save_cursor(state, cursor_key, tracker)
         return rss_items
 
-    # 方法 2: 使用 yt-dlp (带重试)
-    print("  📡 RSS 失败，使用 yt-dlp...")
-    ytdlp_items = _fetch_via_ytdlp(channel_id, name, cutoff_date, min_duration, include_keywords, state)
-    return ytdlp_items
+    # 方法 2: 使用 yt-dlp；RSS 失败，或 RSS 的 15 条没覆盖到游标时向后翻页
+    if rss_items is None:
+        print("  📡 RSS 失败，使用 yt-dlp...")
+    else:
+        print("  📡 RSS 未覆盖到上次扫描位置，使用 yt-dlp 向后翻页...")
+    ytdlp_items = _fetch_via_ytdlp(
+        channel_id, name, cutoff_date, min_duration, include_keywords, state, tracker
+    )
+    _save_cursor(state, cursor_key, tracker)
+
+    seen = {item["id"] for item in rss_items or []}
+    return (rss_items or []) + [item for item in ytdlp_items if item["id"] not in seen]
+
+
+def _load_entries(url, response, cutoff_date, namespace, parse):
+    """解析订阅列表；页面未变化且缓存覆盖的日期范围足够时，直接复用上次的解析结果"""
+    http_cache = get_http_cache()
+    cutoff_str = cutoff_date.strftime("%Y-%m-%d")
+    cached = None if response.changed else http_cache.load_parsed(url, namespace)
+    if cached and cached.get("cutoff", "9999-99-99") <= cutoff_str:
+        return [
+            entry
+            for entry in map(FeedEntry.from_dict, cached.get("entries", []))
+            if not entry.is_older_than(cutoff_date)
+        ]
 
+    entries = list(parse(response.body, cutoff=cutoff_date))
+    http_cache.save_parsed(url, namespace, {"cutoff": cutoff_str, "entries": [e.to_dict() for e in entries]})
+    return entries
 
-def _fetch_via_rss(channel_id, name, cutoff_date, min_duration, include_keywords, state):
-    """通过 RSS Feed 获取视频列表"""
+
+def _fetch_via_rss(channel_id, name, cutoff_date, min_duration, include_keywords, state, tracker):
+    """通过 RSS Feed 获取视频列表；RSS 不可用时返回 None"""
     rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
 
     items = []
-    xml_content = ""
+    response = None
 
-    # 重试 3 次
+    # 重试 3 次；条件请求命中 (304 / 正文未变) 时直接复用上次的解析结果
     for attempt in range(3):
         try:
-            result = subprocess.run(
-                ["curl", "-s", "-L", "--max-time", "20", rss_url], capture_output=True, text=True, timeout=25
-            )
-            xml_content = result.stdout
-
-            if xml_content and "<feed" in xml_content:
+            response = cached_fetch(rss_url, timeout=20)
+            if response.body and "<feed" in response.body:
                 break
-            else:
-                import time
-
-                time.sleep(2)
+            time.sleep(2)
         except Exception:
-            import time
-
             time.sleep(2)
 
-    if not xml_content or "<feed" not in xml_content:
-        return []
+    if not response or "<feed" not in response.body:
+        return None
 
     try:
-        entries = re.findall(r"<entry>(.*?)</entry>", xml_content, re.DOTALL)
+        entries = _load_entries(rss_url, response, cutoff_date, "youtube_rss", iter_youtube_entries)
 
+        candidates = []
         for entry in entries:
-            vid_match = re.search(r"<yt:videoId>([^<]+)</yt:videoId>", entry)
-            if not vid_match:
+            # 早于游标的条目上次已定论；同一天已见过的条目跳过
+            if tracker.is_below(entry):
+                break
+            if tracker.is_seen(entry):
                 continue
-            v_id = vid_match.group(1)
+            tracker.examine(entry)
 
+            v_id = entry.id
             if is_already_processed(state, v_id):
                 continue
 
-            title_match = re.search(r"<title>([^<]+)</title>", entry)
-            title = title_match.group(1) if title_match else ""
-
-            pub_match = re.search(r"<published>([^<]+)</published>", entry)
-            if pub_match:
-                pub_str = pub_match.group(1)[:10]
-                try:
-                    video_date = datetime.strptime(pub_str, "%Y-%m-%d")
-                    if video_date < cutoff_date:
-                        continue
-                    formatted_date = pub_str
-                except ValueError:
-                    continue
-            else:
+            title = entry.title
+            formatted_date = entry.published
+            if not formatted_date:
                 continue
 
             if include_keywords:
                 if not any(kw.lower() in title.lower() for kw in include_keywords):
                     continue
 
-            # 获取视频时长
-            duration = _get_video_duration(v_id)
+            candidates.append((v_id, title, formatted_date))
+
+        tracker.note_page(
+            entries[-1].published if entries else "",
+            cutoff_date.strftime("%Y-%m-%d"),
+            page_full=len(entries) >= RSS_PAGE_SIZE,
+        )
+
+        # 获取视频时长：一次批量查询 + 本地缓存，已知视频不再探测
+        infos = resolve_video_info([v_id for v_id, _, _ in candidates])
+
+        for v_id, title, formatted_date in candidates:
+            duration = infos[v_id].duration_minutes
+            if duration <= 0:
+                print(f"  ⚠️ 无法获取视频 {v_id} 的时长")
+                # 时长暂时查不到：不推进游标，下次扫描再试
+                tracker.hold(v_id)
             if duration < min_duration:
                 print(f"  ⏭️ 跳过 (时长不足): {title[:30]}... ({round(duration, 1)} 分钟)")
                 continue
@@ -184,117 +198,145 @@ def _fetch_via_rss(channel_id, name, cutoff_date, min_duration, include_keywords
                     "duration": round(duration, 1),
                 }
             )
+            # 已列入待处理清单但还没处理：游标不越过它
+            tracker.hold(v_id)
     except Exception as e:
         print(f"  ⚠️ RSS 解析失败: {e}")
+        return None
 
     return items
 
 
-def _fetch_via_ytdlp(channel_id, name, cutoff_date, min_duration, include_keywords, state):
-    """通过 yt-dlp 获取视频列表"""
+def _list_ytdlp_page(url, start, end):
+    """flat-playlist 列出频道第 start-end 条视频；失败返回 None"""
+    cmd = ["yt-dlp", "--quiet", "--flat-playlist", "--dump-json", "--playlist-items", f"{start}-{end}", url]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+
+    videos = []
+    for line in result.stdout.splitlines():
+        if not line.strip():
+            continue
+        try:
+            video = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if video.get("id"):
+            videos.append(video)
+    return videos
+
+
+def _fetch_via_ytdlp(channel_id, name, cutoff_date, min_duration, include_keywords, state, tracker):
+    """通过 yt-dlp 获取视频列表；只有最旧一条仍比游标新时才向后翻页"""
     urls_to_try = [
         f"https://www.youtube.com/channel/{channel_id}/videos",
         f'https://www.youtube.com/@{name.replace(" ", "")}/videos',
     ]
+    cutoff_str = cutoff_date.strftime("%Y-%m-%d")
 
     items = []
     for url in urls_to_try:
         try:
-            # 减少获取数量：从 1-15 改为 1-8
-            cmd = ["yt-dlp", "--quiet", "--flat-playlist", "--dump-json", "--playlist-items", "1-8", url]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-            if result.returncode != 0 or not result.stdout.strip():
-                continue
-
             # 早期退出计数器
             consecutive_old = 0
             max_consecutive_old = 2  # 连续2个超出日期范围后停止
 
-            video_count = 0
-            for line in result.stdout.splitlines():
-                if not line.strip():
-                    continue
-
-                # 早期退出检查
-                if consecutive_old >= max_consecutive_old:
+            for page in range(YTDLP_MAX_PAGES):
+                start = page * YTDLP_PAGE_SIZE + 1
+                videos = _list_ytdlp_page(url, start, start + YTDLP_PAGE_SIZE - 1)
+                if videos is None:
                     break
 
-                try:
-                    video = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                v_id = video.get("id", "")
-                if not v_id or is_already_processed(state, v_id):
-                    continue
-
-                title = video.get("title", "")
-                upload_date = video.get("upload_date", "")
-
-                # 如果没有 upload_date，需要单独获取
-                if not upload_date:
-                    try:
-                        date_result = subprocess.run(
-                            [
-                                "yt-dlp",
-                                "--quiet",
-                                "--print",
-                                "upload_date",
-                                f"https://www.youtube.com/watch?v={v_id}",
-                            ],
-                            capture_output=True,
-                            text=True,
-                            timeout=30,
-                        )
-                        upload_date = date_result.stdout.strip()
-                    except Exception:
-                        upload_date = ""
+                # flat-playlist 自带的时长先写入缓存；缺日期/时长的视频合并成一次批量查询
+                # 已处理的视频也要有日期才能判断是否到达游标；结果有缓存，只探测一次
+                get_default_cache().put_many(
+                    [VideoInfo(v["id"], v.get("duration") or 0, v.get("upload_date") or "") for v in videos]
+                )
+                infos = resolve_video_info(
+                    [v["id"] for v in videos if not v.get("upload_date") or not v.get("duration")]
+                )
 
-                if upload_date and len(upload_date) >= 8:
+                stop = False
+                oldest = ""
+                for video in videos:
+                    # 早期退出检查
+                    if consecutive_old >= max_consecutive_old:
+                        stop = True
+                        break
+
+                    v_id = video["id"]
+                    info = infos.get(v_id)
+                    title = video.get("title", "")
+                    upload_date = video.get("upload_date", "")
+
+                    # 如果没有 upload_date，使用批量查询结果
+                    if not upload_date and info:
+                        upload_date = info.upload_date
+
+                    if not upload_date or len(upload_date) < 8:
+                        # 无法获取日期，跳过
+                        continue
                     try:
                         video_date = datetime(
                             int(upload_date[:4]), int(upload_date[4:6]), int(upload_date[6:8])
                         )
-                        if video_date < cutoff_date:
-                            print(f"  ⏭️ 跳过 (超出日期范围): {title[:30]}... ({upload_date})")
-                            consecutive_old += 1
-                            video_count += 1
-                            continue
-                        formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                        consecutive_old = 0  # 重置计数器
                     except ValueError:
                         continue
-                else:
-                    # 无法获取日期，跳过
-                    continue
+                    formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+                    oldest = formatted_date
+
+                    entry = FeedEntry(
+                        "youtube", v_id, title, formatted_date, f"https://www.youtube.com/watch?v={v_id}"
+                    )
+                    if tracker.is_below(entry):
+                        stop = True
+                        break
+                    if tracker.is_seen(entry):
+                        continue
 
-                if include_keywords:
-                    if not any(kw.lower() in title.lower() for kw in include_keywords):
+                    if video_date < cutoff_date:
+                        print(f"  ⏭️ 跳过 (超出日期范围): {title[:30]}... ({upload_date})")
+                        consecutive_old += 1
                         continue
+                    consecutive_old = 0  # 重置计数器
+                    tracker.examine(entry)
 
-                # 获取时长（增强版）
-                duration = (video.get("duration") or 0) / 60
-                if duration == 0:
-                    duration = _get_video_duration(v_id)
+                    if is_already_processed(state, v_id):
+                        continue
 
-                if duration < min_duration:
-                    print(f"  ⏭️ 跳过 (时长不足): {title[:30]}... ({round(duration, 1)} 分钟)")
-                    video_count += 1
-                    continue
+                    if include_keywords:
+                        if not any(kw.lower() in title.lower() for kw in include_keywords):
+                            continue
 
-                items.append(
-                    {
-                        "platform": "youtube",
-                        "channel": name,
-                        "title": title,
-                        "date": formatted_date,
-                        "url": f"https://www.youtube.com/watch?v={v_id}",
-                        "id": v_id,
-                        "duration": round(duration, 1),
-                    }
-                )
-                video_count += 1
+                    # 获取时长（增强版）
+                    duration = (video.get("duration") or 0) / 60
+                    if duration == 0 and info:
+                        duration = info.duration_minutes
+                    if duration <= 0:
+                        tracker.hold(v_id)
+
+                    if duration < min_duration:
+                        print(f"  ⏭️ 跳过 (时长不足): {title[:30]}... ({round(duration, 1)} 分钟)")
+                        continue
+
+                    items.append(
+                        {
+                            "platform": "youtube",
+                            "channel": name,
+                            "title": title,
+                            "date": formatted_date,
+                            "url": f"https://www.youtube.com/watch?v={v_id}",
+                            "id": v_id,
+                            "duration": round(duration, 1),
+                        }
+                    )
+                    tracker.hold(v_id)
+
+                needs_older_page = tracker.note_page(oldest, cutoff_str, len(videos) >= YTDLP_PAGE_SIZE)
+                if stop or not needs_older_page:
+                    break
+                print(f"  📄 翻页: 第 {page + 2} 页")
 
             if items:
                 break  # 成功获取，不再尝试其他 URL
@@ -307,133 +349,65 @@ def _fetch_via_ytdlp(channel_id, name, cutoff_date, min_duration, include_keywor
     return items
 
 
-def _get_video_duration(video_id):
-    """获取单个视频的时长（分钟），带重试和备选方案"""
-    # 方法 1: yt-dlp --print duration
-    try:
-        result = subprocess.run(
-            ["yt-dlp", "--quiet", "--print", "duration", f"https://www.youtube.com/watch?v={video_id}"],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.stdout.strip().isdigit():
-            return int(result.stdout.strip()) / 60
-    except Exception:
-        pass
-
-    # 方法 2: yt-dlp -J 获取完整 JSON
-    try:
-        result = subprocess.run(
-            ["yt-dlp", "--quiet", "-J", f"https://www.youtube.com/watch?v={video_id}"],
-            capture_output=True,
-            text=True,
-            timeout=45,
-        )
-        if result.stdout.strip():
-            data = json.loads(result.stdout)
-            duration_sec = data.get("duration", 0)
-            if duration_sec:
-                return duration_sec / 60
-    except Exception:
-        pass
-
-    print(f"  ⚠️ 无法获取视频 {video_id} 的时长")
-    return 0
-
-
 def fetch_xiaoyuzhou_feed(podcast_id, name, min_duration, days, include_keywords, state):
     print(f"正在扫描小宇宙: {name}")
     url = f"https://www.xiaoyuzhoufm.com/podcast/{podcast_id}"
     items = []
     cutoff_date = datetime.now() - timedelta(days=days)
+    cursor_key = f"xiaoyuzhou:{podcast_id}"
+    tracker = _open_cursor(state, cursor_key, include_keywords, None)
     try:
         # 使用 User-Agent 避免被拦截
-        headers = [
-            "-H",
-            "User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        ]
-        response = subprocess.run(["curl", "-s", "-L"] + headers + [url], capture_output=True, text=True)
-        html = response.stdout
-
-        # 提取 ID 映射 (标题 -> ID)
-        id_map = {}
-        # 更加鲁棒的提取方式：匹配 href 和紧随其后的 title div
-        episodes_html = re.findall(
-            r'href="/episode/([a-zA-Z0-9]+)".*?<div[^>]*class="[^"]*title"[^>]*>(.*?)</div>', html, re.DOTALL
-        )
-        for eid, title in episodes_html:
-            # 去除 HTML 标签（如果有）
-            clean_title = re.sub(r"<.*?>", "", title).strip()
-            id_map[clean_title] = eid
-
-        # 提取 JSON-LD 获取日期
-        json_match = re.search(
-            r'<script name="schema:podcast-show" type="application/ld\+json">(.*?)</script>', html, re.DOTALL
-        )
-        if json_match:
-            data = json.loads(json_match.group(1))
-            episodes_data = data.get("workExample", [])
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        }
+        response = cached_fetch(url, headers=headers, timeout=30)
 
-            for ep in episodes_data:
-                title = ep.get("name", "")
-                pub_date_str = ep.get("datePublished", "")
+        # 页面未变化时跳过 HTML 解析，复用上次的结果
+        episodes = _load_entries(url, response, cutoff_date, "xiaoyuzhou_podcast", iter_xiaoyuzhou_entries)
 
-                # 尝试匹配 ID
-                eid = id_map.get(title)
-                if not eid:
-                    continue
+        if episodes and not any(ep.published for ep in episodes):
+            # 备选方案：如果 JSON-LD 提取失败，回退到原来的逻辑（但日期仍为今天）
+            print("警告: 无法提取 JSON-LD，使用备选方案提取列表。")
 
-                # ID 去重
-                if is_already_processed(state, eid):
-                    continue
+        for ep in episodes:
+            eid = ep.id
+            title = ep.title
 
-                # 格式化日期 (2026-01-02T10:22:06.258Z -> 2026-01-02)
-                formatted_date = pub_date_str[:10] if pub_date_str else datetime.now().strftime("%Y-%m-%d")
+            # 游标：节目页可能置顶旧单集，这里只跳过不截断
+            if tracker.is_seen(ep):
+                continue
+            tracker.examine(ep)
 
-                # 日期过滤
-                try:
-                    episode_date = datetime.strptime(formatted_date, "%Y-%m-%d")
-                    if episode_date < cutoff_date:
-                        continue  # 跳过超出日期范围的内容
-                except ValueError:
-                    pass
+            # ID 去重
+            if is_already_processed(state, eid):
+                continue
 
-                # 关键词过滤
-                if include_keywords:
-                    if not any(kw.lower() in title.lower() for kw in include_keywords):
-                        continue
+            # 日期已在解析阶段按 cutoff 过滤；缺日期时按今天处理
+            formatted_date = ep.published or datetime.now().strftime("%Y-%m-%d")
 
-                items.append(
-                    {
-                        "platform": "xiaoyuzhou",
-                        "channel": name,
-                        "title": title,
-                        "date": formatted_date,
-                        "url": f"https://www.xiaoyuzhoufm.com/episode/{eid}",
-                        "id": eid,
-                    }
-                )
-        else:
-            # 备选方案：如果 JSON-LD 提取失败，回退到原来的逻辑（但日期仍为今天）
-            print("警告: 无法提取 JSON-LD，使用备选方案提取列表。")
-            for eid, title in episodes_html:
-                clean_title = re.sub(r"<.*?>", "", title).strip()
-                if is_already_processed(state, eid):
+            # 关键词过滤
+            if include_keywords:
+                if not any(kw.lower() in title.lower() for kw in include_keywords):
                     continue
-                if include_keywords:
-                    if not any(kw.lower() in clean_title.lower() for kw in include_keywords):
-                        continue
-                items.append(
-                    {
-                        "platform": "xiaoyuzhou",
-                        "channel": name,
-                        "title": clean_title,
-                        "date": datetime.now().strftime("%Y-%m-%d"),
-                        "url": f"https://www.xiaoyuzhoufm.com/episode/{eid}",
-                        "id": eid,
-                    }
-                )
+
+            items.append(
+                {
+                    "platform": "xiaoyuzhou",
+                    "channel": name,
+                    "title": title,
+                    "date": formatted_date,
+                    "url": f"https://www.xiaoyuzhoufm.com/episode/{eid}",
+                    "id": eid,
+                }
+            )
+            tracker.hold(eid)
+
+        # 网页版节目页只显示最近的单集且无法翻页：有缺口时提示，游标保持不动
+        dated = [ep.published for ep in episodes if ep.published]
+        if tracker.note_page(min(dated, default=""), cutoff_date.strftime("%Y-%m-%d"), page_full=True):
+            print("  ⚠️ 节目页未覆盖到上次扫描位置，可能有未显示的单集")
+        _save_cursor(state, cursor_key, tracker)
 
     except Exception as e:
         print(f"获取小宇宙列表失败: {e}")
@@ -441,54 +415,138 @@ def fetch_xiaoyuzhou_feed(podcast_id, name, min_duration, days, include_keywords
     return items
 
 
-def main():
-    config = load_config()
-    state = load_state()
-    if not config:
-        return
-
+def build_scan_jobs(config, state):
+    """每个订阅一个 ScanJob；同时返回 job.key → 游标/发布历史键的映射"""
     settings = config.get("settings", {})
-    output_dir = settings.get("output_dir", "./content_archive")
     min_duration = settings.get("min_duration_minutes", 30)
     days = settings.get("date_range_days", 7)
 
-    all_pending_items = []
     subs = config.get("subscriptions", {})
+    jobs = []
+    history_keys = {}
 
     for yt in subs.get("youtube", []):
-        all_pending_items.extend(
-            fetch_youtube_feed(
+        job = ScanJob(
+            key=f"youtube:{yt['name']}",
+            host=YOUTUBE_HOST,
+            fn=lambda yt=yt: fetch_youtube_feed(
                 yt["channel_id"], yt["name"], min_duration, days, yt.get("include_keywords"), state
-            )
+            ),
         )
+        jobs.append(job)
+        history_keys[job.key] = f"youtube:{yt['channel_id']}"
 
     for xyz in subs.get("xiaoyuzhou", []):
-        all_pending_items.extend(
-            fetch_xiaoyuzhou_feed(
+        job = ScanJob(
+            key=f"xiaoyuzhou:{xyz['name']}",
+            host=XIAOYUZHOU_HOST,
+            fn=lambda xyz=xyz: fetch_xiaoyuzhou_feed(
                 xyz["podcast_id"], xyz["name"], min_duration, days, xyz.get("include_keywords"), state
-            )
+            ),
         )
+        jobs.append(job)
+        history_keys[job.key] = f"xiaoyuzhou:{xyz['podcast_id']}"
+
+    return jobs, history_keys
 
-    # 文件夹去重
+
+def filter_existing_folders(items, output_dir, state):
+    """文件夹去重；文件夹已存在但 ID 不在台账中时补录 ID"""
+    # 每轮扫描同步一次归档索引（新拷入的目录），逐条查找不再扫描日期目录
+    get_archive_index(output_dir, refresh=True)
     final_items = []
-    for item in all_pending_items:
-        if is_folder_exists(output_dir, item["date"], item["platform"], item["channel"], item["title"]):
-            # 如果文件夹已存在但 ID 不在 state 中，补录 ID
-            if item["id"] not in state["processed_ids"]:
-                state["processed_ids"].append(item["id"])
+    for item in items:
+        if is_folder_exists(
+            output_dir, item["date"], item["platform"], item["channel"], item["title"], item["id"]
+        ):
+            if not state.is_processed(item["id"]):
+                state.record_item(item["id"], platform=item["platform"], title=item["title"], url=item["url"])
+                state.mark_processed(item["id"])
             continue
         final_items.append(item)
+    return final_items
+
+
+def print_items(items):
+    for i, item in enumerate(items):
+        print(f"{i+1}. [{item['platform'].upper()}] {item['channel']} - {item['title']} ({item['date']})")
+        print(f"   URL: {item['url']}")
+
+
+def watch(state):
+    """常驻模式：每个订阅按自己的更新频率轮询，发现新内容即打印（仍需人工确认后处理）"""
+    config = load_config()
+    if not config:
+        return
+    settings = config.get("settings", {})
+    history_keys = {}
+    announced = set()
+
+    def build_jobs():
+        # 每轮重新读取配置，订阅列表的修改无需重启即可生效
+        current = load_sources_config(CONFIG_PATH) or config
+        jobs, keys = build_scan_jobs(current, state)
+        history_keys.update(keys)
+        return jobs
+
+    def on_results(jobs, results):
+        items = [item for channel_items in results for item in channel_items]
+        fresh = [
+            item
+            for item in filter_existing_folders(items, settings.get("output_dir", "./content_archive"), state)
+            if item["id"] not in announced
+        ]
+        announced.update(item["id"] for item in fresh)
+        stamp = datetime.now().strftime("%H:%M:%S")
+        for job in jobs:
+            interval = scheduler.next_poll[job.key] - time.time()
+            print(f"  [{stamp}] {job.key} 下次轮询: {interval / 60:.0f} 分钟后")
+        if fresh:
+            print(f"\n[{stamp}] 发现 {len(fresh)} 条新内容:")
+            print_items(fresh)
+
+    scheduler = PollScheduler(
+        resolve_watch_settings(settings), lambda key: state.publish_dates(history_keys.get(key, key))
+    )
+    print("👀 watch 模式已启动（Ctrl+C 退出）")
+    try:
+        run_watch(build_jobs, scheduler, on_results, scan_settings=resolve_scan_settings(settings))
+    except KeyboardInterrupt:
+        print("\n已退出 watch 模式。")
 
-    save_state(state)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="扫描订阅源，列出待处理的新内容")
+    parser.add_argument("--watch", action="store_true", help="常驻运行，按各订阅的更新频率自适应轮询")
+    args = parser.parse_args(argv)
+
+    state = load_state()
+    if args.watch:
+        return watch(state)
+
+    config = load_config()
+    if not config:
+        return
+
+    settings = config.get("settings", {})
+    output_dir = settings.get("output_dir", "./content_archive")
+    jobs, _ = build_scan_jobs(config, state)
+
+    # 并发扫描；结果按订阅顺序拼接，与串行扫描输出一致
+    all_pending_items = []
+    for channel_items in run_scan(jobs, **resolve_scan_settings(settings)):
+        all_pending_items.extend(channel_items)
+
+    final_items = filter_existing_folders(all_pending_items, output_dir, state)
+
+    get_http_client().print_host_summary()
 
     if not final_items:
         print("\n没有发现新内容。")
         return []
 
     print(f"\n发现 {len(final_items)} 条新内容:")
-    for i, item in enumerate(final_items):
-        print(f"{i+1}. [{item['platform'].upper()}] {item['channel']} - {item['title']} ({item['date']})")
-        print(f"   URL: {item['url']}")
+    print_items(final_items)
 
     return final_items
 
@@ -0,0 +1,21 @@
+"""Subscription ingestion helpers used by ``fetch_feed.py``.
+
+Submodules:
+
+* :mod:`ingestion.scan` — concurrent subscription scan engine (per-host caps,
+  global deadline, deterministic result order).
+* :mod:`ingestion.video_info` — batched, disk-cached YouTube duration /
+  upload-date resolver.
+* :mod:`ingestion.http_cache` — conditional-GET cache (ETag / Last-Modified /
+  body hash) with per-URL parsed-result reuse.
+* :mod:`ingestion.http_client` — shared keep-alive HTTP client (retry policy,
+  streaming downloads, per-host timing) replacing ``curl`` subprocesses.
+* :mod:`ingestion.feed_parser` — streaming YouTube Atom / Xiaoyuzhou listing
+  parsers producing typed :class:`~ingestion.feed_parser.FeedEntry` objects.
+* :mod:`ingestion.cursor` — per-subscription high-water-mark cursor for
+  incremental scans (stored in ``config/state.db``).
+* :mod:`ingestion.watch` — ``fetch_feed.py --watch`` scheduler with per-channel
+  poll intervals learned from publish cadence.
+* :mod:`ingestion.captions` — YouTube caption cache keyed by video ID and
+  language (short-lived "no captions" entries).
+"""
@@ -0,0 +1,107 @@
+"""
+YouTube 字幕缓存（按 video ID + 语言）。
+
+字幕获取要先列出字幕轨、再尝试翻译或直接 fetch，每次都要访问 YouTube。
+结果写入 ``.chora_cache/captions/<video_id>.json``：
+
+```json
+{"selected": "zh-Hans", "tracks": {"zh-Hans": [[0.0, 4.2, "大家好"], ...]}, "updated_at": "..."}
+```
+
+``selected`` 是字幕选择逻辑最终选中的语言，``tracks`` 按语言保存带时间码的片段，
+重新运行直接取用，不再访问 YouTube。
+
+确认没有字幕（字幕被关闭 / 找不到字幕轨）也会记录（``selected`` 为 null），
+但只保留 ``NEGATIVE_TTL_SECONDS``：自动字幕常在上传后几小时才生成。
+网络错误、限流等临时失败不写缓存。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from config_loader import get_cache_dir
+from transcription.segments import Segment
+
+NEGATIVE_TTL_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class CachedCaptions:
+    """A cached caption lookup; ``segments`` is None when the video had no captions."""
+
+    segments: list[Segment] | None
+    language: str | None
+
+
+class CaptionCache:
+    """One JSON file per video under ``.chora_cache/captions``."""
+
+    def __init__(self, root: str | None = None, *, clock=time.time):
+        self.root = root or get_cache_dir("captions")
+        os.makedirs(self.root, exist_ok=True)
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.root, f"{video_id}.json")
+
+    def get(self, video_id: str) -> CachedCaptions | None:
+        """Cached result, or None on a miss (including an expired "no captions" entry)."""
+        try:
+            with open(self._path(video_id), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        selected = data.get("selected")
+        if selected is None:
+            if self.clock() - data.get("checked_at", 0) > NEGATIVE_TTL_SECONDS:
+                return None
+            return CachedCaptions(None, None)
+        rows = (data.get("tracks") or {}).get(selected)
+        if not rows:
+            return None
+        return CachedCaptions([Segment.from_row(row) for row in rows], selected)
+
+    def put(self, video_id: str, segments: list[Segment] | None, language: str | None) -> None:
+        """Record the selected track (kept alongside other languages already cached)."""
+        with self._lock:
+            path = self._path(video_id)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            tracks = data.get("tracks") or {}
+            if segments:
+                tracks[language or ""] = [segment.to_row() for segment in segments]
+                data["selected"] = language or ""
+            else:
+                data["selected"] = None
+            data["tracks"] = tracks
+            data["checked_at"] = self.clock()
+            data["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError as exc:
+                print(f"  ⚠️ 字幕缓存写入失败: {exc}")
+
+
+_default_cache: CaptionCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_caption_cache() -> CaptionCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CaptionCache()
+        return _default_cache
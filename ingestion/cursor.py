@@ -0,0 +1,125 @@
+"""
+订阅的高水位游标（增量扫描）。
+
+每个订阅保存一个 :class:`ScanCursor`：已「处理完毕」的最新发布日期，以及该日期下已看过的 ID。
+下次扫描时：
+
+- 早于游标日期的条目直接停止读取（列表按新到旧排列）；
+- 与游标同一天且 ID 已见过的条目跳过，同一天新发的条目照常处理；
+- 页面最旧的条目仍比游标新时（中间可能有没显示的条目），才向后翻页。
+
+游标只推进到「所有不晚于它的条目都已定论」为止：已列入待处理清单但还没处理的条目、
+时长暂时查不到的条目会挡住游标，下次扫描仍会看到它们。
+过滤条件（关键词、最短时长）变化时旧游标作废，按时间窗口重新全量扫描。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from ingestion.feed_parser import FeedEntry
+
+
+def filters_fingerprint(include_keywords: Iterable[str] | None, min_duration: float | None) -> str:
+    """Short hash of the filters that decide which entries are skipped for good."""
+    payload = json.dumps(
+        {"keywords": sorted(include_keywords or []), "min_duration": min_duration}, ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class ScanCursor:
+    """High-water mark: newest settled ``published`` date plus the IDs settled on that date."""
+
+    published: str
+    ids: frozenset[str] = frozenset()
+    filters: str = ""
+
+    def is_below(self, entry: FeedEntry) -> bool:
+        return bool(entry.published) and entry.published < self.published
+
+    def is_seen(self, entry: FeedEntry) -> bool:
+        return self.is_below(entry) or (entry.published == self.published and entry.id in self.ids)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"published": self.published, "ids": sorted(self.ids), "filters": self.filters}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "ScanCursor | None":
+        if not data or not data.get("published"):
+            return None
+        return cls(str(data["published"]), frozenset(data.get("ids") or []), str(data.get("filters") or ""))
+
+
+@dataclass
+class CursorTracker:
+    """Collects what one scan of a subscription examined and computes the advanced cursor."""
+
+    cursor: ScanCursor | None
+    filters: str = ""
+    examined: dict[str, FeedEntry] = field(default_factory=dict)
+    unsettled: set[str] = field(default_factory=set)
+    reached: bool = False
+    gap: bool = False
+
+    def __post_init__(self):
+        if self.cursor and self.cursor.filters != self.filters:
+            self.cursor = None
+
+    def is_below(self, entry: FeedEntry) -> bool:
+        """Entry is older than the cursor: everything after it was settled before."""
+        if self.cursor and entry.published and entry.published <= self.cursor.published:
+            self.reached = True
+        return bool(self.cursor and self.cursor.is_below(entry))
+
+    def is_seen(self, entry: FeedEntry) -> bool:
+        return self.is_below(entry) or bool(self.cursor and self.cursor.is_seen(entry))
+
+    def examine(self, entry: FeedEntry) -> None:
+        if entry.published:
+            self.examined[entry.id] = entry
+
+    def hold(self, entry_id: str) -> None:
+        """Keep ``entry_id`` visible to later scans (listed as pending, or not resolvable yet)."""
+        self.unsettled.add(entry_id)
+
+    def note_page(self, oldest_visible: str, cutoff: str, page_full: bool) -> bool:
+        """Record one listing page; True when an older page is needed to close the gap to the cursor.
+
+        A page that is not full ends the listing, and a page reaching ``cutoff``
+        covers the scan window, so neither leaves a gap.
+        """
+        self.gap = bool(
+            self.cursor
+            and not self.reached
+            and page_full
+            and oldest_visible
+            and oldest_visible > max(self.cursor.published, cutoff)
+        )
+        return self.gap
+
+    def advanced(self) -> ScanCursor | None:
+        """Cursor to store after this scan (unchanged while a gap to the old cursor remains)."""
+        if self.gap:
+            return self.cursor
+        held = [e.published for e_id, e in self.examined.items() if e_id in self.unsettled]
+        settled = [e for e in self.examined.values() if e.id not in self.unsettled]
+        if held:
+            # 不能越过最早一条未定论的条目：游标停在它那一天，只记录当天已定论的 ID
+            newest = min(held)
+            settled = [e for e in settled if e.published <= newest]
+        elif settled:
+            newest = max(e.published for e in settled)
+        else:
+            return self.cursor
+
+        if self.cursor and newest < self.cursor.published:
+            return self.cursor
+        ids = {e.id for e in settled if e.published == newest}
+        if self.cursor and self.cursor.published == newest:
+            ids |= self.cursor.ids
+        return ScanCursor(newest, frozenset(ids), self.filters)
@@ -0,0 +1,246 @@
+"""
+订阅列表的流式结构化解析（YouTube Atom / 小宇宙节目页）。
+
+两个解析器都产出 :class:`FeedEntry` 流，按发布时间从新到旧。传入 ``cutoff`` 时，
+YouTube Atom 遇到第一条早于 cutoff 的条目就停止读取，后面的旧条目不再解析；
+小宇宙节目页只跳过早于 cutoff 的条目。
+
+- YouTube：``xml.etree.ElementTree.iterparse`` 逐个 ``<entry>`` 解析，处理完即
+  ``clear()``，实体（``&amp;`` 等）按 XML 规范解码。
+- 小宇宙：``HTMLParser`` 一次遍历收集 ``__NEXT_DATA__``、JSON-LD 与
+  ``/episode/<id>`` 链接，按可靠度依次尝试：
+
+  1. ``__NEXT_DATA__`` 中的节目列表（eid / title / pubDate 同一对象内）；
+  2. JSON-LD ``workExample`` 中带 episode URL 的条目（ID 与日期结构化配对）；
+  3. JSON-LD 仅有标题时，才退回按标题匹配页面链接；
+  4. 都没有时只输出链接列表（``published`` 为空）。
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any, Iterator
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+YT_NS = "{http://www.youtube.com/xml/schemas/2015}"
+EPISODE_HREF_RE = re.compile(r"/episode/([a-zA-Z0-9]+)")
+
+
+@dataclass(frozen=True)
+class FeedEntry:
+    """One item of a subscription listing; ``published`` is ``YYYY-MM-DD`` or ``""``."""
+
+    platform: str
+    id: str
+    title: str
+    published: str
+    url: str
+
+    @property
+    def published_date(self) -> datetime | None:
+        try:
+            return datetime.strptime(self.published, "%Y-%m-%d")
+        except ValueError:
+            return None
+
+    def is_older_than(self, cutoff: datetime | None) -> bool:
+        date = self.published_date
+        return bool(cutoff and date and date < cutoff)
+
+    def to_dict(self) -> dict[str, str]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FeedEntry":
+        return cls(**{key: str(data.get(key) or "") for key in cls.__dataclass_fields__})
+
+
+def _date_prefix(raw: Any) -> str:
+    match = re.match(r"\d{4}-\d{2}-\d{2}", str(raw or "").strip())
+    return match.group(0) if match else ""
+
+
+# -----------------------------------------------------------------------------
+# YouTube Atom
+# -----------------------------------------------------------------------------
+
+
+def iter_youtube_entries(xml_content: str | bytes, cutoff: datetime | None = None) -> Iterator[FeedEntry]:
+    """Stream entries of a YouTube channel Atom feed, newest first."""
+    data = xml_content.encode("utf-8") if isinstance(xml_content, str) else xml_content
+    try:
+        for _, elem in ET.iterparse(io.BytesIO(data), events=("end",)):
+            if elem.tag != f"{ATOM_NS}entry":
+                continue
+            video_id = (elem.findtext(f"{YT_NS}videoId") or "").strip()
+            entry = FeedEntry(
+                platform="youtube",
+                id=video_id,
+                title=(elem.findtext(f"{ATOM_NS}title") or "").strip(),
+                published=_date_prefix(elem.findtext(f"{ATOM_NS}published")),
+                url=f"https://www.youtube.com/watch?v={video_id}",
+            )
+            elem.clear()
+            if not video_id:
+                continue
+            if entry.is_older_than(cutoff):
+                return
+            yield entry
+    except ET.ParseError as exc:
+        print(f"  ⚠️ RSS XML 解析中断: {exc}")
+
+
+# -----------------------------------------------------------------------------
+# 小宇宙节目页
+# -----------------------------------------------------------------------------
+
+
+class _ListingExtractor(HTMLParser):
+    """Single pass over a podcast page: scripts + ``/episode/<id>`` anchors with their title text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld: list[Any] = []
+        self.next_data: dict | None = None
+        self.anchors: list[tuple[str, str]] = []
+        self._script: str | None = None
+        self._script_buffer: list[str] = []
+        self._anchor_id: str | None = None
+        self._anchor_title: list[str] = []
+        self._anchor_text: list[str] = []
+        self._title_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attr_map = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "script":
+            script_type = attr_map.get("type", "").lower()
+            if attr_map.get("id") == "__NEXT_DATA__":
+                self._script = "next_data"
+            elif script_type == "application/ld+json":
+                self._script = "json_ld"
+            else:
+                self._script = None
+            self._script_buffer = []
+        elif tag == "a":
+            match = EPISODE_HREF_RE.search(attr_map.get("href", ""))
+            if match:
+                self._anchor_id = match.group(1)
+                self._anchor_title = []
+                self._anchor_text = []
+                self._title_depth = 0
+        elif self._anchor_id and tag == "div":
+            classes = attr_map.get("class", "").split()
+            if self._title_depth or any(cls.endswith("title") for cls in classes):
+                self._title_depth += 1
+
+    def handle_data(self, data):
+        if self._script:
+            self._script_buffer.append(data)
+        elif self._anchor_id:
+            self._anchor_text.append(data)
+            if self._title_depth:
+                self._anchor_title.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script:
+            raw = "".join(self._script_buffer)
+            try:
+                parsed = json.loads(raw)
+            except json.JSONDecodeError:
+                parsed = None
+            if self._script == "next_data" and isinstance(parsed, dict):
+                self.next_data = parsed
+            elif self._script == "json_ld" and parsed is not None:
+                self.json_ld.append(parsed)
+            self._script = None
+        elif tag == "div" and self._title_depth:
+            self._title_depth -= 1
+        elif tag == "a" and self._anchor_id:
+            title = " ".join("".join(self._anchor_title or self._anchor_text).split())
+            self.anchors.append((self._anchor_id, title))
+            self._anchor_id = None
+
+
+def _episode_url(eid: str) -> str:
+    return f"https://www.xiaoyuzhoufm.com/episode/{eid}"
+
+
+def _from_next_data(next_data: dict | None) -> list[FeedEntry]:
+    page_props = ((next_data or {}).get("props") or {}).get("pageProps") or {}
+    podcast = page_props.get("podcast") or {}
+    episodes = podcast.get("episodes") or page_props.get("episodes") or []
+    entries = []
+    for ep in episodes:
+        if not isinstance(ep, dict) or not ep.get("eid"):
+            continue
+        entries.append(
+            FeedEntry(
+                platform="xiaoyuzhou",
+                id=ep["eid"],
+                title=(ep.get("title") or "").strip(),
+                published=_date_prefix(ep.get("pubDate")),
+                url=_episode_url(ep["eid"]),
+            )
+        )
+    return entries
+
+
+def _work_examples(json_ld: list[Any]) -> list[dict]:
+    examples = []
+    for block in json_ld:
+        for item in block if isinstance(block, list) else [block]:
+            if isinstance(item, dict) and isinstance(item.get("workExample"), list):
+                examples.extend(ep for ep in item["workExample"] if isinstance(ep, dict))
+    return examples
+
+
+def _from_json_ld(json_ld: list[Any], anchors: list[tuple[str, str]]) -> list[FeedEntry]:
+    title_to_id = {}
+    for eid, title in anchors:
+        title_to_id.setdefault(title, eid)
+
+    entries = []
+    for ep in _work_examples(json_ld):
+        title = (ep.get("name") or "").strip()
+        match = EPISODE_HREF_RE.search(str(ep.get("url") or ep.get("@id") or ""))
+        # 优先用条目自带的 episode URL 结构化配对；没有时才按标题对应页面链接
+        eid = match.group(1) if match else title_to_id.get(title)
+        if not eid:
+            continue
+        entries.append(
+            FeedEntry(
+                platform="xiaoyuzhou",
+                id=eid,
+                title=title,
+                published=_date_prefix(ep.get("datePublished")),
+                url=_episode_url(eid),
+            )
+        )
+    return entries
+
+
+def iter_xiaoyuzhou_entries(html: str, cutoff: datetime | None = None) -> Iterator[FeedEntry]:
+    """Stream episodes of a Xiaoyuzhou podcast page, newest first."""
+    extractor = _ListingExtractor()
+    extractor.feed(html)
+    extractor.close()
+
+    entries = _from_next_data(extractor.next_data) or _from_json_ld(extractor.json_ld, extractor.anchors)
+    if not entries:
+        seen = set()
+        for eid, title in extractor.anchors:
+            if eid not in seen:
+                seen.add(eid)
+                entries.append(FeedEntry("xiaoyuzhou", eid, title, "", _episode_url(eid)))
+
+    for entry in entries:
+        # 整页已在内存中，这里跳过而不是截断：节目页可能把旧单集置顶
+        if entry.is_older_than(cutoff):
+            continue
+        yield entry
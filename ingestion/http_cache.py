@@ -0,0 +1,170 @@
+"""
+按 URL 的条件请求缓存（ETag / Last-Modified / 正文哈希）。
+
+每个 URL 在 ``.chora_cache/http/`` 下对应两份文件：
+
+- ``<sha1(url)>.body`` — 上一次的响应正文；
+- ``<sha1(url)>.json`` — ``etag`` / ``last_modified`` / ``body_hash``，以及调用方
+  按命名空间存入的解析结果（``save_parsed``），与 ``body_hash`` 绑定。
+
+:func:`cached_fetch` 发送 ``If-None-Match`` / ``If-Modified-Since``；服务器返回
+304 或正文哈希未变时 ``FetchResult.changed`` 为 False，调用方可直接用
+``load_parsed`` 取回上次的解析结果，跳过下载后的正则/JSON 解析。
+默认经 :mod:`ingestion.http_client` 的共享连接池发送请求。
+
+每个 URL 独立成文件，因此并发扫描线程之间无需共享锁。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+from config_loader import get_cache_dir
+from ingestion import http_client
+
+# (url, headers, timeout) -> (status, response_headers, body)
+Transport = Callable[[str, dict, float], "tuple[int, dict[str, str], str]"]
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    url: str
+    status: int
+    body: str
+    body_hash: str
+    changed: bool
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """On-disk validator + body store, one pair of files per URL."""
+
+    def __init__(self, root: str | None = None):
+        self.root = root or get_cache_dir("http")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{key}.json"), os.path.join(self.root, f"{key}.body")
+
+    def _load_meta(self, url: str) -> dict:
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_meta(self, url: str, meta: dict) -> None:
+        meta_path, _ = self._paths(url)
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, meta_path)
+        except OSError as exc:
+            print(f"  ⚠️ HTTP 缓存写入失败: {exc}")
+
+    def cached_body(self, url: str) -> str | None:
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        meta = self._load_meta(url)
+        if not meta or self.cached_body(url) is None:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def update(self, url: str, status: int, headers: dict[str, str], body: str) -> FetchResult:
+        """Record a response; a 304 is answered from the stored body."""
+        meta = self._load_meta(url)
+        if status == 304:
+            cached = self.cached_body(url) or ""
+            return FetchResult(url, status, cached, meta.get("body_hash", _hash_text(cached)), False)
+
+        body_hash = _hash_text(body)
+        changed = body_hash != meta.get("body_hash")
+        if status == 200:
+            if changed:
+                _, body_path = self._paths(url)
+                tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(body)
+                os.replace(tmp_path, body_path)
+                meta["parsed"] = {}
+            meta.update(
+                {
+                    "url": url,
+                    "etag": headers.get("etag", ""),
+                    "last_modified": headers.get("last-modified", ""),
+                    "body_hash": body_hash,
+                    "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                }
+            )
+            self._save_meta(url, meta)
+        return FetchResult(url, status, body, body_hash, changed)
+
+    def load_parsed(self, url: str, namespace: str) -> Any | None:
+        """Parsed payload saved for the body currently stored, or None."""
+        meta = self._load_meta(url)
+        entry = (meta.get("parsed") or {}).get(namespace)
+        if not entry or entry.get("body_hash") != meta.get("body_hash"):
+            return None
+        return entry.get("payload")
+
+    def save_parsed(self, url: str, namespace: str, payload: Any) -> None:
+        meta = self._load_meta(url)
+        if not meta.get("body_hash"):
+            return
+        meta.setdefault("parsed", {})[namespace] = {"body_hash": meta["body_hash"], "payload": payload}
+        self._save_meta(url, meta)
+
+
+_default_cache: HttpCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> HttpCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
+
+
+def cached_fetch(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: float = 20,
+    cache: HttpCache | None = None,
+    transport: Transport | None = None,
+) -> FetchResult:
+    """Conditional GET through the cache; ``changed`` is False on 304 or identical body."""
+    cache = cache or get_default_cache()
+    transport = transport or http_client.transport
+    request_headers = {**(headers or {}), **cache.conditional_headers(url)}
+    status, response_headers, body = transport(url, request_headers, timeout)
+    return cache.update(url, status, response_headers, body)
@@ -0,0 +1,224 @@
+"""
+采集侧共享 HTTP 客户端（替代逐请求 fork ``curl``）。
+
+- 一个进程内共享的 ``requests.Session``：keep-alive 连接池按 host 复用 TCP/TLS
+  连接（并发扫描线程共用同一个池）；
+- 统一的重试策略：urllib3 ``Retry``，对 429/5xx 与连接错误指数退避，
+  并遵守 ``Retry-After``；
+- 超时统一为 ``(connect, read)`` 二元组；
+- :meth:`HttpClient.download` 流式写盘（先写 ``.part`` 再原子改名），带总时长上限；
+- 每个请求记录 :class:`RequestTiming`，``print_host_summary`` 按 host 汇总，
+  超过 ``CHORA_HTTP_SLOW_SECONDS``（默认 10 秒）的请求会即时打印警告。
+
+说明：``requests``/urllib3 只支持 HTTP/1.1；连接复用已覆盖 curl 方案的主要开销。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+)
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 16
+DEFAULT_SLOW_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    method: str
+    url: str
+    host: str
+    status: int
+    elapsed: float
+    bytes: int
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def _decode_body(response: requests.Response) -> str:
+    # requests 对未声明 charset 的 text/* 默认 ISO-8859-1，中文页面会乱码；没声明就按 UTF-8
+    content_type = response.headers.get("content-type", "")
+    encoding = response.encoding if "charset" in content_type.lower() else "utf-8"
+    return response.content.decode(encoding or "utf-8", errors="replace")
+
+
+class HttpClient:
+    """Pooled, retrying HTTP client with per-request timing."""
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = 3,
+        backoff_factor: float = 1.0,
+        timeout: tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        slow_seconds: float | None = None,
+    ):
+        self.timeout = timeout
+        self.slow_seconds = (
+            slow_seconds
+            if slow_seconds is not None
+            else _env_float("CHORA_HTTP_SLOW_SECONDS", DEFAULT_SLOW_SECONDS)
+        )
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = DEFAULT_USER_AGENT
+        retry_strategy = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry_strategy)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._timings: list[RequestTiming] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Timing
+    # ------------------------------------------------------------------
+
+    def _record(self, method: str, url: str, status: int, elapsed: float, size: int) -> None:
+        host = urlparse(url).netloc
+        timing = RequestTiming(method, url, host, status, elapsed, size)
+        with self._lock:
+            self._timings.append(timing)
+        if elapsed >= self.slow_seconds:
+            print(f"  🐢 慢请求 {host}: {elapsed:.1f}s ({status}, {size / 1024:.0f} KB)")
+
+    @property
+    def timings(self) -> list[RequestTiming]:
+        with self._lock:
+            return list(self._timings)
+
+    def host_stats(self) -> dict[str, dict]:
+        stats: dict[str, dict] = {}
+        for timing in self.timings:
+            entry = stats.setdefault(timing.host, {"count": 0, "total": 0.0, "max": 0.0, "bytes": 0})
+            entry["count"] += 1
+            entry["total"] += timing.elapsed
+            entry["max"] = max(entry["max"], timing.elapsed)
+            entry["bytes"] += timing.bytes
+        return stats
+
+    def print_host_summary(self) -> None:
+        stats = self.host_stats()
+        if not stats:
+            return
+        print("\nHTTP 请求耗时 (按 host):")
+        for host, entry in sorted(stats.items(), key=lambda kv: -kv[1]["total"]):
+            avg = entry["total"] / entry["count"]
+            print(
+                f"  {host}: {entry['count']} 次, 平均 {avg:.2f}s, 最长 {entry['max']:.2f}s, "
+                f"{entry['bytes'] / 1024:.0f} KB"
+            )
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def request(self, method: str, url: str, *, timeout=None, **kwargs) -> requests.Response:
+        """Send a request through the pool; the body is read eagerly unless ``stream=True``."""
+        started = time.monotonic()
+        response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+        if not kwargs.get("stream"):
+            self._record(method, url, response.status_code, time.monotonic() - started, len(response.content))
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def fetch_text(
+        self, url: str, headers: dict | None = None, timeout: float | None = None
+    ) -> tuple[int, dict[str, str], str]:
+        """GET ``url`` and return ``(status, lower-cased headers, decoded body)``."""
+        response = self.get(
+            url, headers=headers, timeout=(DEFAULT_CONNECT_TIMEOUT, timeout) if timeout else None
+        )
+        response_headers = {key.lower(): value for key, value in response.headers.items()}
+        return response.status_code, response_headers, _decode_body(response)
+
+    def download(
+        self,
+        url: str,
+        output_path: str,
+        *,
+        headers: dict | None = None,
+        max_seconds: float = 600,
+        chunk_size: int = 1 << 16,
+        on_chunk: Callable[[bytes], None] | None = None,
+    ) -> int:
+        """Stream ``url`` to ``output_path``; return the number of bytes written.
+
+        ``on_chunk`` receives every block as it arrives (e.g. to transcode while
+        downloading).
+
+        Raises ``requests.HTTPError`` on a non-2xx status and ``TimeoutError``
+        when the whole transfer exceeds ``max_seconds``. A partial file never
+        replaces ``output_path``.
+        """
+        started = time.monotonic()
+        part_path = f"{output_path}.part"
+        written = 0
+        status = 0
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                status = response.status_code
+                response.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        written += len(chunk)
+                        if on_chunk:
+                            on_chunk(chunk)
+                        if time.monotonic() - started > max_seconds:
+                            raise TimeoutError(f"download exceeded {max_seconds:.0f}s ({written} bytes)")
+            os.replace(part_path, output_path)
+            return written
+        finally:
+            self._record("GET", url, status, time.monotonic() - started, written)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+_default_client: HttpClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Process-wide shared client (one connection pool for all call sites)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def transport(url: str, headers: dict, timeout: float) -> tuple[int, dict[str, str], str]:
+    """:mod:`ingestion.http_cache` transport backed by the shared client."""
+    return get_client().fetch_text(url, headers=headers, timeout=timeout)
@@ -0,0 +1,148 @@
+"""
+订阅源并发扫描引擎。
+
+每个订阅（一个 YouTube 频道 / 一个小宇宙节目）是一个 :class:`ScanJob`，
+在共享线程池里执行：
+
+- 同一 host 的在途任务数受 ``host_limits`` 限制（默认 youtube.com 4、
+  xiaoyuzhoufm.com 2），避免触发站点限流；任务按 host 轮流派发，且只在该 host
+  有空槽时才提交，线程不会被某个 host 的排队任务占着干等，其他 host 立即开始；
+- 整轮扫描有全局 deadline，超时未完成的频道记为空结果并打印警告；
+- 返回值按 jobs 的提交顺序排列，与串行扫描的输出顺序完全一致。
+
+单个任务抛异常不会影响其他频道（Log & Continue）。
+
+环境变量（覆盖 sources.yaml ``settings`` 中的同名配置）：
+- CHORA_SCAN_WORKERS=N（默认 8）
+- CHORA_SCAN_DEADLINE_SECONDS=N（默认 600，0 表示不限）
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+YOUTUBE_HOST = "www.youtube.com"
+XIAOYUZHOU_HOST = "www.xiaoyuzhoufm.com"
+
+DEFAULT_WORKERS = 8
+DEFAULT_DEADLINE_SECONDS = 600
+DEFAULT_HOST_LIMIT = 2
+DEFAULT_HOST_LIMITS = {
+    YOUTUBE_HOST: 4,
+    XIAOYUZHOU_HOST: 2,
+}
+
+
+@dataclass(frozen=True)
+class ScanJob:
+    """One subscription to scan; ``fn`` returns that channel's pending items."""
+
+    key: str
+    host: str
+    fn: Callable[[], list[dict]]
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def resolve_scan_settings(settings: dict | None) -> dict:
+    """Merge sources.yaml ``settings`` with CHORA_SCAN_* overrides."""
+    settings = settings or {}
+    workers = _env_int("CHORA_SCAN_WORKERS") or settings.get("scan_workers") or DEFAULT_WORKERS
+    deadline = _env_int("CHORA_SCAN_DEADLINE_SECONDS")
+    if deadline is None:
+        deadline = settings.get("scan_deadline_seconds", DEFAULT_DEADLINE_SECONDS)
+    host_limits = {**DEFAULT_HOST_LIMITS, **(settings.get("scan_host_limits") or {})}
+    return {
+        "max_workers": max(1, int(workers)),
+        "deadline_seconds": float(deadline) if deadline else None,
+        "host_limits": host_limits,
+    }
+
+
+def run_scan(
+    jobs: list[ScanJob],
+    *,
+    max_workers: int = DEFAULT_WORKERS,
+    host_limits: dict[str, int] | None = None,
+    deadline_seconds: float | None = DEFAULT_DEADLINE_SECONDS,
+) -> list[list[dict]]:
+    """Run ``jobs`` concurrently; return one result list per job, in job order.
+
+    Jobs that raise, or that have not finished when the deadline passes,
+    contribute an empty list.
+    """
+    if not jobs:
+        return []
+
+    limits = {**DEFAULT_HOST_LIMITS, **(host_limits or {})}
+    pending: dict[str, deque[int]] = {}
+    for index, job in enumerate(jobs):
+        pending.setdefault(job.host, deque()).append(index)
+    running = dict.fromkeys(pending, 0)
+    workers = max(1, min(max_workers, len(jobs)))
+
+    results: list[list[dict]] = [[] for _ in jobs]
+    finished: set[int] = set()
+    future_to_index: dict[concurrent.futures.Future, int] = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+
+    def dispatch() -> None:
+        # 各 host 轮流取一个任务，只在该 host 有空槽时提交
+        progressed = True
+        while progressed and len(future_to_index) < workers:
+            progressed = False
+            for host, queue in pending.items():
+                if not queue or running[host] >= max(1, limits.get(host, DEFAULT_HOST_LIMIT)):
+                    continue
+                if len(future_to_index) >= workers:
+                    break
+                index = queue.popleft()
+                running[host] += 1
+                future_to_index[executor.submit(jobs[index].fn)] = index
+                progressed = True
+
+    started = time.monotonic()
+    deadline = started + deadline_seconds if deadline_seconds else None
+    try:
+        dispatch()
+        while future_to_index:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = concurrent.futures.wait(
+                future_to_index, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                index = future_to_index.pop(future)
+                running[jobs[index].host] -= 1
+                finished.add(index)
+                try:
+                    results[index] = list(future.result() or [])
+                except Exception as exc:
+                    print(f"  ⚠️ 扫描失败 [{jobs[index].key}]: {exc}")
+            dispatch()
+
+        unfinished = [index for index in range(len(jobs)) if index not in finished]
+        if unfinished:
+            elapsed = time.monotonic() - started
+            print(f"  ⚠️ 扫描超过全局时限 ({elapsed:.0f}s)，以下 {len(unfinished)} 个订阅未完成，本轮跳过:")
+            for index in unfinished:
+                print(f"     - {jobs[index].key}")
+    finally:
+        # 不等待超时任务：它们的 curl / yt-dlp 子进程自带超时，会自行结束。
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,176 @@
+"""
+YouTube 视频时长 / 发布日期解析器（批量 + 磁盘缓存）。
+
+旧实现对每个视频单独起 1~2 个 yt-dlp 进程（``--print duration`` 再 ``-J``），
+扫描 40 个频道时子进程数和超时预算都非常可观。这里改为：
+
+1. 先查本地缓存（``.chora_cache/video_info/video_info.json``，按 video ID 索引）；
+2. 缓存未命中的 ID 合并成一次 ``yt-dlp --print`` 调用（每批最多 ``BATCH_SIZE`` 个）；
+3. 解析成功的结果写回缓存，同一视频永远不会被探测第二次。
+
+时长与发布日期一旦发布就不会变化，因此缓存不设过期时间。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from config_loader import get_cache_dir
+
+CACHE_FILENAME = "video_info.json"
+BATCH_SIZE = 25
+PRINT_TEMPLATE = "%(id)s\t%(duration)s\t%(upload_date)s"
+
+
+@dataclass(frozen=True)
+class VideoInfo:
+    """Duration (seconds) and upload date (YYYYMMDD) of a single video."""
+
+    video_id: str
+    duration: float = 0
+    upload_date: str = ""
+
+    @property
+    def duration_minutes(self) -> float:
+        return (self.duration or 0) / 60
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.duration) and len(self.upload_date) == 8
+
+
+class VideoInfoCache:
+    """JSON-backed ``video_id -> {duration, upload_date}`` store, safe across scan threads."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_cache_dir("video_info"), CACHE_FILENAME)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] | None = None
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, video_id: str) -> VideoInfo | None:
+        with self._lock:
+            entry = self._load().get(video_id)
+        if not entry:
+            return None
+        return VideoInfo(video_id, entry.get("duration") or 0, entry.get("upload_date") or "")
+
+    def put_many(self, infos: list[VideoInfo]) -> None:
+        """Merge ``infos`` into the cache; fields already known are never blanked."""
+        infos = [info for info in infos if info.duration or info.upload_date]
+        if not infos:
+            return
+        with self._lock:
+            entries = self._load()
+            for info in infos:
+                entry = entries.setdefault(info.video_id, {})
+                if info.duration:
+                    entry["duration"] = info.duration
+                if info.upload_date:
+                    entry["upload_date"] = info.upload_date
+                entry["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            self._save(entries)
+
+    def _save(self, entries: dict[str, dict]) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            print(f"  ⚠️ 视频信息缓存写入失败: {exc}")
+
+
+_default_cache: VideoInfoCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> VideoInfoCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = VideoInfoCache()
+        return _default_cache
+
+
+def _parse_print_output(stdout: str) -> list[VideoInfo]:
+    infos = []
+    for line in stdout.splitlines():
+        parts = line.strip().split("\t")
+        if len(parts) != 3 or not parts[0]:
+            continue
+        video_id, raw_duration, raw_date = parts
+        try:
+            duration = float(raw_duration)
+        except ValueError:
+            duration = 0
+        upload_date = raw_date if raw_date.isdigit() and len(raw_date) == 8 else ""
+        infos.append(VideoInfo(video_id, duration, upload_date))
+    return infos
+
+
+def _probe_batch(video_ids: list[str]) -> list[VideoInfo]:
+    """One yt-dlp invocation for up to ``BATCH_SIZE`` videos."""
+    cmd = [
+        "yt-dlp",
+        "--quiet",
+        "--no-warnings",
+        "--ignore-errors",
+        "--skip-download",
+        "--print",
+        PRINT_TEMPLATE,
+    ] + [f"https://www.youtube.com/watch?v={vid}" for vid in video_ids]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30 + 15 * len(video_ids))
+    except subprocess.TimeoutExpired as exc:
+        # 超时也尽量利用已经打印出来的部分结果
+        partial = exc.stdout.decode("utf-8", "ignore") if isinstance(exc.stdout, bytes) else exc.stdout
+        print(f"  ⚠️ yt-dlp 批量探测超时 ({len(video_ids)} 个视频)")
+        return _parse_print_output(partial or "")
+    except Exception as exc:
+        print(f"  ⚠️ yt-dlp 批量探测失败: {exc}")
+        return []
+    return _parse_print_output(result.stdout)
+
+
+def resolve_video_info(video_ids: list[str], cache: VideoInfoCache | None = None) -> dict[str, VideoInfo]:
+    """Return ``{video_id: VideoInfo}`` for every requested ID.
+
+    Cached, complete entries are served without any subprocess; the rest are
+    probed in batches and written back. IDs that cannot be resolved map to
+    an empty ``VideoInfo`` (duration 0, no date).
+    """
+    cache = cache or get_default_cache()
+    resolved: dict[str, VideoInfo] = {}
+    missing: list[str] = []
+    for vid in dict.fromkeys(video_ids):
+        cached = cache.get(vid)
+        if cached and cached.complete:
+            resolved[vid] = cached
+        else:
+            missing.append(vid)
+
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start : start + BATCH_SIZE]
+        probed = _probe_batch(batch)
+        cache.put_many(probed)
+        for info in probed:
+            resolved[info.video_id] = cache.get(info.video_id) or info
+
+    for vid in missing:
+        if vid not in resolved:
+            resolved[vid] = cache.get(vid) or VideoInfo(vid)
+    return resolved
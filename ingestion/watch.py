@@ -0,0 +1,167 @@
+"""
+``fetch_feed.py --watch`` 的常驻轮询调度。
+
+每个订阅有自己的轮询间隔，由该频道的历史发布节奏决定（发布历史见
+``state_store.StateStore.publish_dates``）：
+
+- 平均发布间隔 × ``cadence_fraction``，限制在 ``[min_interval, max_interval]`` 之间，
+  活跃频道几分钟内就能发现新内容；
+- 距最近一次发布已超过平均间隔时按超出倍数指数退避（每翻一倍，间隔翻一倍），
+  停更的频道不会被反复轮询；
+- 没有历史的订阅用 ``default_interval``；每次间隔加 ±10% 抖动，避免所有频道同时到期。
+
+间隔只由发布历史和当前时间推出：进程重启后首轮扫描全部订阅一次，之后立即恢复原有节奏。
+
+配置（sources.yaml ``settings``，CHORA_WATCH_* 环境变量优先）：
+- watch_min_interval_minutes（默认 10）
+- watch_max_interval_hours（默认 24）
+- watch_default_interval_minutes（默认 60）
+- watch_cadence_fraction（默认 0.02）
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from ingestion.scan import ScanJob, run_scan
+
+DAY_SECONDS = 86400
+
+
+@dataclass(frozen=True)
+class WatchSettings:
+    min_interval: float = 10 * 60
+    max_interval: float = 24 * 3600
+    default_interval: float = 60 * 60
+    cadence_fraction: float = 0.02
+    jitter: float = 0.1
+
+
+def _env_float(name: str) -> float | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def resolve_watch_settings(settings: dict | None) -> WatchSettings:
+    """Merge sources.yaml ``settings`` with CHORA_WATCH_* overrides."""
+    settings = settings or {}
+
+    def pick(env: str, key: str, default: float) -> float:
+        value = _env_float(env)
+        if value is None:
+            value = settings.get(key, default)
+        return float(value)
+
+    return WatchSettings(
+        min_interval=pick("CHORA_WATCH_MIN_INTERVAL_MINUTES", "watch_min_interval_minutes", 10) * 60,
+        max_interval=pick("CHORA_WATCH_MAX_INTERVAL_HOURS", "watch_max_interval_hours", 24) * 3600,
+        default_interval=pick("CHORA_WATCH_DEFAULT_INTERVAL_MINUTES", "watch_default_interval_minutes", 60)
+        * 60,
+        cadence_fraction=pick("CHORA_WATCH_CADENCE_FRACTION", "watch_cadence_fraction", 0.02),
+    )
+
+
+def _to_timestamp(date_str: str) -> float | None:
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").timestamp()
+    except ValueError:
+        return None
+
+
+def cadence_seconds(published_dates: list[str]) -> float | None:
+    """Average gap between publishes; None with fewer than two dated entries."""
+    stamps = sorted(ts for ts in map(_to_timestamp, published_dates) if ts is not None)
+    if len(stamps) < 2:
+        return None
+    # 日期只精确到天：同一天多条时按「一天 / 条数」估计，下限一小时
+    return max((stamps[-1] - stamps[0]) / (len(stamps) - 1), 3600.0)
+
+
+def poll_interval(published_dates: list[str], now: float, settings: WatchSettings) -> float:
+    """Seconds until the next poll of a subscription, before jitter."""
+    cadence = cadence_seconds(published_dates)
+    if cadence is None:
+        return min(max(settings.default_interval, settings.min_interval), settings.max_interval)
+
+    interval = cadence * settings.cadence_fraction
+    last = max((ts for ts in map(_to_timestamp, published_dates) if ts is not None), default=now)
+    # 最近一次发布按当天结束计，避免「今天早上发的」被当成已停更一天
+    overdue = (now - (last + DAY_SECONDS)) / cadence
+    if overdue > 1:
+        interval *= 2 ** int(overdue).bit_length()
+    return min(max(interval, settings.min_interval), settings.max_interval)
+
+
+class PollScheduler:
+    """Tracks when each subscription is next due; intervals come from :func:`poll_interval`."""
+
+    def __init__(
+        self,
+        settings: WatchSettings,
+        history: Callable[[str], list[str]],
+        *,
+        clock: Callable[[], float] = time.time,
+        rng: random.Random | None = None,
+    ):
+        self.settings = settings
+        self.history = history
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.next_poll: dict[str, float] = {}
+
+    def due(self, keys: list[str]) -> list[str]:
+        """Keys due now; subscriptions never polled in this process are due immediately."""
+        now = self.clock()
+        return [key for key in keys if self.next_poll.get(key, 0.0) <= now]
+
+    def reschedule(self, key: str) -> float:
+        now = self.clock()
+        interval = poll_interval(self.history(key), now, self.settings)
+        interval *= 1 + self.rng.uniform(-self.settings.jitter, self.settings.jitter)
+        self.next_poll[key] = now + interval
+        return interval
+
+    def seconds_until_next(self, keys: list[str]) -> float:
+        now = self.clock()
+        pending = [self.next_poll.get(key, 0.0) - now for key in keys]
+        return max(0.0, min(pending, default=self.settings.min_interval))
+
+
+def run_watch(
+    build_jobs: Callable[[], list[ScanJob]],
+    scheduler: PollScheduler,
+    on_results: Callable[[list[ScanJob], list[list[dict]]], None],
+    *,
+    scan_settings: dict | None = None,
+    stop_event: threading.Event | None = None,
+    max_sleep: float = 300.0,
+) -> None:
+    """Poll due subscriptions until ``stop_event`` is set (or KeyboardInterrupt).
+
+    ``build_jobs`` is called every cycle, so edits to the subscription list
+    take effect without a restart.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        jobs = build_jobs()
+        keys = [job.key for job in jobs]
+        due_keys = set(scheduler.due(keys))
+        due_jobs = [job for job in jobs if job.key in due_keys]
+        if due_jobs:
+            results = run_scan(due_jobs, **(scan_settings or {}))
+            for job in due_jobs:
+                scheduler.reschedule(job.key)
+            on_results(due_jobs, results)
+        # 醒来检查的间隔不超过 max_sleep，以便新增的订阅及时被调度
+        stop_event.wait(min(scheduler.seconds_until_next(keys), max_sleep) if keys else max_sleep)
@@ -0,0 +1,461 @@
+"""
+共享 LLM 客户端（文本 + vision），取代各调用点各写一套 HTTP / 重试 / SSE 解析。
+
+- 连接：一个进程内共享的 :class:`~ingestion.http_client.HttpClient`（keep-alive 连接池），
+  改写、封面文案、Guizang 模式选择、vision 读图复用同一批 TCP/TLS 连接；
+- 协议：:class:`LLMEndpoint` 描述服务商（``gemini`` 原生 REST / ``openai`` 兼容
+  ``/chat/completions``），请求体构造与响应解析由对应 provider 负责；
+- 解码：:func:`iter_events` 统一处理 SSE（``data: ...``，``[DONE]`` 结束）、
+  单个 JSON 响应与 JSON 数组（``streamGenerateContent`` 不带 ``alt=sse``）；
+- 重试：429 / 5xx / 连接中断 / 空响应按 ``backoff * 2**attempt`` 指数退避，遵守 ``Retry-After``；
+  其它 4xx 立即失败；
+- 结果：:class:`LLMResult` 带文本、token 用量、总耗时与首字延迟、结束原因；
+- 观测：``add_listener`` 注册的回调收到每次 HTTP 尝试的 :class:`LLMCallEvent`（状态码、耗时、
+  预估提示词 token 数），供 ``rewrite_scheduler`` 等按服务端实际容量调节并发。
+
+配置沿用 ``config/sources.yaml`` 的 ``api_keys.llm`` / ``api_keys.gemini``：
+``provider: openai_compatible`` 或 ``base_url`` 含 ``/chat/completions`` 时按 OpenAI 兼容处理，
+否则按 Gemini 原生处理（``Authorization: Bearer``，兼容第三方转发）。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable, Iterator
+
+import requests
+
+from ingestion.http_client import DEFAULT_CONNECT_TIMEOUT, HttpClient
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+PROVIDER_GEMINI = "gemini"
+PROVIDER_OPENAI = "openai"
+_CJK = re.compile(r"[\u3000-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size: one token per CJK character, four characters per token otherwise."""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+class LLMError(RuntimeError):
+    """An LLM call failed for good (non-retryable status or retries exhausted)."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ImagePart:
+    """Inline image for vision prompts (base64 payload)."""
+
+    mime_type: str
+    data: str
+
+
+@dataclass(frozen=True)
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+@dataclass(frozen=True)
+class LLMResult:
+    text: str
+    usage: Usage = field(default_factory=Usage)
+    latency: float = 0.0
+    first_token_latency: float | None = None
+    finish_reason: str = ""
+    model: str = ""
+    attempts: int = 1
+
+    def summary(self) -> str:
+        first = (
+            f", first token {self.first_token_latency:.1f}s" if self.first_token_latency is not None else ""
+        )
+        return (
+            f"{len(self.text)} chars, {self.usage.prompt_tokens}+{self.usage.completion_tokens} tokens, "
+            f"{self.latency:.1f}s{first}"
+        )
+
+
+@dataclass(frozen=True)
+class LLMEndpoint:
+    provider: str
+    url: str
+    api_key: str
+    model: str = ""
+
+    @classmethod
+    def from_config(cls, api_config: dict) -> "LLMEndpoint":
+        """Endpoint from a ``sources.yaml`` ``api_keys.llm`` / ``api_keys.gemini`` block."""
+        url = api_config.get("base_url", "")
+        # 智能识别: base_url 已含 /chat/completions → 按 OpenAI 兼容处理,
+        # 即使 provider 仍标 "third_party" 也能跑通
+        is_openai = api_config.get("provider") == "openai_compatible" or "/chat/completions" in url
+        return cls(
+            provider=PROVIDER_OPENAI if is_openai else PROVIDER_GEMINI,
+            url=url,
+            api_key=api_config.get("api_key", ""),
+            model=api_config.get("model", ""),
+        )
+
+
+@dataclass(frozen=True)
+class LLMCallEvent:
+    """One HTTP attempt, reported to listeners (``status`` is None for connection failures)."""
+
+    status: int | None
+    latency: float
+    first_token_latency: float | None = None
+    ok: bool = False
+    # 文本部分的预估 token 数；首字延迟随提示词长度增长，比较延迟时要按它分档
+    prompt_tokens: int = 0
+
+
+@dataclass
+class _Delta:
+    text: str = ""
+    usage: Usage | None = None
+    finish_reason: str = ""
+
+
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+
+
+class GeminiProvider:
+    """Gemini native REST (``generateContent`` / ``streamGenerateContent?alt=sse``)."""
+
+    @staticmethod
+    def url(endpoint: LLMEndpoint, stream: bool) -> str:
+        base, _, query = endpoint.url.partition("?")
+        base = base.split(":streamGenerateContent")[0].split(":generateContent")[0].rstrip("/")
+        params = [p for p in query.split("&") if p and not p.startswith("alt=")]
+        if stream:
+            return f"{base}:streamGenerateContent?" + "&".join(["alt=sse", *params])
+        return f"{base}:generateContent" + (f"?{'&'.join(params)}" if params else "")
+
+    @staticmethod
+    def payload(endpoint, parts, *, stream, temperature, top_p, top_k, max_tokens, json_mode) -> dict:
+        config = {"temperature": temperature, "topK": top_k, "topP": top_p, "maxOutputTokens": max_tokens}
+        if json_mode:
+            config["responseMimeType"] = "application/json"
+        contents = [
+            (
+                {"text": part}
+                if isinstance(part, str)
+                else {"inline_data": {"mime_type": part.mime_type, "data": part.data}}
+            )
+            for part in parts
+        ]
+        return {
+            "contents": [{"role": "user", "parts": contents}],
+            "generationConfig": {key: value for key, value in config.items() if value is not None},
+        }
+
+    @staticmethod
+    def parse(event: dict) -> _Delta:
+        delta = _Delta()
+        candidates = event.get("candidates") or []
+        if candidates:
+            candidate = candidates[0]
+            for part in (candidate.get("content") or {}).get("parts") or []:
+                # 思考模型的 thought 部分不计入正文
+                if part.get("thought", False):
+                    continue
+                delta.text += part.get("text") or ""
+            delta.finish_reason = candidate.get("finishReason") or ""
+        meta = event.get("usageMetadata")
+        if meta:
+            delta.usage = Usage(
+                meta.get("promptTokenCount", 0),
+                meta.get("candidatesTokenCount", 0) + meta.get("thoughtsTokenCount", 0),
+                meta.get("totalTokenCount", 0),
+            )
+        return delta
+
+
+class OpenAIProvider:
+    """OpenAI-compatible ``/chat/completions`` (streaming ``delta`` or whole ``message``)."""
+
+    @staticmethod
+    def url(endpoint: LLMEndpoint, stream: bool) -> str:
+        return endpoint.url
+
+    @staticmethod
+    def payload(endpoint, parts, *, stream, temperature, top_p, top_k, max_tokens, json_mode) -> dict:
+        if all(isinstance(part, str) for part in parts):
+            content = "".join(parts)
+        else:
+            content = [
+                (
+                    {"type": "text", "text": part}
+                    if isinstance(part, str)
+                    else {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:{part.mime_type};base64,{part.data}"},
+                    }
+                )
+                for part in parts
+            ]
+        payload = {
+            "model": endpoint.model,
+            "messages": [{"role": "user", "content": content}],
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+        }
+        payload = {key: value for key, value in payload.items() if value is not None}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def parse(event: dict) -> _Delta:
+        delta = _Delta()
+        choices = event.get("choices") or []
+        if choices:
+            choice = choices[0]
+            message = choice.get("delta") or choice.get("message") or {}
+            delta.text = message.get("content") or ""
+            delta.finish_reason = choice.get("finish_reason") or ""
+        usage = event.get("usage")
+        if usage:
+            delta.usage = Usage(
+                usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), usage.get("total_tokens", 0)
+            )
+        return delta
+
+
+PROVIDERS = {PROVIDER_GEMINI: GeminiProvider, PROVIDER_OPENAI: OpenAIProvider}
+
+
+# ----------------------------------------------------------------------
+# Decoding
+# ----------------------------------------------------------------------
+
+
+def iter_sse_data(lines: Iterable[bytes | str]) -> Iterator[dict]:
+    """JSON objects from SSE ``data:`` lines (multi-line events joined); stops at ``[DONE]``."""
+    buffer: list[str] = []
+
+    def flush():
+        data = "\n".join(buffer)
+        buffer.clear()
+        if not data.strip():
+            return None
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return None
+
+    for raw in lines:
+        line = raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r")
+        if not line:
+            event = flush()
+            if event is not None:
+                yield event
+            continue
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].lstrip(" ")
+        if data.strip() == "[DONE]":
+            break
+        buffer.append(data)
+    event = flush()
+    if event is not None:
+        yield event
+
+
+def iter_events(response) -> Iterator[dict]:
+    """Response events: SSE streams and plain JSON bodies (object or array) alike."""
+    content_type = (response.headers.get("content-type") or "").lower()
+    if "event-stream" in content_type:
+        yield from iter_sse_data(response.iter_lines())
+        return
+    body = response.content
+    try:
+        data = json.loads(body)
+    except (TypeError, ValueError):
+        # 未声明 content-type 的 SSE
+        yield from iter_sse_data(body.splitlines() if isinstance(body, bytes) else [])
+        return
+    for event in data if isinstance(data, list) else [data]:
+        if isinstance(event, dict):
+            yield event
+
+
+# ----------------------------------------------------------------------
+# Client
+# ----------------------------------------------------------------------
+
+
+def _retry_after(response) -> float | None:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Pooled LLM client with one retry policy for every call site."""
+
+    def __init__(
+        self,
+        *,
+        http: HttpClient | None = None,
+        max_attempts: int = 3,
+        backoff: float = 5.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # 重试在这里统一处理；LLM 请求本来就慢，不做慢请求告警
+        self.http = http or HttpClient(pool_size=8, retries=0, slow_seconds=float("inf"))
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.sleep = sleep
+        self.clock = clock
+        self._listeners: list[Callable[[LLMCallEvent], None]] = []
+
+    def add_listener(self, listener: Callable[[LLMCallEvent], None]) -> None:
+        """Observe every attempt (status / latency), e.g. for adaptive concurrency."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[LLMCallEvent], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: LLMCallEvent) -> None:
+        for listener in list(self._listeners):
+            listener(event)
+
+    def generate(
+        self,
+        endpoint: LLMEndpoint,
+        prompt: str | list,
+        *,
+        stream: bool = False,
+        temperature: float | None = None,
+        top_p: float | None = None,
+        top_k: int | None = None,
+        max_tokens: int | None = None,
+        json_mode: bool = False,
+        timeout: float = 120,
+        max_attempts: int | None = None,
+        on_text: Callable[[str], None] | None = None,
+    ) -> LLMResult:
+        """Run one prompt (text, or a list of text / :class:`ImagePart` parts); raises :class:`LLMError`."""
+        provider = PROVIDERS[endpoint.provider]
+        parts = [prompt] if isinstance(prompt, str) else list(prompt)
+        url = provider.url(endpoint, stream)
+        payload = provider.payload(
+            endpoint,
+            parts,
+            stream=stream,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+        )
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {endpoint.api_key}"}
+        prompt_tokens = estimate_tokens("".join(part for part in parts if isinstance(part, str)))
+        attempts = max_attempts or self.max_attempts
+        last_error = LLMError("no attempt made")
+
+        for attempt in range(attempts):
+            wait = self.backoff * (2**attempt)
+            started = self.clock()
+            try:
+                response = self.http.request(
+                    "POST",
+                    url,
+                    json=payload,
+                    headers=headers,
+                    timeout=(DEFAULT_CONNECT_TIMEOUT, timeout),
+                    stream=stream,
+                )
+            except requests.RequestException as e:
+                last_error = LLMError(f"request error: {e}")
+                self._notify(LLMCallEvent(None, self.clock() - started, prompt_tokens=prompt_tokens))
+            else:
+                try:
+                    result, last_error, retry_after = self._read(response, provider, started, on_text)
+                finally:
+                    response.close()
+                if result is not None:
+                    self._notify(
+                        LLMCallEvent(
+                            200,
+                            result.latency,
+                            result.first_token_latency,
+                            ok=True,
+                            prompt_tokens=prompt_tokens,
+                        )
+                    )
+                else:
+                    self._notify(
+                        LLMCallEvent(
+                            response.status_code, self.clock() - started, prompt_tokens=prompt_tokens
+                        )
+                    )
+                if result is not None:
+                    return replace(result, model=endpoint.model, attempts=attempt + 1)
+                if last_error.status is not None and last_error.status not in RETRYABLE_STATUS:
+                    raise last_error
+                wait = retry_after if retry_after is not None else wait
+            if attempt < attempts - 1:
+                print(f"  ⚠️ LLM {last_error}. Retrying in {wait:.0f}s ({attempt + 1}/{attempts})...")
+                self.sleep(wait)
+        raise last_error
+
+    def _read(self, response, provider, started, on_text):
+        """``(result, error, retry_after)`` for one HTTP response."""
+        status = response.status_code
+        if status != 200:
+            detail = (response.text or "")[:500] if status not in RETRYABLE_STATUS else ""
+            return None, LLMError(f"HTTP {status} {detail}".strip(), status), _retry_after(response)
+
+        text = ""
+        usage = Usage()
+        finish_reason = ""
+        first_token = None
+        try:
+            for event in iter_events(response):
+                delta = provider.parse(event)
+                if delta.text:
+                    if first_token is None:
+                        first_token = self.clock() - started
+                    text += delta.text
+                    if on_text:
+                        on_text(delta.text)
+                usage = delta.usage or usage
+                finish_reason = delta.finish_reason or finish_reason
+        except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as e:
+            return None, LLMError(f"connection issue during stream: {e}"), None
+        if not text:
+            return None, LLMError("empty response"), None
+        return LLMResult(text, usage, self.clock() - started, first_token, finish_reason), None, None
+
+
+_default_client: LLMClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client (one connection pool and retry policy for all LLM calls)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LLMClient()
+        return _default_client
@@ -0,0 +1,286 @@
+"""
+多条内容的流水线编排：fetch_feed 扫描结果 → 下载 → 转写 → 改写 → 封面 → 分发。
+
+每个阶段有自己的有界线程池，一条内容完成一个阶段后立即进入下一阶段的队列，
+因此 A 在改写时 B 已经在转写、C 在下载，20 条积压的总耗时接近最慢阶段的耗时，
+而不是各条串行耗时之和。
+
+阶段与默认并发（sources.yaml ``settings.pipeline_workers`` 或
+``CHORA_PIPELINE_WORKERS_<STAGE>`` 覆盖）：
+
+- fetch（元数据 / 音频下载 / 缩略图，本地 I/O）：3 —— 小宇宙流式转写时音频下载并入 transcribe 阶段
+- transcribe（Whisper API 限流）：2 —— 每个任务在独立临时目录里切片（见 ``transcription.scratch``）
+- rewrite（LLM API 限流）：2
+- cover（封面生成）：2
+- distribute（Playwright 渲染，CPU）：1
+
+必需阶段（fetch / transcribe / rewrite）失败时该条内容停止；封面与分发按 Log & Continue，
+失败只记录。阶段函数返回 False 前在 ``job["skipped"]`` 写入原因（如重复音频）表示有意跳过：
+该条记为 skipped，单独计数，不算失败。各阶段结果同时写入状态台账（见 ``state_store``）。
+
+用法::
+
+    python3 orchestrator.py <url> [<url> ...]
+    python3 orchestrator.py --scan          # 先运行 fetch_feed 扫描，确认后处理全部新内容
+    python3 orchestrator.py --scan --yes    # 跳过确认
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+STAGE_ORDER = ("fetch", "transcribe", "rewrite", "cover", "distribute")
+DEFAULT_POOL_SIZES = {
+    "fetch": 3,
+    "transcribe": 2,
+    "rewrite": 2,
+    "cover": 2,
+    "distribute": 1,
+}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of an item's workflow; ``pool`` names the worker pool it runs in.
+
+    ``run`` returns False to stop the item; setting ``job["skipped"]`` first marks it skipped, not failed.
+    """
+
+    pool: str
+    run: Callable[[dict], bool]
+    required: bool = True
+
+
+@dataclass
+class PipelineItem:
+    key: str
+    stages: list[Stage]
+    job: dict = field(default_factory=dict)
+    status: str = "pending"
+    failed_stage: str = ""
+    timings: dict[str, float] = field(default_factory=dict)
+    started: float = 0.0
+    finished: float = 0.0
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def resolve_pool_sizes(settings: dict | None) -> dict[str, int]:
+    """Merge defaults, sources.yaml ``pipeline_workers`` and CHORA_PIPELINE_WORKERS_* overrides."""
+    configured = (settings or {}).get("pipeline_workers") or {}
+    sizes = {}
+    for pool, default in DEFAULT_POOL_SIZES.items():
+        value = _env_int(f"CHORA_PIPELINE_WORKERS_{pool.upper()}") or configured.get(pool) or default
+        sizes[pool] = max(1, int(value))
+    return sizes
+
+
+class StagePipeline:
+    """Runs items through their stages with one bounded thread pool per stage."""
+
+    def __init__(self, pool_sizes: dict[str, int] | None = None):
+        self.pool_sizes = {**DEFAULT_POOL_SIZES, **(pool_sizes or {})}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._cond = threading.Condition()
+        self._remaining = 0
+
+    def _executor(self, pool: str) -> ThreadPoolExecutor:
+        if pool not in self._executors:
+            self._executors[pool] = ThreadPoolExecutor(
+                max_workers=self.pool_sizes.get(pool, 1), thread_name_prefix=f"stage-{pool}"
+            )
+        return self._executors[pool]
+
+    def _finish(self, item: PipelineItem, status: str, failed_stage: str = "") -> None:
+        item.status = status
+        item.failed_stage = failed_stage
+        item.finished = time.monotonic()
+        with self._cond:
+            self._remaining -= 1
+            self._cond.notify_all()
+
+    def _run_stage(self, item: PipelineItem, stage: Stage) -> bool:
+        started = time.monotonic()
+        try:
+            return bool(stage.run(item.job))
+        except Exception as exc:
+            print(f"❌ [{item.key}] {stage.pool} 阶段异常: {exc}")
+            return False
+        finally:
+            item.timings[stage.pool] = item.timings.get(stage.pool, 0.0) + time.monotonic() - started
+
+    def _submit(self, item: PipelineItem, index: int) -> None:
+        if index >= len(item.stages):
+            self._finish(item, "done")
+            return
+        stage = item.stages[index]
+        future = self._executor(stage.pool).submit(self._run_stage, item, stage)
+        future.add_done_callback(lambda f: self._advance(item, index, f))
+
+    def _advance(self, item: PipelineItem, index: int, future: Future) -> None:
+        stage = item.stages[index]
+        ok = not future.cancelled() and future.exception() is None and future.result()
+        if not ok and item.job.get("skipped"):
+            print(f"⏭️ [{item.key}] 在 {stage.pool} 阶段跳过: {item.job['skipped']}")
+            self._finish(item, "skipped")
+            return
+        if not ok and stage.required:
+            print(f"⏹️ [{item.key}] 停在 {stage.pool} 阶段")
+            self._finish(item, "failed", stage.pool)
+            return
+        try:
+            self._submit(item, index + 1)
+        except RuntimeError:
+            # 关闭过程中（Ctrl+C）不再提交
+            self._finish(item, "cancelled", item.stages[index + 1].pool)
+
+    def run(self, items: list[PipelineItem]) -> list[PipelineItem]:
+        """Process ``items`` concurrently; returns them with status and per-stage timings."""
+        self._remaining = len(items)
+        try:
+            for item in items:
+                item.started = time.monotonic()
+                self._submit(item, 0)
+            with self._cond:
+                while self._remaining > 0:
+                    self._cond.wait(timeout=1.0)
+        finally:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+        return items
+
+
+# -----------------------------------------------------------------------------
+# 各平台的阶段定义
+# -----------------------------------------------------------------------------
+
+
+def _podcast_stages(url: str) -> list[Stage]:
+    import process_podcast
+
+    def fetch(job: dict) -> bool:
+        prepared = process_podcast.prepare_episode(url)
+        if not prepared:
+            return False
+        job.update(prepared)
+        return process_podcast.download_episode_audio(job)
+
+    return [
+        Stage("fetch", fetch),
+        Stage("transcribe", process_podcast.transcribe_episode),
+        Stage("rewrite", process_podcast.rewrite_episode),
+        Stage("cover", process_podcast.generate_episode_cover, required=False),
+        Stage("distribute", process_podcast.distribute_episode, required=False),
+    ]
+
+
+def _video_stages(url: str) -> list[Stage]:
+    import process_video
+
+    def fetch(job: dict) -> bool:
+        prepared = process_video.prepare_video(url)
+        if not prepared:
+            return False
+        job.update(prepared)
+        # 缩略图封面失败不影响后续阶段
+        process_video.download_video_cover(job)
+        return True
+
+    return [
+        Stage("fetch", fetch),
+        Stage("transcribe", process_video.fetch_video_transcript),
+        Stage("rewrite", process_video.rewrite_video),
+        Stage("distribute", process_video.distribute_video, required=False),
+    ]
+
+
+def build_item(url: str) -> PipelineItem | None:
+    if "xiaoyuzhoufm.com" in url:
+        return PipelineItem(url, _podcast_stages(url))
+    if "youtube.com" in url or "youtu.be" in url:
+        return PipelineItem(url, _video_stages(url))
+    print(f"⚠️ 不支持的链接，跳过: {url}")
+    return None
+
+
+def print_report(items: list[PipelineItem], wall_seconds: float) -> None:
+    print(f"\n{'=' * 50}")
+    print("流水线完成:")
+    for item in items:
+        mark = {"done": "✅", "failed": "❌", "skipped": "⏭️"}.get(item.status, "⏹️")
+        where = f" (停在 {item.failed_stage})" if item.failed_stage else ""
+        if item.status == "skipped":
+            where = f" (跳过: {item.job['skipped']})"
+        stages = ", ".join(
+            f"{pool} {item.timings[pool]:.0f}s" for pool in STAGE_ORDER if pool in item.timings
+        )
+        print(f"  {mark} {item.job.get('metadata', {}).get('title') or item.key}{where}")
+        if stages:
+            print(f"     {stages}")
+    counts = {status: sum(item.status == status for item in items) for status in ("done", "skipped")}
+    others = len(items) - counts["done"] - counts["skipped"]
+    print(f"\n完成 {counts['done']}，跳过 {counts['skipped']}，失败 {others}")
+    serial = sum(sum(item.timings.values()) for item in items)
+    print(f"总耗时 {wall_seconds:.0f}s（各阶段累计 {serial:.0f}s）")
+
+
+def run_urls(urls: list[str], settings: dict | None = None) -> list[PipelineItem]:
+    items = [item for item in map(build_item, urls) if item]
+    if not items:
+        return []
+    pool_sizes = resolve_pool_sizes(settings)
+    print(f"🚀 流水线处理 {len(items)} 条内容，各阶段并发: {pool_sizes}")
+    started = time.monotonic()
+    StagePipeline(pool_sizes).run(items)
+    print_report(items, time.monotonic() - started)
+    return items
+
+
+def main(argv: list[str] | None = None) -> int:
+    from config_loader import load_sources_config
+
+    parser = argparse.ArgumentParser(description="以流水线方式批量处理多条内容")
+    parser.add_argument("urls", nargs="*", help="YouTube / 小宇宙链接")
+    parser.add_argument("--scan", action="store_true", help="先运行 fetch_feed 扫描，处理扫描到的新内容")
+    parser.add_argument("--yes", action="store_true", help="--scan 时跳过确认")
+    args = parser.parse_args(argv)
+
+    urls = list(args.urls)
+    if args.scan:
+        import fetch_feed
+
+        items = fetch_feed.main([]) or []
+        if items and not args.yes:
+            answer = input(f"\n处理以上 {len(items)} 条内容? [y/N] ").strip().lower()
+            if answer not in ("y", "yes"):
+                print("已取消。")
+                return 0
+        urls.extend(item["url"] for item in items)
+
+    if not urls:
+        parser.print_usage()
+        return 1
+
+    config = load_sources_config("config/sources.yaml") or {}
+    items = run_urls(urls, config.get("settings"))
+    # 有意跳过（重复内容）不算失败
+    return 0 if items and all(item.status in ("done", "skipped") for item in items) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,18 +15,43 @@ os.environ["PATH"] = f'{user_bin}:{brew_bin}:{local_bin}:{os.environ.get("PATH",
 示例: python3 process_podcast.py https://www.xiaoyuzhoufm.com/episode/5e4ff46a418a84a046973eee
 """
 
-import glob
 import os
 import re
 import subprocess
 import sys
-
-from groq import Groq
+import threading
 
 import rewrite_service
+from archive_index import register_folder
 from config_loader import load_sources_config
 from distribution_pipeline.automation import generate_distribution_after_rewrite
 from generate_cover import generate_podcast_cover_with_fallback as generate_podcast_cover
+from ingestion.http_client import get_client as get_http_client
+from state_store import STATUS_FAILED, record_item, record_stage
+from transcription.checkpoints import CheckpointStore, checkpoint_path_for, chunk_key, hash_file
+from transcription.chunking import (
+    UPLOAD_EXTENSION,
+    ChunkPlanner,
+    ChunkSettings,
+    extract_chunks,
+    join_transcripts,
+    plan_chunks,
+    resolve_chunk_settings,
+    transcode_for_upload,
+)
+from transcription.engines import build_engine
+from transcription.fingerprint import skip_if_duplicate
+from transcription.scratch import resolve_scratch_settings, scratch_dir
+from transcription.segments import (
+    Segment,
+    merge_chunk_segments,
+    response_payload,
+    segments_from_whisper,
+    segments_path_for,
+    segments_text,
+    write_segments,
+)
+from transcription.streaming import StreamingError, StreamingTranscoder, stream_chunks, streaming_enabled
 from xiaoyuzhou_service import extract_episode_id, get_episode_metadata
 
 
@@ -103,46 +128,36 @@ def extract_guests_from_description(description):
     return "\n".join(guests_lines)
 
 
-def download_audio(audio_url, output_path):
-    """Download audio file from URL."""
+def download_audio(audio_url, output_path, on_chunk=None):
+    """Download audio file from URL (streamed through the shared HTTP client).
+
+    ``on_chunk`` receives each block as it arrives (streaming transcription).
+    """
     print(f"Downloading audio from: {audio_url[:60]}...")
     print(f"Saving to: {output_path}")
     try:
-        result = subprocess.run(
-            [
-                "curl",
-                "-L",
-                "-o",
-                output_path,
-                "-H",
-                "User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)",
-                "--max-time",
-                "600",  # 10分钟超时
-                "--progress-bar",
-                audio_url,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=660,
+        written = get_http_client().download(
+            audio_url,
+            output_path,
+            headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"},
+            max_seconds=600,  # 10分钟超时
+            on_chunk=on_chunk,
         )
 
         min_size = 100 * 1024  # 100KB minimum size for valid audio
-        if os.path.exists(output_path) and os.path.getsize(output_path) > min_size:
-            file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        if written > min_size:
+            file_size_mb = written / (1024 * 1024)
             print(f"✅ Audio downloaded: {file_size_mb:.1f} MB")
             return True
         else:
-            actual_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
             print(
-                f"❌ Download failed or file too small ({actual_size} bytes < 100KB). Likely invalid/protected source."
+                f"❌ Download failed or file too small ({written} bytes < 100KB). Likely invalid/protected source."
             )
-            if result.stderr:
-                print(f"stderr: {result.stderr[:200]}")
             # Clean up invalid file
             if os.path.exists(output_path):
                 os.remove(output_path)
             return False
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         print("Error: Download timed out after 10 minutes.")
         return False
     except Exception as e:
@@ -150,169 +165,210 @@ def download_audio(audio_url, output_path):
         return False
 
 
-def split_audio(file_path, chunk_length_sec=300):  # 5分钟一片
-    """Split audio into chunks using ffmpeg."""
-    print("Splitting audio file using ffmpeg...")
+def split_audio(file_path, settings=None, work_dir="."):
+    """Transcode once to compact Opus, then split at natural pauses (see ``transcription.chunking``).
 
-    # Clean up any existing temp chunks
-    for f in glob.glob("temp_chunk_*.mp3"):
-        os.remove(f)
-
-    output_pattern = "temp_chunk_%03d.mp3"
+    All intermediate files go to ``work_dir`` (a per-job scratch directory).
+    """
+    settings = settings or ChunkSettings()
+    print("Transcoding to 16 kHz mono Opus and detecting silences...")
 
+    compact_path = os.path.join(work_dir, f"audio{UPLOAD_EXTENSION}")
     try:
-        # Use ffmpeg to split
-        # -i input -f segment -segment_time 300 -c:a libmp3lame -q:a 4 output_pattern
-        # Using re-encoding to ensure consistent format and avoid boundary issues,
-        # but -c copy is faster if source is mp3. Let's use libmp3lame to be safe and standard.
-        cmd = [
-            "ffmpeg",
-            "-i",
-            file_path,
-            "-f",
-            "segment",
-            "-segment_time",
-            str(chunk_length_sec),
-            "-c:a",
-            "libmp3lame",
-            "-q:a",
-            "4",  # Reasonable quality
-            "-loglevel",
-            "error",
-            output_pattern,
-        ]
-
-        subprocess.run(cmd, check=True)
-
-        # Get list of generated files
-        chunks = sorted(glob.glob("temp_chunk_*.mp3"))
-        print(f"Audio split into {len(chunks)} chunks.")
-        return chunks
+        duration, silences = transcode_for_upload(file_path, compact_path, settings)
+        if not duration:
+            print("Error splitting audio: could not read audio duration.")
+            return []
+        planned = plan_chunks(duration, silences, settings)
+        hard_cuts = sum(1 for chunk in planned if chunk.overlap)
+        print(
+            f"Planned {len(planned)} chunks over {duration / 60:.1f} min "
+            f"({len(silences)} pauses found, {hard_cuts} hard cuts with overlap)."
+        )
+        return extract_chunks(compact_path, planned, work_dir)
 
     except subprocess.CalledProcessError as e:
         print(f"Error splitting audio: {e}")
         return []
+    finally:
+        if os.path.exists(compact_path):
+            os.remove(compact_path)
 
 
-import time
+def transcribe_audio(audio_path, config, checkpoint_path=None):
+    """Transcribe audio file with the configured engine (Groq Whisper, local CPU Whisper
+    or Groq with local spillover, see ``transcription.engines``), chunks in parallel.
 
+    Each chunk's result is checkpointed as it completes (``transcript_chunks.jsonl``
+    next to the audio); a re-run only transcribes missing or failed chunks.
+    Time-coded segments go to ``transcript_segments.json`` in the same folder.
+    Returns None while any chunk is still failed.
+    """
+    engine = build_engine(config)
+    if not engine:
+        return None
 
-def transcribe_chunk(client, chunk_filename, index):
-    """Transcribe a single audio chunk file using Groq Whisper with retry on 429."""
-    print(f"  Transcribing {chunk_filename}...")
-    max_retries = 12
+    settings = config.get("settings")
+    store = CheckpointStore(checkpoint_path or checkpoint_path_for(audio_path))
+    # 每个任务独立的临时目录：并发转写互不干扰，结束时整个目录删除
+    with scratch_dir(resolve_scratch_settings(settings)) as work_dir:
+        print("Splitting audio for transcription...")
+        chunks = split_audio(audio_path, resolve_chunk_settings(settings), work_dir)
+        print(f"Audio split into {len(chunks)} chunks.")
+        if not chunks:
+            return None
+        planned = _transcribe_chunks(engine, chunks, store)
 
-    for attempt in range(max_retries):
-        try:
-            with open(chunk_filename, "rb") as file:
-                transcription = client.audio.transcriptions.create(
-                    file=(chunk_filename, file.read()),
-                    model="whisper-large-v3",
-                    response_format="text",
-                    timeout=300.0,
-                )
-            return transcription
-        except Exception as e:
-            error_str = str(e).lower()
-            if "429" in error_str or "rate limit" in error_str:
-                # Default backoff
-                wait_time = 60 * (1.5**attempt)  # Start at 60s, then 90, 135...
-
-                # Try to parse specific wait time from Groq error message
-                # e.g. "Please try again in 2m24s" or "try again in 1m36.5s"
-                match = re.search(r"try again in (\d+)m([\d.]+)s", error_str)
-                if match:
-                    wait_time = int(match.group(1)) * 60 + float(match.group(2)) + 5
-                else:
-                    match_s = re.search(r"try again in ([\d.]+)s", error_str)
-                    if match_s:
-                        wait_time = float(match_s.group(1)) + 5
+    return _finish_transcript(planned, store)
 
-                # Cap wait time to 15 mins
-                wait_time = min(wait_time, 900)
 
-                print(
-                    f"  ⚠️ Rate limit hit (429) on {chunk_filename}. Retrying in {wait_time:.1f}s... (Attempt {attempt+1}/{max_retries})"
-                )
-                time.sleep(wait_time)
-                continue
-            else:
-                print(f"Error transcribing {chunk_filename}: {e}")
-                raise e
+def transcribe_audio_streaming(audio_url, audio_path, config, checkpoint_path=None):
+    """Download ``audio_url`` to ``audio_path`` while transcribing it (see ``transcription.streaming``).
 
-    raise Exception(f"Failed to transcribe {chunk_filename} after {max_retries} retries due to rate limits.")
+    Chunks are cut and submitted as soon as their audio has arrived. Falls back
+    to :func:`transcribe_audio` on the finished file when the source cannot be
+    decoded from a pipe. Returns None when the download or any chunk failed.
+    """
+    engine = build_engine(config)
+    if not engine:
+        return None
 
+    settings = config.get("settings")
+    chunk_settings = resolve_chunk_settings(settings)
+    store = CheckpointStore(checkpoint_path or checkpoint_path_for(audio_path))
+    with scratch_dir(resolve_scratch_settings(settings)) as work_dir:
+        transcoder = StreamingTranscoder(os.path.join(work_dir, f"audio{UPLOAD_EXTENSION}"), chunk_settings)
+        downloaded = {}
+
+        def download():
+            try:
+                downloaded["ok"] = download_audio(audio_url, audio_path, on_chunk=transcoder.feed)
+            finally:
+                if downloaded.get("ok"):
+                    transcoder.close()
+                else:
+                    transcoder.abort()
 
-def transcribe_audio(audio_path, config):
-    """Transcribe audio file using Groq Whisper API with parallel processing."""
-    api_key = config.get("api_keys", {}).get("groq")
-    if not api_key:
-        print("Error: Groq API key not found in config.")
+        downloader = threading.Thread(target=download, name="audio-download", daemon=True)
+        print("🚀 Streaming download into transcription...")
+        downloader.start()
+        try:
+            planned = _transcribe_chunks(
+                engine, stream_chunks(transcoder, ChunkPlanner(chunk_settings), work_dir), store
+            )
+        except (StreamingError, subprocess.CalledProcessError) as e:
+            downloader.join()
+            if not downloaded.get("ok"):
+                return None
+            print(f"⚠️ Streaming transcode failed ({e}); transcribing the downloaded file instead.")
+            return transcribe_audio(audio_path, config, store.path)
+        finally:
+            downloader.join()
+
+    if not downloaded.get("ok"):
         return None
+    return _finish_transcript(planned, store)
+
+
+def _finish_transcript(planned, store):
+    """Transcript from the checkpoint store, or None while any chunk is still failed."""
+    failed = [chunk.index + 1 for chunk, key in planned if store.done_text(key) is None]
+    if failed:
+        print(f"❌ Chunks {failed} still failed; re-run to retry only these chunks.")
+        return None
+    chunks = [chunk for chunk, _ in planned]
+    records = [store.get(key) for _, key in planned]
+    return _assemble_transcript(chunks, records, os.path.dirname(store.path))
+
 
-    # Create a client factory or shared client
-    # Groq client is generally thread-safe for requests
-    client = Groq(api_key=api_key)
+def _assemble_transcript(chunks, records, output_dir):
+    """Join checkpointed chunks; overlaps are de-duplicated by timestamp when segments exist."""
+    if not all(record.segments or not record.text.strip() for record in records):
+        # 旧断点只有纯文本：按文本去重
+        return join_transcripts([record.text for record in records], chunks)
 
-    print("Splitting audio for transcription...")
-    chunks = split_audio(audio_path)
-    print(f"Audio split into {len(chunks)} chunks.")
+    per_chunk = [[Segment.from_row(row) for row in record.segments] for record in records]
+    kept = merge_chunk_segments(chunks, per_chunk)
+    segments = [segment for chunk_segments in kept for segment in chunk_segments]
+    write_segments(segments_path_for(output_dir), segments, source="whisper", language=records[0].language)
+    return "\n".join(filter(None, (segments_text(chunk_segments) for chunk_segments in kept)))
 
-    # Parallel processing configuration
-    # Reduced workers to be less aggressive with rate limits
-    max_workers = 3
-    results = [None] * len(chunks)
+
+def _checkpoint_chunk(store, chunk, key, future):
+    """Done-callback: persist one chunk's result (or failure) as soon as it completes."""
+    if future.cancelled():
+        return
+    try:
+        payload = response_payload(future.result())
+    except Exception as e:
+        print(f"  ❌ Chunk {chunk.index+1} failed permanently: {e}")
+        store.record_failed(key, chunk, str(e))
+        return
+    segments = segments_from_whisper(payload, chunk.start)
+    store.record_done(
+        key,
+        chunk,
+        payload.get("text") or "",
+        [segment.to_row() for segment in segments],
+        language=payload.get("language") or "",
+        engine=payload.get("engine") or "",
+    )
+    print(f"  ✅ Chunk {chunk.index+1} completed")
+    # Clean up the chunk file after successful processing
+    if os.path.exists(chunk.path):
+        os.remove(chunk.path)
+
+
+def _transcribe_chunks(engine, chunks, store):
+    """Transcribe chunks without a checkpoint in parallel, checkpointing each result.
+
+    ``chunks`` may be a generator (streaming mode): each chunk is submitted as
+    soon as it is cut. Returns ``[(chunk, checkpoint_key), ...]`` in order.
+    """
+    # Parallel processing configuration (per engine, see transcription.engines)
+    max_workers = engine.max_workers
+    planned = []
+    futures = []
+    reused = 0
 
     print(f"🚀 Starting parallel transcription with {max_workers} workers...")
 
     import concurrent.futures
 
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_index = {
-                executor.submit(transcribe_chunk, client, chunk, i): i for i, chunk in enumerate(chunks)
-            }
-
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    transcript = future.result()
-                    results[index] = transcript
-                    print(f"  ✅ Chunk {index+1}/{len(chunks)} completed")
-                    # Clean up the chunk file after successful processing
-                    chunk_filename = f"temp_chunk_{index:03d}.mp3"
-                    if os.path.exists(chunk_filename):
-                        os.remove(chunk_filename)
-                except Exception as e:
-                    print(f"  ❌ Chunk {index+1}/{len(chunks)} failed permanently: {e}")
-                    results[index] = f"[Chunk {index+1} transcription failed]"
+        for chunk in chunks:
+            key = chunk_key(chunk, hash_file(chunk.path))
+            planned.append((chunk, key))
+            if store.done_text(key) is not None:
+                reused += 1
+                continue
+            future = executor.submit(engine.transcribe, chunk.path, chunk.duration)
+            future.add_done_callback(lambda f, chunk=chunk, key=key: _checkpoint_chunk(store, chunk, key, f))
+            futures.append(future)
+        concurrent.futures.wait(futures)
     except KeyboardInterrupt:
         print("\nStopping transcription...")
         executor.shutdown(wait=False, cancel_futures=True)
         raise
+    except BaseException:
+        # 流式切片失败：已提交的分片照常完成并写入断点
+        executor.shutdown(wait=True)
+        raise
+    executor.shutdown(wait=True)
 
-    # Combine results in order
-    full_transcript = "\n".join(filter(None, results))
-    return full_transcript
+    if reused:
+        print(f"♻️ Reused {reused}/{len(planned)} checkpointed chunks")
+    return planned
 
 
-def process_podcast(podcast_url):
-    """
-    Full workflow for processing a xiaoyuzhou podcast episode:
-    1. Get metadata
-    2. Create archive folder
-    3. Download audio
-    4. Transcribe audio
-    5. Run AI rewrite
-    6. Generate cover image
-    """
+def prepare_episode(podcast_url):
+    """Steps 1-2: metadata + archive folder. Returns the job dict shared by the stage functions."""
     # Extract episode ID
     episode_id = extract_episode_id(podcast_url)
     if not episode_id:
         print("❌ Invalid xiaoyuzhou URL. Expected format: https://www.xiaoyuzhoufm.com/episode/XXXX")
-        return
+        return None
 
     print(f"🚀 Processing Xiaoyuzhou Episode ID: {episode_id}")
 
@@ -321,7 +377,7 @@ def process_podcast(podcast_url):
     metadata = get_episode_metadata_wrapper(episode_id)
     if not metadata:
         print("❌ Failed to get metadata. Aborting.")
-        return
+        return None
 
     print(f"  Title: {metadata['title']}")
     print(f"  Channel: {metadata['channel']}")
@@ -370,81 +426,194 @@ def process_podcast(podcast_url):
             f.write(initial_metadata)
         print("Saved initial metadata.md")
 
-    # Load config
-    config = load_config()
+    record_item(episode_id, platform="xiaoyuzhou", title=metadata["title"], url=source_url, folder=output_dir)
+    register_folder(
+        output_dir, platform="xiaoyuzhou", source_id=episode_id, title=metadata["title"], date=date_str
+    )
 
-    # 3. Download Audio
+    return {
+        "content_id": episode_id,
+        "metadata": metadata,
+        "output_dir": output_dir,
+        "metadata_path": metadata_path,
+        "audio_path": os.path.join(output_dir, "audio.m4a"),
+        "transcript_path": os.path.join(output_dir, "transcript.md"),
+        "rewritten_path": os.path.join(output_dir, "rewritten.md"),
+        "cover_path": os.path.join(output_dir, "cover.png"),
+    }
+
+
+def download_episode_audio(job):
+    """Step 3: download the episode audio (skipped when already on disk).
+
+    In streaming mode the download is deferred to :func:`transcribe_episode`,
+    which transcribes while the audio arrives.
+    """
     print("\n[3/5] Downloading Audio...")
-    audio_path = os.path.join(output_dir, "audio.m4a")
+    episode_id, metadata, audio_path = job["content_id"], job["metadata"], job["audio_path"]
 
     if os.path.exists(audio_path):
         print("Audio already exists, skipping download.")
+    elif (
+        metadata.get("audio_url")
+        and not os.path.exists(job["transcript_path"])
+        and streaming_enabled(load_config().get("settings"))
+    ):
+        print("Audio will be downloaded while transcribing (streaming mode).")
+        job["stream_audio_url"] = metadata["audio_url"]
+        return True
     else:
         if metadata.get("audio_url"):
             success = download_audio(metadata["audio_url"], audio_path)
             if not success:
                 print("❌ Failed to download audio. Aborting.")
-                return
+                record_stage(episode_id, "fetched", STATUS_FAILED, "audio download failed")
+                return False
         else:
             print("❌ No audio URL found. Aborting.")
-            return
+            record_stage(episode_id, "fetched", STATUS_FAILED, "no audio url")
+            return False
+    record_stage(episode_id, "fetched")
+    return True
 
-    # 4. Transcribe Audio
+
+def transcribe_episode(job):
+    """Step 4: transcribe the audio into transcript.md (skipped when it exists)."""
     print("\n[4/5] Transcribing Audio...")
-    transcript_path = os.path.join(output_dir, "transcript.md")
+    episode_id, transcript_path = job["content_id"], job["transcript_path"]
 
     if os.path.exists(transcript_path):
         print("Transcript already exists, skipping transcription.")
-    else:
-        transcript_text = transcribe_audio(audio_path, config)
-        if transcript_text:
-            with open(transcript_path, "w", encoding="utf-8") as f:
-                f.write(transcript_text)
-            print(f"Saved transcript ({len(transcript_text)} chars)")
+        record_stage(episode_id, "transcribed")
+        return True
+
+    config = load_config()
+    streaming = job.get("stream_audio_url") and not os.path.exists(job["audio_path"])
+    # 重新上传 / 跨平台重复的节目：按音频指纹跳过，不产生任何付费调用
+    source = job["stream_audio_url"] if streaming else job["audio_path"]
+    if skip_if_duplicate(episode_id, source, config.get("settings")):
+        job["skipped"] = "重复音频"
+        return False
+
+    if streaming:
+        transcript_text = transcribe_audio_streaming(job["stream_audio_url"], job["audio_path"], config)
+        if os.path.exists(job["audio_path"]):
+            record_stage(episode_id, "fetched")
         else:
-            print("❌ Transcription failed. Aborting rewrite.")
-            return
+            print("❌ Failed to download audio. Aborting.")
+            record_stage(episode_id, "fetched", STATUS_FAILED, "audio download failed")
+            return False
+        if not _save_transcript(episode_id, transcript_path, transcript_text):
+            return False
+    else:
+        transcript_text = transcribe_audio(job["audio_path"], config)
+        if not _save_transcript(episode_id, transcript_path, transcript_text):
+            return False
+    record_stage(episode_id, "transcribed")
+    return True
+
 
-    # 5. Run AI Rewrite
+def _save_transcript(episode_id, transcript_path, transcript_text):
+    """Write transcript.md; records the failed stage when there is no text."""
+    if not transcript_text:
+        print("❌ Transcription failed. Aborting rewrite.")
+        record_stage(episode_id, "transcribed", STATUS_FAILED)
+        return False
+    with open(transcript_path, "w", encoding="utf-8") as f:
+        f.write(transcript_text)
+    print(f"Saved transcript ({len(transcript_text)} chars)")
+    return True
+
+
+def rewrite_episode(job):
+    """Step 5: AI rewrite into rewritten.md (skipped when it exists)."""
     print("\n[5/6] Running AI Rewrite...")
-    rewritten_path = os.path.join(output_dir, "rewritten.md")
+    episode_id, rewritten_path = job["content_id"], job["rewritten_path"]
 
     if os.path.exists(rewritten_path):
         print("Rewritten content already exists, skipping rewrite.")
         success = True
     else:
-        success = rewrite_service.rewrite_content(transcript_path, metadata_path, rewritten_path)
+        success = rewrite_service.rewrite_content(
+            job["transcript_path"], job["metadata_path"], rewritten_path
+        )
 
     if not success:
         print("\n❌ Rewrite failed.")
-        return
+        record_stage(episode_id, "rewritten", STATUS_FAILED)
+        return False
+    record_stage(episode_id, "rewritten")
+    return True
+
 
-    # 6. Generate Cover Image
+def generate_episode_cover(job):
+    """Step 6: cover image; failures are logged and the workflow continues."""
     print("\n[6/6] Generating Cover Image...")
-    cover_path = os.path.join(output_dir, "cover.png")
+    episode_id, cover_path = job["content_id"], job["cover_path"]
 
     if os.path.exists(cover_path):
         print("Cover already exists, skipping generation.")
+        record_stage(episode_id, "covered")
+        return True
+
+    cover_success = generate_podcast_cover(
+        title=job["metadata"]["title"],
+        channel=job["metadata"]["channel"],
+        output_path=cover_path,
+        content_path=job["rewritten_path"],
+    )
+    if cover_success:
+        record_stage(episode_id, "covered")
     else:
-        cover_success = generate_podcast_cover(
-            title=metadata["title"],
-            channel=metadata["channel"],
-            output_path=cover_path,
-            content_path=rewritten_path,
-        )
-        if not cover_success:
-            print("⚠️ Cover generation failed, but continuing...")
+        print("⚠️ Cover generation failed, but continuing...")
+        record_stage(episode_id, "covered", STATUS_FAILED)
+    return bool(cover_success)
 
-    distribution_dir = generate_distribution_after_rewrite(output_dir, context="process_podcast")
 
-    print(f"\n✅ Processing Complete! Output in: {output_dir}")
-    print(f"   - Metadata: {metadata_path}")
-    print(f"   - Transcript: {transcript_path}")
-    print(f"   - Rewritten: {rewritten_path}")
-    if os.path.exists(cover_path):
-        print(f"   - Cover: {cover_path}")
+def distribute_episode(job):
+    """Guizang distribution package; failures are logged by the automation step."""
+    distribution_dir = generate_distribution_after_rewrite(job["output_dir"], context="process_podcast")
+    job["distribution_dir"] = distribution_dir
     if distribution_dir:
-        print(f"   - Distribution: {distribution_dir}")
+        record_stage(job["content_id"], "distributed")
+    else:
+        record_stage(job["content_id"], "distributed", STATUS_FAILED, "see distribution_errors.log")
+    return bool(distribution_dir)
+
+
+def print_summary(job):
+    print(f"\n✅ Processing Complete! Output in: {job['output_dir']}")
+    print(f"   - Metadata: {job['metadata_path']}")
+    print(f"   - Transcript: {job['transcript_path']}")
+    print(f"   - Rewritten: {job['rewritten_path']}")
+    if os.path.exists(job["cover_path"]):
+        print(f"   - Cover: {job['cover_path']}")
+    if job.get("distribution_dir"):
+        print(f"   - Distribution: {job['distribution_dir']}")
+
+
+def process_podcast(podcast_url):
+    """
+    Full workflow for processing a xiaoyuzhou podcast episode:
+    1. Get metadata
+    2. Create archive folder
+    3. Download audio
+    4. Transcribe audio
+    5. Run AI rewrite
+    6. Generate cover image
+
+    Each step is also exposed as a stage function so ``orchestrator.py``
+    can pipeline several episodes.
+    """
+    job = prepare_episode(podcast_url)
+    if not job:
+        return
+    for stage in (download_episode_audio, transcribe_episode, rewrite_episode):
+        if not stage(job):
+            return
+    generate_episode_cover(job)
+    distribute_episode(job)
+    print_summary(job)
 
 
 if __name__ == "__main__":
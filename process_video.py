@@ -12,7 +12,12 @@ import subprocess
 
 import rewrite_service
 import youtube_service
+from archive_index import register_folder
 from distribution_pipeline.automation import generate_distribution_after_rewrite
+from ingestion.captions import get_caption_cache
+from state_store import STATUS_FAILED, record_item, record_stage
+from transcription.fingerprint import skip_if_duplicate
+from transcription.segments import segments_path_for, write_segments
 
 
 def sanitize_filename(name):
@@ -25,15 +30,8 @@ def sanitize_filename(name):
     return name[:50]
 
 
-def process_video(video_id_or_url):
-    """
-    Full workflow for processing a YouTube video:
-    1. Get metadata
-    2. Create archive folder
-    3. Download cover
-    4. Get transcript
-    5. Run AI rewrite
-    """
+def prepare_video(video_id_or_url):
+    """Steps 1-2: metadata + archive folder. Returns the job dict shared by the stage functions."""
     # Extract video ID if full URL is provided
     video_id = video_id_or_url
     if "youtube.com" in video_id or "youtu.be" in video_id:
@@ -50,7 +48,7 @@ def process_video(video_id_or_url):
     metadata = youtube_service.get_video_metadata(video_id)
     if not metadata:
         print("❌ Failed to get metadata. Aborting.")
-        return
+        return None
 
     # 2. Create Archive Folder
     print("\n[2/5] Creating Archive Folder...")
@@ -87,96 +85,245 @@ def process_video(video_id_or_url):
             f.write(initial_metadata)
         print("Saved initial metadata.md")
 
-    # 3. Download Cover
-    print("\n[3/5] Downloading Cover...")
-    youtube_service.download_cover(video_id, output_dir)
+    record_item(video_id, platform="youtube", title=metadata["title"], url=source_url, folder=output_dir)
+    register_folder(
+        output_dir, platform="youtube", source_id=video_id, title=metadata["title"], date=date_str
+    )
+    record_stage(video_id, "fetched")
+
+    return {
+        "content_id": video_id,
+        "metadata": metadata,
+        "output_dir": output_dir,
+        "metadata_path": metadata_path,
+        "transcript_path": os.path.join(output_dir, "transcript.md"),
+        "rewritten_path": os.path.join(output_dir, "rewritten.md"),
+    }
+
 
-    # 4. Get Transcript
+def download_video_cover(job):
+    """Step 3: download the YouTube thumbnail as the cover."""
+    print("\n[3/5] Downloading Cover...")
+    video_id = job["content_id"]
+    if youtube_service.download_cover(video_id, job["output_dir"]):
+        record_stage(video_id, "covered")
+        return True
+    record_stage(video_id, "covered", STATUS_FAILED, "cover download failed")
+    return False
+
+
+# Whisper 只需要 16 kHz 单声道：选最小的纯音频流（YouTube 上通常是 ~50 kbps 的 Opus，
+# itag 249），而不是 bestaudio 的 ~160 kbps。低于 32 kbps 的流识别率下降，作为最后的退路
+SPEECH_AUDIO_FORMAT = "ba[abr>=32]/ba"
+SPEECH_AUDIO_SORT = "acodec:opus,+abr"
+
+
+def _audio_format_args(settings):
+    settings = settings or {}
+    return [
+        "-f",
+        settings.get("youtube_audio_format") or SPEECH_AUDIO_FORMAT,
+        "-S",
+        settings.get("youtube_audio_sort") or SPEECH_AUDIO_SORT,
+    ]
+
+
+def speculative_audio_enabled(settings):
+    """Start the audio download while captions are probed (sources.yaml ``youtube_speculative_audio``)."""
+    raw = os.environ.get("CHORA_SPECULATIVE_AUDIO")
+    if raw is not None and raw.strip():
+        return raw.strip().lower() not in ("0", "false", "no", "off")
+    return bool((settings or {}).get("youtube_speculative_audio", True))
+
+
+class AudioDownload:
+    """Background ``yt-dlp`` audio download that can be abandoned once captions turn up."""
+
+    def __init__(self, video_id, output_dir, settings=None, popen=subprocess.Popen):
+        self.output_dir = output_dir
+        self._existing = set(os.listdir(output_dir))
+        # Download the smallest speech-grade audio-only stream as-is: transcribe_audio
+        # transcodes it once to compact Opus, so an MP3 pass here is wasted work
+        cmd = [
+            "yt-dlp",
+            *_audio_format_args(settings),
+            "--print",
+            "after_move:filepath",
+            "-o",
+            os.path.join(output_dir, "audio.%(ext)s"),
+            f"https://www.youtube.com/watch?v={video_id}",
+        ]
+        self.proc = popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def wait(self):
+        """Path of the downloaded audio; raises CalledProcessError when yt-dlp failed."""
+        stdout, stderr = self.proc.communicate()
+        if self.proc.returncode != 0:
+            raise subprocess.CalledProcessError(self.proc.returncode, self.proc.args, stdout, stderr)
+        stdout = (stdout or "").strip()
+        return stdout.splitlines()[-1] if stdout else ""
+
+    def cancel(self):
+        """Stop the download and remove the files it created (partial downloads included)."""
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.communicate()
+        for name in set(os.listdir(self.output_dir)) - self._existing:
+            if name.startswith("audio."):
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
+
+
+def fetch_video_transcript(job):
+    """Step 4: YouTube captions, falling back to audio download + Whisper.
+
+    For uncached videos the audio download starts alongside the caption probe;
+    it is cancelled when captions are found, otherwise Whisper uses it directly.
+    """
     print("\n[4/5] Fetching Transcript...")
-    transcript_path = os.path.join(output_dir, "transcript.md")
+    video_id, output_dir, transcript_path = job["content_id"], job["output_dir"], job["transcript_path"]
 
     if os.path.exists(transcript_path):
         print("Transcript already exists, skipping fetch.")
-    else:
-        transcript_text, lang = youtube_service.get_youtube_transcript(video_id)
-        if transcript_text:
-            with open(transcript_path, "w", encoding="utf-8") as f:
-                f.write(transcript_text)
-            print(f"Saved transcript ({len(transcript_text)} chars) to {transcript_path}")
+        record_stage(video_id, "transcribed")
+        return True
+
+    import process_podcast
+
+    config = process_podcast.load_config() or {}
+    settings = config.get("settings")
+
+    download = None
+    if get_caption_cache().get(video_id) is None and speculative_audio_enabled(settings):
+        print("🏁 Starting audio download alongside the caption probe...")
+        download = AudioDownload(video_id, output_dir, settings)
+
+    try:
+        segments, lang = youtube_service.get_youtube_transcript_segments(video_id)
+    except BaseException:
+        if download:
+            download.cancel()
+        raise
+    transcript_text = youtube_service.segments_text_from_captions(segments) if segments else None
+    if transcript_text:
+        if download:
+            download.cancel()
+            print("Captions found; cancelled the audio download.")
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            f.write(transcript_text)
+        # 字幕自带时间码，与 Whisper 转写使用同一种片段文件
+        write_segments(segments_path_for(output_dir), segments, source="youtube", language=lang)
+        print(f"Saved transcript ({len(transcript_text)} chars) to {transcript_path}")
+        record_stage(video_id, "transcribed")
+        return True
+
+    print("⚠️ YouTube transcript unavailable. Falling back to Whisper transcription...")
+    # Fallback: Download audio and transcribe
+    try:
+        # 1. Download audio (already running when speculative acquisition is on)
+        if not download:
+            print(f"Downloading audio for Whisper to {output_dir}...")
+            download = AudioDownload(video_id, output_dir, settings)
+        audio_path = download.wait()
+
+        # 与已处理内容（如同一期播客）音频相同：跳过 Whisper，不产生付费调用
+        if audio_path and os.path.exists(audio_path) and skip_if_duplicate(video_id, audio_path, settings):
+            job["skipped"] = "重复音频"
+            return False
+
+        if audio_path and os.path.exists(audio_path):
+            transcript_text = process_podcast.transcribe_audio(audio_path, config)
+
+            if transcript_text:
+                with open(transcript_path, "w", encoding="utf-8") as f:
+                    f.write(transcript_text)
+                print(f"✅ Saved Whisper transcript ({len(transcript_text)} chars) to {transcript_path}")
+
+                # Cleanup audio file to save space
+                # os.remove(audio_path)
+            else:
+                print("❌ Whisper transcription failed.")
+                record_stage(video_id, "transcribed", STATUS_FAILED, "whisper transcription failed")
+                return False
         else:
-            print("⚠️ YouTube transcript unavailable. Falling back to Whisper transcription...")
-            # Fallback: Download audio and transcribe
-            try:
-                import process_podcast
-
-                # 1. Download audio
-                audio_path = os.path.join(output_dir, "audio.mp3")
-                print(f"Downloading audio for Whisper to {audio_path}...")
-
-                # Use yt-dlp to download audio
-                cmd = [
-                    "yt-dlp",
-                    "-x",
-                    "--audio-format",
-                    "mp3",
-                    "--audio-quality",
-                    "4",  # Decent quality, smaller size
-                    "-o",
-                    os.path.join(output_dir, "audio.%(ext)s"),
-                    f"https://www.youtube.com/watch?v={video_id}",
-                ]
-
-                subprocess.run(cmd, check=True, capture_output=True)
-
-                if os.path.exists(audio_path):
-                    config = process_podcast.load_config()
-                    transcript_text = process_podcast.transcribe_audio(audio_path, config)
-
-                    if transcript_text:
-                        with open(transcript_path, "w", encoding="utf-8") as f:
-                            f.write(transcript_text)
-                        print(
-                            f"✅ Saved Whisper transcript ({len(transcript_text)} chars) to {transcript_path}"
-                        )
-
-                        # Cleanup audio file to save space
-                        # os.remove(audio_path)
-                    else:
-                        print("❌ Whisper transcription failed.")
-                        return
-                else:
-                    print("❌ Audio download failed.")
-                    return
-            except subprocess.CalledProcessError as e:
-                print(f"❌ Fallback failed (subprocess error): {e}")
-                if e.stderr:
-                    print(f"stderr: {e.stderr}")
-                import traceback
-
-                traceback.print_exc()
-                return
-            except Exception as e:
-                print(f"❌ Fallback failed: {e}")
-                import traceback
-
-                traceback.print_exc()
-                return
-
-    # 5. Run AI Rewrite
+            print("❌ Audio download failed.")
+            record_stage(video_id, "transcribed", STATUS_FAILED, "audio download failed")
+            return False
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Fallback failed (subprocess error): {e}")
+        if e.stderr:
+            print(f"stderr: {e.stderr}")
+        import traceback
+
+        traceback.print_exc()
+        record_stage(video_id, "transcribed", STATUS_FAILED, str(e))
+        return False
+    except Exception as e:
+        print(f"❌ Fallback failed: {e}")
+        import traceback
+
+        traceback.print_exc()
+        record_stage(video_id, "transcribed", STATUS_FAILED, str(e))
+        return False
+    record_stage(video_id, "transcribed")
+    return True
+
+
+def rewrite_video(job):
+    """Step 5: AI rewrite into rewritten.md."""
     print("\n[5/5] Running AI Rewrite...")
-    rewritten_path = os.path.join(output_dir, "rewritten.md")
+    success = rewrite_service.rewrite_content(
+        job["transcript_path"], job["metadata_path"], job["rewritten_path"]
+    )
+    if not success:
+        record_stage(job["content_id"], "rewritten", STATUS_FAILED)
+        print("\n❌ Rewrite failed.")
+        return False
+    record_stage(job["content_id"], "rewritten")
+    return True
 
-    success = rewrite_service.rewrite_content(transcript_path, metadata_path, rewritten_path)
 
-    if success:
-        distribution_dir = generate_distribution_after_rewrite(output_dir, context="process_video")
-        print(f"\n✅ Processing Complete! Output in: {output_dir}")
-        print(f"   - Metadata: {metadata_path}")
-        print(f"   - Rewritten: {rewritten_path}")
-        if distribution_dir:
-            print(f"   - Distribution: {distribution_dir}")
+def distribute_video(job):
+    """Guizang distribution package; failures are logged by the automation step."""
+    distribution_dir = generate_distribution_after_rewrite(job["output_dir"], context="process_video")
+    job["distribution_dir"] = distribution_dir
+    if distribution_dir:
+        record_stage(job["content_id"], "distributed")
     else:
-        print("\n❌ Rewrite failed.")
+        record_stage(job["content_id"], "distributed", STATUS_FAILED, "see distribution_errors.log")
+    return bool(distribution_dir)
+
+
+def print_summary(job):
+    print(f"\n✅ Processing Complete! Output in: {job['output_dir']}")
+    print(f"   - Metadata: {job['metadata_path']}")
+    print(f"   - Rewritten: {job['rewritten_path']}")
+    if job.get("distribution_dir"):
+        print(f"   - Distribution: {job['distribution_dir']}")
+
+
+def process_video(video_id_or_url):
+    """
+    Full workflow for processing a YouTube video:
+    1. Get metadata
+    2. Create archive folder
+    3. Download cover
+    4. Get transcript
+    5. Run AI rewrite
+
+    Each step is also exposed as a stage function so ``orchestrator.py``
+    can pipeline several videos.
+    """
+    job = prepare_video(video_id_or_url)
+    if not job:
+        return
+    download_video_cover(job)
+    if not fetch_video_transcript(job) or not rewrite_video(job):
+        return
+    distribute_video(job)
+    print_summary(job)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""
+改写结果的内容寻址缓存。
+
+``auto_fix_missing_rewritten``、``batch_rewrite`` 重试、后处理出错后重跑，都会对同一份
+转录再付一次完整的 LLM 费用。模型原始输出按输入内容的哈希存入
+``.chora_cache/rewrites/<sha256>.json``：
+
+- 键：``transcript.md`` 全文、``config/rewrite-prompt.md`` 模板、模型名、temperature；
+  任一变化即视为新请求。``metadata.md`` 不参与——改写本身会回写它（嘉宾 / 金句），
+  计入键会让第二次运行永远命中不了；
+- 值：模型原始输出（含 ``<METADATA_SECTION>`` / ``<REWRITE_SECTION>``），命中后走同样的后处理；
+- 只缓存完整的输出：必须有 ``<REWRITE_SECTION>`` 与 ``</REWRITE_SECTION>``，且 finish_reason
+  不是输出上限（Gemini ``MAX_TOKENS`` / OpenAI ``length``）；截断或格式错误的结果下次仍会重新生成。
+
+需要有意重新生成时绕过缓存（仍会写入新结果）：``rewrite_service.py --no-cache``、
+``batch_rewrite.py --no-cache``，或 ``CHORA_REWRITE_CACHE=0``（sources.yaml ``settings.rewrite_cache``）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from config_loader import get_cache_dir
+
+CACHE_VERSION = 1
+# 撞上输出 token 上限被截断的 finish_reason（Gemini / OpenAI 兼容接口）
+TRUNCATED_FINISH_REASONS = frozenset({"MAX_TOKENS", "LENGTH"})
+
+
+def rewrite_cache_enabled(settings: dict | None) -> bool:
+    raw = os.environ.get("CHORA_REWRITE_CACHE")
+    if raw is not None and raw.strip():
+        return raw.strip().lower() not in ("0", "false", "no", "off")
+    return bool((settings or {}).get("rewrite_cache", True))
+
+
+def rewrite_cache_key(transcript: str, prompt_template: str, model: str, temperature: float) -> str:
+    digest = hashlib.sha256()
+    for part in (f"v{CACHE_VERSION}", transcript, prompt_template, model, repr(float(temperature))):
+        data = part.encode("utf-8")
+        # 带长度前缀，避免字段边界移动造成碰撞
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def is_complete_output(output: str, finish_reason: str = "") -> bool:
+    """Both REWRITE tags present and the stream was not cut off at the output limit."""
+    if (finish_reason or "").strip().upper() in TRUNCATED_FINISH_REASONS:
+        return False
+    start = output.find("<REWRITE_SECTION>")
+    return start != -1 and output.find("</REWRITE_SECTION>", start) != -1
+
+
+class RewriteCache:
+    """One JSON file per key under ``.chora_cache/rewrites``."""
+
+    def __init__(self, root: str | None = None):
+        self.root = root or get_cache_dir("rewrites")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data.get("output") or None
+
+    def put(
+        self, key: str, output: str, *, finish_reason: str = "", model: str = "", source: str = ""
+    ) -> None:
+        if not is_complete_output(output, finish_reason):
+            return
+        path = self._path(key)
+        data = {
+            "output": output,
+            "model": model,
+            "source": source,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"  ⚠️ 改写缓存写入失败: {exc}")
+
+
+_default_cache: RewriteCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_rewrite_cache() -> RewriteCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RewriteCache()
+        return _default_cache
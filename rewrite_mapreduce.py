@@ -0,0 +1,250 @@
+"""
+超长转录的分段改写（map-reduce）。
+
+三小时的播客整篇塞进一个提示词：首字要等几分钟，输出容易撞上限，流中途断开整次作废。
+转录超过 ``threshold_tokens`` 时改为：
+
+1. **切分**：有 ``transcript_segments.json`` 时在片段边界切，优先选停顿最长的位置
+   （话题转换处通常有长停顿）；否则按段落 / 句末切。每段约 ``chunk_tokens``；
+2. **map**：各段并行生成详尽笔记（话题与论点、案例与细节、原话摘录、人物），
+   每段单独重试，一段的流中断只重跑这一段；
+3. **reduce**：笔记按时间顺序拼起来代替原转录，仍用 ``config/rewrite-prompt.md`` 生成，
+   输出保持 ``<METADATA_SECTION>`` / ``<REWRITE_SECTION>`` 约定，后处理不变。
+
+总耗时约为最慢一段 + 一次短输入的 reduce，而不是随全文长度增长。
+
+配置（CHORA_* 环境变量优先于 sources.yaml ``settings``）：
+- rewrite_map_reduce（默认 true；CHORA_REWRITE_MAP_REDUCE=0 关闭）
+- rewrite_map_reduce_threshold_tokens（默认 30000；CHORA_REWRITE_MAP_REDUCE_THRESHOLD）
+- rewrite_chunk_tokens（默认 12000）
+- map 阶段并发沿用 rewrite_max_concurrency（见 ``rewrite_scheduler``）；在 ``batch_rewrite`` 里
+  与批次共用同一个 :class:`rewrite_scheduler.AdaptiveConcurrency`，分段请求同样计入在途上限
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+from llm_client import LLMEndpoint, estimate_tokens, get_llm_client
+from rewrite_scheduler import AdaptiveConcurrency, resolve_max_concurrency
+from transcription.segments import Segment, segments_text
+
+MAP_PROMPT = """你在为一篇长篇访谈 / 播客的深度改写做准备。下面是完整转录按时间顺序切分后的第 {index}/{total} 段{span}。
+请用简体中文为这一段写详尽的笔记（不要写成文章，不要省略具体细节，原文是英文也用中文记录）：
+
+## 话题与论点
+按出现顺序列出本段讨论的话题、核心论点与推理过程。
+
+## 案例与细节
+具体的故事、数据、人名、书名、例子。
+
+## 原话摘录
+3-8 句最有冲击力的原话（英文原话译为中文），每句单独一行，以 > 开头。
+
+## 人物
+本段出现的嘉宾 / 主持人及其身份线索；没有写"无"。
+
+转录片段：
+{text}
+"""
+
+REDUCE_HEADER = (
+    "（原转录约 {tokens} tokens，过长，已按时间顺序分 {total} 段提炼为笔记。"
+    "请把这些笔记视为完整原文进行改写，覆盖全部分段，嘉宾与金句从各段的「人物」「原话摘录」中选取。）"
+)
+
+_SENTENCE = re.compile(r".+?(?:[。！？!?；;…]+[」』”’\"]?|\.(?=\s)|$)\s*", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class MapReduceSettings:
+    enabled: bool = True
+    threshold_tokens: int = 30000
+    chunk_tokens: int = 12000
+    workers: int = 4
+
+
+def resolve_map_reduce_settings(settings: dict | None) -> MapReduceSettings:
+    settings = settings or {}
+    raw = os.environ.get("CHORA_REWRITE_MAP_REDUCE")
+    if raw is not None and raw.strip():
+        enabled = raw.strip().lower() not in ("0", "false", "no", "off")
+    else:
+        enabled = bool(settings.get("rewrite_map_reduce", True))
+    raw_threshold = os.environ.get("CHORA_REWRITE_MAP_REDUCE_THRESHOLD")
+    try:
+        threshold = int(raw_threshold) if raw_threshold and raw_threshold.strip() else None
+    except ValueError:
+        threshold = None
+    return MapReduceSettings(
+        enabled=enabled,
+        threshold_tokens=threshold or int(settings.get("rewrite_map_reduce_threshold_tokens", 30000)),
+        chunk_tokens=max(1000, int(settings.get("rewrite_chunk_tokens", 12000))),
+        workers=resolve_max_concurrency(settings),
+    )
+
+
+@dataclass(frozen=True)
+class TranscriptChunk:
+    text: str
+    tokens: int
+    start: float | None = None
+    end: float | None = None
+
+    def span(self) -> str:
+        if self.start is None or self.end is None:
+            return ""
+        return f"（{_clock(self.start)}–{_clock(self.end)}）"
+
+
+@dataclass(frozen=True)
+class _Unit:
+    text: str
+    tokens: int
+    # 该单元之后作为切点的合适程度：停顿秒数，或段落结尾 2 / 句末 1
+    boundary: float
+    start: float | None = None
+    end: float | None = None
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _segment_units(segments: list[Segment]) -> list[_Unit]:
+    units = []
+    for i, segment in enumerate(segments):
+        pause = segments[i + 1].start - segment.end if i + 1 < len(segments) else 0.0
+        units.append(_Unit(segment.text, estimate_tokens(segment.text), pause, segment.start, segment.end))
+    return units
+
+
+def _text_units(text: str, max_tokens: int) -> list[_Unit]:
+    units = []
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    for p_index, paragraph in enumerate(paragraphs):
+        sentences = [m.group(0) for m in _SENTENCE.finditer(paragraph) if m.group(0).strip()]
+        for s_index, sentence in enumerate(sentences):
+            last = s_index == len(sentences) - 1
+            if last and p_index < len(paragraphs) - 1:
+                sentence = sentence.rstrip() + "\n\n"
+            # 没有标点的长文本（部分 Whisper 输出）按长度硬切
+            step = max(1, len(sentence) * max_tokens // max(1, estimate_tokens(sentence)))
+            pieces = [sentence[i : i + step] for i in range(0, len(sentence), step)]
+            for k, piece in enumerate(pieces):
+                boundary = (2.0 if last else 1.0) if k == len(pieces) - 1 else 0.0
+                units.append(_Unit(piece, estimate_tokens(piece), boundary))
+    return units
+
+
+def _pack(units: list[_Unit], target: int) -> list[list[_Unit]]:
+    """Group units into ~``target``-token chunks, cutting at the best boundary within 75–125 % of it."""
+    low, high = target * 3 // 4, target * 5 // 4
+    groups: list[list[_Unit]] = []
+    start = 0
+    while start < len(units):
+        tokens, best, best_key, end = 0, start, None, len(units)
+        for i in range(start, len(units)):
+            tokens += units[i].tokens
+            # 切点优先级：边界更好，其次更接近目标大小
+            key = (units[i].boundary, -abs(tokens - target))
+            if tokens >= low and (best_key is None or key > best_key):
+                best, best_key = i, key
+            if tokens >= high:
+                end = best + 1
+                break
+        groups.append(units[start:end])
+        start = end
+    # 过短的尾段并入前一段
+    if len(groups) > 1 and sum(u.tokens for u in groups[-1]) < target // 4:
+        groups[-2].extend(groups.pop())
+    return groups
+
+
+def split_transcript(text: str, segments: list[Segment] | None, chunk_tokens: int) -> list[TranscriptChunk]:
+    """Chunks of ~``chunk_tokens`` at pauses (timed segments) or paragraph / sentence ends."""
+    # 只有片段与 transcript.md 对得上（未被手工改过）才按时间码切
+    if segments and abs(len(segments_text(segments)) - len(text.strip())) <= 0.2 * len(text.strip()):
+        units = _segment_units(segments)
+    else:
+        units = _text_units(text, chunk_tokens // 4)
+    chunks = []
+    for group in _pack(units, chunk_tokens):
+        body = "".join(unit.text for unit in group).strip()
+        chunks.append(
+            TranscriptChunk(body, sum(unit.tokens for unit in group), group[0].start, group[-1].end)
+        )
+    return chunks
+
+
+def _map_in_slots(
+    fn: Callable[[int], str], count: int, workers: int, slots: AdaptiveConcurrency
+) -> list[str]:
+    """``fn`` over ``range(count)``: one at a time in the caller's slot, plus extra slots borrowed from ``slots``."""
+
+    def borrowed(index: int) -> str:
+        try:
+            return fn(index)
+        finally:
+            slots.release()
+
+    results = [""] * count
+    pending = deque(range(count))
+    running: dict = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers - 1), thread_name_prefix="map") as pool:
+        while pending or running:
+            # 批次里有空闲槽才多开一路，不会越过共享的在途上限
+            while pending and len(running) < workers - 1 and slots.try_acquire():
+                index = pending.popleft()
+                running[pool.submit(borrowed, index)] = index
+            if pending:
+                index = pending.popleft()
+                results[index] = fn(index)
+            else:
+                wait(running, return_when=FIRST_COMPLETED)
+            for future in [f for f in running if f.done()]:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def summarize_chunks(
+    endpoint: LLMEndpoint,
+    chunks: list[TranscriptChunk],
+    *,
+    workers: int,
+    slots: AdaptiveConcurrency | None = None,
+) -> list[str]:
+    """Map pass: detailed notes per chunk, in parallel; raises :class:`llm_client.LLMError`.
+
+    ``slots`` is the batch scheduler's controller when called from inside one of its slots:
+    the map requests then share its in-flight limit instead of opening ``workers`` more streams.
+    """
+    client = get_llm_client()
+
+    def summarize(index: int) -> str:
+        chunk = chunks[index]
+        prompt = MAP_PROMPT.format(index=index + 1, total=len(chunks), span=chunk.span(), text=chunk.text)
+        result = client.generate(
+            endpoint, prompt, stream=True, temperature=0.3, max_tokens=8192, timeout=180, max_attempts=5
+        )
+        print(f"  🧩 分段 {index + 1}/{len(chunks)} 完成 ({result.summary()})")
+        return result.text
+
+    if slots is not None:
+        return _map_in_slots(summarize, len(chunks), max(1, workers), slots)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        return list(pool.map(summarize, range(len(chunks))))
+
+
+def reduce_input(chunks: list[TranscriptChunk], notes: list[str], transcript_tokens: int) -> str:
+    """Notes in time order, standing in for the transcript in the rewrite prompt."""
+    sections = [REDUCE_HEADER.format(tokens=transcript_tokens, total=len(chunks))]
+    for index, (chunk, note) in enumerate(zip(chunks, notes), 1):
+        sections.append(f"### 第 {index}/{len(chunks)} 段{chunk.span()}\n\n{note.strip()}")
+    return "\n\n".join(sections)
@@ -0,0 +1,206 @@
+"""
+批量改写的并发调度：AIMD 自适应并发 + 按预估 token 成本排序。
+
+``batch_rewrite.py`` 原来逐条串行改写，批次之间固定 ``sleep``。现在：
+
+- :class:`AdaptiveConcurrency` 维护同时在途的改写请求上限 N（TCP 拥塞控制式 AIMD）：
+  请求成功且首字延迟正常时加性增长（每个窗口约 +1）；429 / 5xx / 连接失败时减半，
+  首字延迟超过基线 ``latency_factor`` 倍时按 ``latency_decrease`` 小幅回落。
+  首字延迟随提示词长度增长，基线按预估提示词 token 数分档（每档翻倍），只和同档请求比较，
+  长稿和短稿混跑时长稿的正常延迟不会被当成拥塞。
+  同一冷却期内的多次失败只减一次（同一波请求一起撞上限流不会把 N 压到底）。
+  信号来自共享 :mod:`llm_client` 的 ``add_listener``，即服务端真实反馈；
+- :func:`run_queue` 按预估 token 成本从大到小派发（最长的先跑，收尾不被一条长稿拖住），
+  但长稿最多占一半并发槽，短稿始终有位置，不会被长稿饿死；
+- 任务完成的回调（写分发包等）在调用线程里串行执行，不占 LLM 并发槽。
+
+配置（CHORA_* 环境变量优先于 sources.yaml ``settings``）：
+- rewrite_max_concurrency（默认 4；CHORA_REWRITE_CONCURRENCY）
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from llm_client import estimate_tokens
+
+DEFAULT_MAX_CONCURRENCY = 4
+# 改写提示词与 metadata 的固定开销（token）
+PROMPT_OVERHEAD_TOKENS = 3000
+# 延迟基线分档：< 2k tokens 为第 0 档，之后每翻一倍一档
+LATENCY_BUCKET_TOKENS = 2000
+
+
+def resolve_max_concurrency(settings: dict | None) -> int:
+    raw = os.environ.get("CHORA_REWRITE_CONCURRENCY")
+    try:
+        if raw is not None and raw.strip():
+            return max(1, int(raw))
+        return max(1, int((settings or {}).get("rewrite_max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_MAX_CONCURRENCY
+
+
+def latency_bucket(prompt_tokens: int) -> int:
+    """Prompt-size class for latency baselines: 0 below 2k tokens, +1 per doubling."""
+    if prompt_tokens < LATENCY_BUCKET_TOKENS:
+        return 0
+    return 1 + int(math.log2(prompt_tokens / LATENCY_BUCKET_TOKENS))
+
+
+def estimate_file_tokens(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return estimate_tokens(f.read()) + PROMPT_OVERHEAD_TOKENS
+    except OSError:
+        return PROMPT_OVERHEAD_TOKENS
+
+
+class AdaptiveConcurrency:
+    """AIMD in-flight limit driven by :class:`llm_client.LLMCallEvent` feedback."""
+
+    def __init__(
+        self,
+        max_limit: int,
+        *,
+        initial: int = 2,
+        min_limit: int = 1,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        latency_decrease: float = 0.75,
+        cooldown: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_decrease = latency_decrease
+        self.cooldown = cooldown
+        self.clock = clock
+        self._limit = float(min(max(initial, min_limit), self.max_limit))
+        self._in_flight = 0
+        # 每个提示词长度档位一条首字延迟基线（EWMA）
+        self._baselines: dict[int, float] = {}
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def observe(self, event) -> None:
+        """Listener for :meth:`llm_client.LLMClient.add_listener`."""
+        if event.status is None or event.status == 429 or event.status >= 500:
+            self._back_off(self.decrease, f"HTTP {event.status or 'connection error'}")
+        elif event.ok:
+            latency = event.first_token_latency if event.first_token_latency is not None else event.latency
+            self._on_success(latency, event.prompt_tokens)
+
+    def _on_success(self, latency: float, prompt_tokens: int = 0) -> None:
+        bucket = latency_bucket(prompt_tokens)
+        with self._lock:
+            baseline = self._baselines.get(bucket)
+            congested = baseline is not None and latency > baseline * self.latency_factor
+            if not congested:
+                self._baselines[bucket] = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                return
+        self._back_off(self.latency_decrease, f"latency {latency:.1f}s > {self.latency_factor:g}x baseline")
+
+    def _back_off(self, factor: float, reason: str) -> None:
+        with self._lock:
+            now = self.clock()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            old = int(self._limit)
+            self._limit = max(float(self.min_limit), self._limit * factor)
+            new = int(self._limit)
+        if new != old:
+            print(f"  ⚠️ 改写并发 {old} → {new}（{reason}）")
+
+
+@dataclass(frozen=True)
+class QueueItem:
+    key: str
+    tokens: int
+    payload: dict
+
+
+def _next_item(
+    pending: list[QueueItem], running_large: int, limit: int, large_tokens: int
+) -> QueueItem | None:
+    """Costliest pending item, skipping large ones once they hold half of the slots."""
+    large_cap = max(1, limit // 2)
+    for index, item in enumerate(pending):
+        if item.tokens <= large_tokens or running_large < large_cap:
+            return pending.pop(index)
+    return None
+
+
+def run_queue(
+    items: list[QueueItem],
+    work: Callable[[QueueItem], bool],
+    controller: AdaptiveConcurrency,
+    *,
+    large_tokens: int,
+    on_done: Callable[[QueueItem, bool], None] | None = None,
+) -> dict[str, bool]:
+    """Run ``work`` over ``items`` with at most ``controller.limit`` in flight; returns key → success."""
+    pending = sorted(items, key=lambda item: item.tokens, reverse=True)
+    done: queue.Queue = queue.Queue()
+    results: dict[str, bool] = {}
+    running = 0
+    running_large = 0
+
+    def run(item: QueueItem) -> None:
+        try:
+            ok = bool(work(item))
+        except Exception as e:
+            print(f"❌ 错误 ({item.key}): {e}")
+            ok = False
+        done.put((item, ok))
+
+    with ThreadPoolExecutor(max_workers=controller.max_limit, thread_name_prefix="rewrite") as pool:
+        while pending or running:
+            while pending and controller.try_acquire():
+                item = _next_item(pending, running_large, controller.limit, large_tokens)
+                if item is None:
+                    controller.release()
+                    break
+                running += 1
+                running_large += item.tokens > large_tokens
+                pool.submit(run, item)
+            item, ok = done.get()
+            controller.release()
+            running -= 1
+            running_large -= item.tokens > large_tokens
+            results[item.key] = ok
+            if on_done:
+                on_done(item, ok)
+    return results
@@ -1,14 +1,16 @@
-import json
 import os
 import re
 import sys
-import time
-
-import requests
 
 from config_loader import load_sources_config
+from llm_client import LLMEndpoint, LLMError, estimate_tokens, get_llm_client
+from rewrite_cache import get_rewrite_cache, rewrite_cache_enabled, rewrite_cache_key
+from rewrite_mapreduce import reduce_input, resolve_map_reduce_settings, split_transcript, summarize_chunks
+from transcription.segments import load_segments, segments_path_for
 from utils.word_count import update_rewritten_file
 
+REWRITE_TEMPERATURE = 0.7
+
 
 def load_config():
     return load_sources_config("config/sources.yaml")
@@ -56,9 +58,76 @@ def detect_language(text):
     return "english" if ratio > 0.8 else "chinese"
 
 
-def rewrite_content(transcript_path, metadata_path, output_path):
+def _generate_rewrite(
+    endpoint,
+    config,
+    transcript_path,
+    transcript,
+    prompt_template,
+    translation_instruction,
+    metadata_context,
+    slots=None,
+):
+    """:class:`llm_client.LLMResult` with the raw METADATA / REWRITE output, or None when the LLM call failed."""
+    # 超长转录：分段并行提炼笔记，再用笔记代替原文改写（见 rewrite_mapreduce）
+    map_reduce = resolve_map_reduce_settings(config.get("settings"))
+    transcript_tokens = estimate_tokens(transcript)
+    if map_reduce.enabled and transcript_tokens > map_reduce.threshold_tokens:
+        segments = load_segments(segments_path_for(os.path.dirname(transcript_path)))
+        chunks = split_transcript(transcript, segments, map_reduce.chunk_tokens)
+        print(
+            f"📚 长转录 (~{transcript_tokens} tokens)，分 {len(chunks)} 段并行提炼后合并改写 "
+            f"(并发 {min(map_reduce.workers, len(chunks))})"
+        )
+        try:
+            notes = summarize_chunks(endpoint, chunks, workers=map_reduce.workers, slots=slots)
+        except LLMError as e:
+            print(f"❌ 分段提炼失败: {e}")
+            return None
+        transcript = reduce_input(chunks, notes, transcript_tokens)
+
+    # Construct prompt for Gemini
+    full_prompt = f"""
+    {prompt_template}
+    {translation_instruction}
+
+    ---
+
+    TRANSCRIPT:
+    {transcript}
+    {metadata_context}
+
+    ---
+    """
+
+    print(f"Sending streaming request to {endpoint.model}...")
+    print(f"URL: {endpoint.url}")
+    print("Receiving stream...")
+    try:
+        result = get_llm_client().generate(
+            endpoint,
+            full_prompt,
+            stream=True,
+            temperature=REWRITE_TEMPERATURE,
+            top_p=0.95,
+            max_tokens=65536,
+            timeout=180,
+            max_attempts=5,
+            on_text=lambda _: print(".", end="", flush=True),
+        )
+    except LLMError as e:
+        print(f"\n❌ LLM request failed: {e}")
+        return None
+    print(f"\nStream complete ({result.summary()}).")
+    return result
+
+
+def rewrite_content(transcript_path, metadata_path, output_path, use_cache=True, slots=None):
+    """Rewrite a transcript; ``use_cache=False`` regenerates even when a cached result exists.
+
+    ``slots`` is the calling batch's :class:`rewrite_scheduler.AdaptiveConcurrency` (map-reduce shares it).
+    """
     print(f"Starting rewrite for {transcript_path}...")
-    rewritten_content = ""
 
     if not os.path.exists(transcript_path):
         print(f"Error: Transcript file not found: {transcript_path}")
@@ -91,168 +160,40 @@ def rewrite_content(transcript_path, metadata_path, output_path):
     if os.path.exists(metadata_path):
         metadata_context = f"\n\nMetadata:\n{read_file(metadata_path)}"
 
-    # Construct prompt for Gemini
-    full_prompt = f"""
-    {prompt_template}
-    {translation_instruction}
-
-    ---
-
-    TRANSCRIPT:
-    {transcript}
-    {metadata_context}
-
-    ---
-    """
+    endpoint = LLMEndpoint.from_config(config["api_keys"]["llm"])
 
-    llm_config = config["api_keys"]["llm"]
-    provider = llm_config.get("provider", "third_party")
-    base_url = llm_config["base_url"]
-
-    # 智能识别: base_url 已含 /chat/completions → 自动按 OpenAI 兼容处理,
-    # 即使 provider=sources.yaml 仍标 "third_party" 也能跑通 (修复实测暴露的 404 bug)
-    is_openai_compatible = provider == "openai_compatible" or "/chat/completions" in base_url
-
-    if is_openai_compatible:
-        url = base_url
-        payload = {
-            "model": llm_config["model"],
-            "messages": [{"role": "user", "content": full_prompt}],
-            "temperature": 0.7,
-            "top_p": 0.95,
-            "max_tokens": 65536,
-            "stream": True,
-        }
-    else:
-        if ":generateContent" in base_url:
-            url = base_url.replace(":generateContent", ":streamGenerateContent?alt=sse")
-        else:
-            url = base_url.rstrip("/") + ":streamGenerateContent?alt=sse"
-
-        payload = {
-            "contents": [{"role": "user", "parts": [{"text": full_prompt}]}],
-            "generationConfig": {
-                "temperature": 0.7,
-                "topP": 0.95,
-                "maxOutputTokens": 65536,
-            },
-        }
-
-    max_retries = 5
-    retry_delay = 5
+    cache_key = None
+    rewritten_content = None
+    if rewrite_cache_enabled(config.get("settings")):
+        cache_key = rewrite_cache_key(transcript, prompt_template, endpoint.model, REWRITE_TEMPERATURE)
+        if use_cache:
+            rewritten_content = get_rewrite_cache().get(cache_key)
+            if rewritten_content:
+                print(f"♻️ 命中改写缓存 ({cache_key[:12]})，跳过 LLM 调用")
 
     try:
-        for attempt in range(max_retries):
-            try:
-                print(
-                    f"Sending streaming request to {llm_config['model']} (Attempt {attempt + 1}/{max_retries})..."
-                )
-                print(f"URL: {url}")
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {llm_config['api_key']}",
-                }
-
-                response = requests.post(url, json=payload, headers=headers, timeout=180, stream=True)
-
-                print(f"Response received with status: {response.status_code}")
-
-                if response.status_code == 429:
-                    wait_time = retry_delay * (2**attempt)
-                    print(f"  ⚠️ Rate limit hit (429). Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-
-                if response.status_code != 200:
-                    print(f"Error: API returned status {response.status_code}")
-                    print(f"Response: {response.text[:500]}")
-                    # For other errors, maybe retry too if it might be transient
-                    if response.status_code in [500, 502, 503, 504]:
-                        wait_time = retry_delay * (2**attempt)
-                        print(f"  ⚠️ Server error ({response.status_code}). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    return False
-
-                # Extract text from streaming response
-                rewritten_content = ""
-                print("Receiving stream...")
-
-                try:
-                    for line in response.iter_lines():
-                        if line:
-                            decoded_line = line.decode("utf-8")
-                            if decoded_line.startswith("data: "):
-                                json_str = decoded_line[6:]
-                                if json_str.strip() == "[DONE]":
-                                    break
-                                try:
-                                    chunk = json.loads(json_str)
-                                    if provider == "openai_compatible":
-                                        if "choices" in chunk and chunk["choices"]:
-                                            delta = chunk["choices"][0].get("delta", {})
-                                            text_chunk = delta.get("content", "")
-                                            if text_chunk:
-                                                rewritten_content += text_chunk
-                                                print(".", end="", flush=True)
-                                    else:
-                                        if "candidates" in chunk and chunk["candidates"]:
-                                            candidate = chunk["candidates"][0]
-                                            if "content" in candidate and "parts" in candidate["content"]:
-                                                for part in candidate["content"]["parts"]:
-                                                    if part.get("thought", False):
-                                                        continue
-                                                    if "text" in part:
-                                                        text_chunk = part["text"]
-                                                        rewritten_content += text_chunk
-                                                        print(".", end="", flush=True)
-                                except json.JSONDecodeError:
-                                    pass
-
-                    print("\nStream complete.")
-
-                    if not rewritten_content:
-                        print(f"  ⚠️ Received empty response from Gemini on attempt {attempt + 1}.")
-                        if attempt < max_retries - 1:
-                            wait_time = retry_delay * (2**attempt)
-                            print(f"  Retrying in {wait_time}s...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            print("Error: No content generated after max retries.")
-                            return False
-
-                    # If we got meaningful content, break the retry loop
-                    break
-
-                except (
-                    requests.exceptions.ChunkedEncodingError,
-                    requests.exceptions.ConnectionError,
-                ) as conn_e:
-                    print(f"\n  ⚠️ Connection issue during stream: {conn_e}")
-                    if attempt < max_retries - 1:
-                        wait_time = retry_delay * (2**attempt)
-                        print(f"  Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print("Error: Connection issue persisted after max retries.")
-                        return False
-
-            except requests.exceptions.RequestException as req_e:
-                print(f"  ❌ API Request Error: {req_e}")
-                if attempt < max_retries - 1:
-                    wait_time = retry_delay * (2**attempt)
-                    print(f"  Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return False
-
-        # Check if we broke out of loop with content
         if not rewritten_content:
-            return False
+            result = _generate_rewrite(
+                endpoint,
+                config,
+                transcript_path,
+                transcript,
+                prompt_template,
+                translation_instruction,
+                metadata_context,
+                slots=slots,
+            )
+            if result is None:
+                return False
+            rewritten_content = result.text
+            if cache_key:
+                get_rewrite_cache().put(
+                    cache_key,
+                    rewritten_content,
+                    finish_reason=result.finish_reason,
+                    model=endpoint.model,
+                    source=transcript_path,
+                )
 
         # Content completeness validation
         required_sections = ["核心洞察", "哲思结语"]
@@ -405,8 +346,9 @@ def rewrite_content(transcript_path, metadata_path, output_path):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python rewrite_service.py <transcript_path> <metadata_path> <output_path>")
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    if len(args) < 3:
+        print("Usage: python rewrite_service.py <transcript_path> <metadata_path> <output_path> [--no-cache]")
         sys.exit(1)
 
-    rewrite_content(sys.argv[1], sys.argv[2], sys.argv[3])
+    rewrite_content(args[0], args[1], args[2], use_cache="--no-cache" not in sys.argv)
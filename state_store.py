@@ -0,0 +1,433 @@
+"""
+内容处理台账（SQLite WAL），取代 ``config/state.yaml`` 的 ``processed_ids`` 列表。
+
+每个内容 ID 在 ``config/state.db`` 中有一行条目信息，以及按阶段记录的状态：
+
+    fetched → transcribed → rewritten → covered → distributed → synced
+
+- 查询是主键索引查找，不再每次扫描整个列表；
+- 每个阶段完成/失败时立即单行 upsert，不再整文件重写 YAML；
+- WAL 模式 + ``busy_timeout``，并发扫描线程与同时运行的多个入口脚本可以安全读写；
+- 入口脚本可用 :meth:`StateStore.next_stage` 找到某条内容停在哪一步，从那里继续。
+
+同一数据库还保存各订阅的增量扫描游标（表 ``scan_cursors``，见 :mod:`ingestion.cursor`）
+与发布历史（表 ``publish_history``，``fetch_feed.py --watch`` 据此估计更新频率），
+以及音频指纹倒排索引（表 ``audio_fingerprints``，见 :mod:`transcription.fingerprint`）。
+
+首次打开时会把 ``config/state.yaml`` 中的 ``processed_ids`` 一次性导入（只导入一次，
+YAML 文件保留不动）。
+
+命令行::
+
+    python3 state_store.py status <content_id>   # 查看某条内容的各阶段状态
+    python3 state_store.py pending               # 列出尚未走完流程的内容
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import yaml
+
+STATE_DB_PATH = "config/state.db"
+LEGACY_STATE_PATH = "config/state.yaml"
+
+STAGES = ("fetched", "transcribed", "rewritten", "covered", "distributed", "synced")
+# rewritten 完成即视为「已处理」：封面/分发/同步失败按 Log & Continue 由各自脚本补做
+PROCESSED_STAGE = "rewritten"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    content_id   TEXT PRIMARY KEY,
+    platform     TEXT NOT NULL DEFAULT '',
+    title        TEXT NOT NULL DEFAULT '',
+    url          TEXT NOT NULL DEFAULT '',
+    folder       TEXT NOT NULL DEFAULT '',
+    processed_at TEXT,
+    created_at   TEXT NOT NULL,
+    updated_at   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    content_id TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    detail     TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (content_id, stage)
+);
+CREATE TABLE IF NOT EXISTS scan_cursors (
+    subscription TEXT PRIMARY KEY,
+    cursor       TEXT NOT NULL,
+    updated_at   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS publish_history (
+    subscription  TEXT NOT NULL,
+    content_id    TEXT NOT NULL,
+    published     TEXT NOT NULL,
+    first_seen_at TEXT NOT NULL,
+    PRIMARY KEY (subscription, content_id)
+);
+CREATE TABLE IF NOT EXISTS audio_fingerprints (
+    hash       INTEGER NOT NULL,
+    content_id TEXT NOT NULL,
+    frame      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audio_fingerprints_hash ON audio_fingerprints (hash);
+CREATE INDEX IF NOT EXISTS audio_fingerprints_content ON audio_fingerprints (content_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class StageRecord:
+    stage: str
+    status: str
+    detail: str
+    updated_at: str
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def open_connection(path: str) -> sqlite3.Connection:
+    """SQLite connection in WAL mode with a generous busy timeout (one per thread)."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class StateStore:
+    """Per-item, per-stage processing ledger backed by SQLite in WAL mode."""
+
+    def __init__(self, path: str = STATE_DB_PATH, legacy_path: str | None = LEGACY_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        if legacy_path:
+            self._import_legacy(legacy_path)
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程共用：每个线程各开一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_connection(self.path)
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_yaml_imported'").fetchone():
+            return
+        ids: list[str] = []
+        if os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    ids = [str(i) for i in ((yaml.safe_load(f) or {}).get("processed_ids") or [])]
+            except (OSError, yaml.YAMLError) as exc:
+                print(f"⚠️ 读取 {legacy_path} 失败，跳过导入: {exc}")
+                return
+        now = _now()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO items (content_id, processed_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(content_id) DO UPDATE SET processed_at = COALESCE(processed_at, excluded.processed_at)
+                """,
+                [(content_id, now, now, now) for content_id in ids],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_yaml_imported', ?)",
+                (f"{now} ({len(ids)} ids)",),
+            )
+        if ids:
+            print(f"✅ 已从 {legacy_path} 导入 {len(ids)} 个已处理 ID")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record_item(
+        self,
+        content_id: str,
+        *,
+        platform: str = "",
+        title: str = "",
+        url: str = "",
+        folder: str = "",
+    ) -> None:
+        """Create or update an item row; empty fields never overwrite known values."""
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO items (content_id, platform, title, url, folder, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_id) DO UPDATE SET
+                    platform = CASE WHEN excluded.platform != '' THEN excluded.platform ELSE platform END,
+                    title = CASE WHEN excluded.title != '' THEN excluded.title ELSE title END,
+                    url = CASE WHEN excluded.url != '' THEN excluded.url ELSE url END,
+                    folder = CASE WHEN excluded.folder != '' THEN excluded.folder ELSE folder END,
+                    updated_at = excluded.updated_at
+                """,
+                (content_id, platform, title, url, folder, now, now),
+            )
+
+    def mark_stage(self, content_id: str, stage: str, status: str = STATUS_DONE, detail: str = "") -> None:
+        """Record the outcome of one stage; ``rewritten``/done also marks the item processed."""
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage: {stage}")
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO items (content_id, created_at, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(content_id) DO UPDATE SET updated_at = excluded.updated_at
+                """,
+                (content_id, now, now),
+            )
+            conn.execute(
+                """
+                INSERT INTO stages (content_id, stage, status, detail, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(content_id, stage) DO UPDATE SET
+                    status = excluded.status, detail = excluded.detail, updated_at = excluded.updated_at
+                """,
+                (content_id, stage, status, detail[:500], now),
+            )
+            if stage == PROCESSED_STAGE and status == STATUS_DONE:
+                conn.execute(
+                    "UPDATE items SET processed_at = COALESCE(processed_at, ?) WHERE content_id = ?",
+                    (now, content_id),
+                )
+
+    def mark_processed(self, content_id: str, *, folder: str = "") -> None:
+        """Mark an item processed without stage detail (e.g. its archive folder already exists)."""
+        self.record_item(content_id, folder=folder)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET processed_at = COALESCE(processed_at, ?) WHERE content_id = ?",
+                (_now(), content_id),
+            )
+
+    def save_cursor(self, subscription: str, cursor: dict) -> None:
+        """Store a subscription's incremental-scan cursor (see :mod:`ingestion.cursor`)."""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO scan_cursors (subscription, cursor, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(subscription) DO UPDATE SET cursor = excluded.cursor, updated_at = excluded.updated_at
+                """,
+                (subscription, json.dumps(cursor, ensure_ascii=False), _now()),
+            )
+
+    def record_publishes(self, subscription: str, entries: list[tuple[str, str]]) -> None:
+        """Remember ``(content_id, published)`` pairs seen on a subscription (for watch-mode cadence)."""
+        now = _now()
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO publish_history (subscription, content_id, published, first_seen_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (subscription, content_id, published, now)
+                    for content_id, published in entries
+                    if published
+                ],
+            )
+
+    def save_fingerprint(self, content_id: str, landmarks: list[tuple[int, int]]) -> None:
+        """Replace an item's ``(hash, frame)`` audio landmarks (see :mod:`transcription.fingerprint`)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM audio_fingerprints WHERE content_id = ?", (content_id,))
+            conn.executemany(
+                "INSERT INTO audio_fingerprints (hash, content_id, frame) VALUES (?, ?, ?)",
+                [(hash_, content_id, frame) for hash_, frame in landmarks],
+            )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def fingerprint_hits(self, hashes: list[int], batch_size: int = 500) -> list[tuple[int, str, int]]:
+        """``(hash, content_id, frame)`` rows of other items sharing any of ``hashes``."""
+        unique = sorted(set(hashes))
+        hits = []
+        conn = self._connect()
+        for i in range(0, len(unique), batch_size):
+            batch = unique[i : i + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            hits.extend(
+                conn.execute(
+                    f"SELECT hash, content_id, frame FROM audio_fingerprints WHERE hash IN ({placeholders})",
+                    batch,
+                )
+            )
+        return hits
+
+    def publish_dates(self, subscription: str, limit: int = 20) -> list[str]:
+        """Most recent publish dates (``YYYY-MM-DD``) of a subscription, newest first."""
+        rows = self._connect().execute(
+            "SELECT published FROM publish_history WHERE subscription = ? ORDER BY published DESC LIMIT ?",
+            (subscription, limit),
+        )
+        return [row[0] for row in rows]
+
+    def load_cursor(self, subscription: str) -> dict | None:
+        row = (
+            self._connect()
+            .execute("SELECT cursor FROM scan_cursors WHERE subscription = ?", (subscription,))
+            .fetchone()
+        )
+        if not row:
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+
+    def is_processed(self, content_id: str) -> bool:
+        row = (
+            self._connect()
+            .execute("SELECT processed_at FROM items WHERE content_id = ?", (content_id,))
+            .fetchone()
+        )
+        return bool(row and row[0])
+
+    def processed_ids(self) -> set[str]:
+        rows = self._connect().execute("SELECT content_id FROM items WHERE processed_at IS NOT NULL")
+        return {row[0] for row in rows}
+
+    def stages(self, content_id: str) -> dict[str, StageRecord]:
+        rows = self._connect().execute(
+            "SELECT stage, status, detail, updated_at FROM stages WHERE content_id = ?", (content_id,)
+        )
+        return {row[0]: StageRecord(*row) for row in rows}
+
+    def stage_status(self, content_id: str, stage: str) -> str | None:
+        record = self.stages(content_id).get(stage)
+        return record.status if record else None
+
+    def is_stage_done(self, content_id: str, stage: str) -> bool:
+        return self.stage_status(content_id, stage) in (STATUS_DONE, STATUS_SKIPPED)
+
+    def next_stage(self, content_id: str) -> str | None:
+        """First stage not yet done/skipped, or None when the item went all the way through."""
+        records = self.stages(content_id)
+        for stage in STAGES:
+            record = records.get(stage)
+            if not record or record.status not in (STATUS_DONE, STATUS_SKIPPED):
+                return stage
+        return None
+
+    def item(self, content_id: str) -> dict | None:
+        conn = self._connect()
+        cursor = conn.execute("SELECT * FROM items WHERE content_id = ?", (content_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return dict(zip([col[0] for col in cursor.description], row))
+
+    def pending_items(self) -> list[tuple[str, str]]:
+        """``(content_id, next_stage)`` for items with at least one stage recorded but not finished."""
+        rows = self._connect().execute("SELECT DISTINCT content_id FROM stages ORDER BY content_id")
+        pending = []
+        for (content_id,) in rows.fetchall():
+            stage = self.next_stage(content_id)
+            if stage:
+                pending.append((content_id, stage))
+        return pending
+
+
+_default_store: StateStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> StateStore:
+    """Process-wide ledger at ``config/state.db`` (imports ``state.yaml`` on first use)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = StateStore()
+        return _default_store
+
+
+def record_item(content_id: str, **fields: str) -> None:
+    """Best-effort :meth:`StateStore.record_item` for entry scripts."""
+    if not content_id:
+        return
+    try:
+        get_default_store().record_item(content_id, **fields)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"⚠️ 状态台账写入失败 ({content_id}): {exc}")
+
+
+def record_stage(content_id: str, stage: str, status: str = STATUS_DONE, detail: str = "") -> None:
+    """Best-effort ledger write for entry scripts: a ledger error never aborts the pipeline."""
+    if not content_id:
+        return
+    try:
+        get_default_store().mark_stage(content_id, stage, status, detail)
+    except (sqlite3.Error, OSError, ValueError) as exc:
+        print(f"⚠️ 状态台账写入失败 ({content_id}/{stage}): {exc}")
+
+
+def main(argv: list[str]) -> int:
+    store = get_default_store()
+    if len(argv) >= 2 and argv[0] == "status":
+        item = store.item(argv[1])
+        if not item:
+            print(f"❌ 未找到: {argv[1]}")
+            return 1
+        print(f"{item['content_id']} {item['title']}".strip())
+        print(f"  processed_at: {item['processed_at'] or '-'}")
+        records = store.stages(argv[1])
+        for stage in STAGES:
+            record = records.get(stage)
+            if record:
+                detail = f" ({record.detail})" if record.detail else ""
+                print(f"  {stage:<12} {record.status:<8} {record.updated_at}{detail}")
+            else:
+                print(f"  {stage:<12} -")
+        return 0
+    if argv and argv[0] == "pending":
+        pending = store.pending_items()
+        for content_id, stage in pending:
+            print(f"{content_id}\t→ {stage}")
+        print(f"共 {len(pending)} 条未完成")
+        return 0
+    print("Usage: python3 state_store.py status <content_id> | pending")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
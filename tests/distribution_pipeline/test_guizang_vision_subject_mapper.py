@@ -1,7 +1,7 @@
 """vision_subject_mapper 测试（env 关时跳过真实 API）。"""
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
@@ -21,6 +21,7 @@ from distribution_pipeline.renderers.guizang.vision_subject_mapper import (
     vision_max_per_package,
     vision_timeout,
 )
+from llm_client import LLMError, LLMResult
 
 # -----------------------------------------------------------------------------
 # 1. env 开关
@@ -324,13 +325,9 @@ def test_build_vision_subject_map_calls_gemini_and_normalizes(tmp_path, monkeypa
         ]
     }
 
-    mock_resp = MagicMock()
-    mock_resp.status_code = 200
-    mock_resp.json.return_value = fake_response
-
     with patch(
         "distribution_pipeline.renderers.guizang.vision_subject_mapper._post_gemini_request",
-        return_value=mock_resp,
+        return_value=LLMResult(fake_response["candidates"][0]["content"]["parts"][0]["text"]),
     ):
         smap = build_vision_subject_map(img, cache_dir=tmp_path)
 
@@ -352,12 +349,9 @@ def test_build_vision_subject_map_returns_none_on_api_error(tmp_path, monkeypatc
     img = tmp_path / "x.png"
     img.write_bytes(b"\x89PNG\r\n\x1a\n")
 
-    mock_resp = MagicMock()
-    mock_resp.status_code = 429
-    mock_resp.text = "rate limited"
     with patch(
         "distribution_pipeline.renderers.guizang.vision_subject_mapper._post_gemini_request",
-        return_value=mock_resp,
+        side_effect=LLMError("HTTP 429", 429),
     ):
         assert build_vision_subject_map(img, cache_dir=tmp_path) is None
 
@@ -367,12 +361,9 @@ def test_build_vision_subject_map_returns_none_on_invalid_json(tmp_path, monkeyp
     img = tmp_path / "x.png"
     img.write_bytes(b"\x89PNG\r\n\x1a\n")
 
-    mock_resp = MagicMock()
-    mock_resp.status_code = 200
-    mock_resp.json.return_value = {"candidates": [{"content": {"parts": [{"text": "not json"}]}}]}
     with patch(
         "distribution_pipeline.renderers.guizang.vision_subject_mapper._post_gemini_request",
-        return_value=mock_resp,
+        return_value=LLMResult("not json"),
     ):
         assert build_vision_subject_map(img, cache_dir=tmp_path) is None
 
@@ -403,10 +394,7 @@ def test_call_vision_for_pages_respects_quota(tmp_path, monkeypatch):
         "distribution_pipeline.renderers.guizang.vision_subject_mapper._post_gemini_request"
     ) as mock_post:
         # 模拟 vision 失败（返回 None）
-        mock_resp = MagicMock()
-        mock_resp.status_code = 500
-        mock_resp.text = "fail"
-        mock_post.return_value = mock_resp
+        mock_post.side_effect = LLMError("HTTP 500", 500)
         results = call_vision_for_pages(images, tmp_path, max_per_package=2)
     # 后 3 张直接 None（不调）
     assert results[0][1] is None  # 第 1 张：调了但失败
@@ -0,0 +1,23 @@
+from ingestion.captions import NEGATIVE_TTL_SECONDS, CachedCaptions, CaptionCache
+from transcription.segments import Segment
+
+
+def test_cache_roundtrip_keeps_selected_language(tmp_path):
+    cache = CaptionCache(str(tmp_path))
+    segments = [Segment(0, 1.5, "你好"), Segment(1.5, 3, "世界")]
+
+    assert cache.get("abc") is None
+    cache.put("abc", segments, "zh-Hans")
+
+    assert CaptionCache(str(tmp_path)).get("abc") == CachedCaptions(segments, "zh-Hans")
+
+
+def test_no_captions_result_expires(tmp_path):
+    now = [1000.0]
+    cache = CaptionCache(str(tmp_path), clock=lambda: now[0])
+
+    cache.put("abc", None, None)
+    assert cache.get("abc") == CachedCaptions(None, None)
+
+    now[0] += NEGATIVE_TTL_SECONDS + 1
+    assert cache.get("abc") is None
@@ -0,0 +1,93 @@
+from ingestion.cursor import CursorTracker, ScanCursor, filters_fingerprint
+from ingestion.feed_parser import FeedEntry
+
+
+def _entry(eid, published):
+    return FeedEntry("youtube", eid, eid, published, f"https://www.youtube.com/watch?v={eid}")
+
+
+def _scan(tracker, entries, held=()):
+    """Drive the tracker the way the fetchers do; return the IDs that were examined."""
+    examined = []
+    for entry in entries:
+        if tracker.is_below(entry):
+            break
+        if tracker.is_seen(entry):
+            continue
+        tracker.examine(entry)
+        examined.append(entry.id)
+        if entry.id in held:
+            tracker.hold(entry.id)
+    return examined
+
+
+def test_first_scan_sets_cursor_to_newest_settled_day():
+    tracker = CursorTracker(None, "f")
+    _scan(tracker, [_entry("a", "2026-10-15"), _entry("b", "2026-10-15"), _entry("c", "2026-10-10")])
+
+    assert tracker.advanced() == ScanCursor("2026-10-15", frozenset({"a", "b"}), "f")
+
+
+def test_stops_at_cursor_and_sees_same_day_uploads():
+    cursor = ScanCursor("2026-10-15", frozenset({"a", "b"}), "f")
+    tracker = CursorTracker(cursor, "f")
+
+    examined = _scan(
+        tracker,
+        [
+            _entry("new", "2026-10-16"),
+            _entry("late", "2026-10-15"),
+            _entry("a", "2026-10-15"),
+            _entry("c", "2026-10-10"),
+        ],
+    )
+
+    assert examined == ["new", "late"]
+    assert tracker.reached
+    assert tracker.advanced() == ScanCursor("2026-10-16", frozenset({"new"}), "f")
+
+
+def test_pending_items_hold_the_cursor_back():
+    cursor = ScanCursor("2026-10-10", frozenset({"old"}), "f")
+    tracker = CursorTracker(cursor, "f")
+
+    _scan(
+        tracker,
+        [
+            _entry("n1", "2026-10-16"),
+            _entry("p1", "2026-10-14"),
+            _entry("s1", "2026-10-14"),
+            _entry("old", "2026-10-10"),
+        ],
+        held={"p1"},
+    )
+
+    # 停在待处理条目那一天，只记录当天已定论的 ID：p1 下次仍会被看到
+    assert tracker.advanced() == ScanCursor("2026-10-14", frozenset({"s1"}), "f")
+
+
+def test_gap_to_cursor_requests_older_page_and_keeps_cursor():
+    cursor = ScanCursor("2026-09-01", frozenset(), "f")
+    tracker = CursorTracker(cursor, "f")
+    _scan(tracker, [_entry("a", "2026-10-16"), _entry("b", "2026-10-12")])
+
+    assert tracker.note_page("2026-10-12", "2026-10-09", page_full=True)
+    assert tracker.advanced() == cursor
+
+    # 页面不满（频道到底）或已覆盖时间窗口时没有缺口
+    assert not tracker.note_page("2026-10-12", "2026-10-09", page_full=False)
+    assert not tracker.note_page("2026-10-08", "2026-10-09", page_full=True)
+
+
+def test_filter_change_discards_cursor():
+    cursor = ScanCursor("2026-10-15", frozenset({"a"}), filters_fingerprint(["AI"], 30))
+    tracker = CursorTracker(cursor, filters_fingerprint(["AI", "LLM"], 30))
+
+    assert tracker.cursor is None
+
+
+def test_cursor_round_trips_through_dict():
+    cursor = ScanCursor("2026-10-15", frozenset({"b", "a"}), "f")
+
+    assert ScanCursor.from_dict(cursor.to_dict()) == cursor
+    assert ScanCursor.from_dict(None) is None
@@ -0,0 +1,128 @@
+import json
+from datetime import datetime
+
+from ingestion.feed_parser import FeedEntry, iter_xiaoyuzhou_entries, iter_youtube_entries
+
+ATOM = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <title>Channel</title>
+  <entry>
+    <yt:videoId>new1</yt:videoId>
+    <title>Tom &amp; Jerry 访谈</title>
+    <published>2026-10-15T08:00:00+00:00</published>
+  </entry>
+  <entry>
+    <yt:videoId>mid2</yt:videoId>
+    <title>Middle</title>
+    <published>2026-10-10T08:00:00+00:00</published>
+  </entry>
+  <entry>
+    <yt:videoId>old3</yt:videoId>
+    <title>Old</title>
+    <published>2026-09-01T08:00:00+00:00</published>
+  </entry>
+</feed>
+"""
+
+
+def test_iter_youtube_entries_decodes_entities_and_dates():
+    entries = list(iter_youtube_entries(ATOM))
+
+    assert [e.id for e in entries] == ["new1", "mid2", "old3"]
+    assert entries[0].title == "Tom & Jerry 访谈"
+    assert entries[0].published == "2026-10-15"
+    assert entries[0].url == "https://www.youtube.com/watch?v=new1"
+
+
+def test_iter_youtube_entries_stops_at_cutoff():
+    entries = list(iter_youtube_entries(ATOM, cutoff=datetime(2026, 10, 12)))
+
+    assert [e.id for e in entries] == ["new1"]
+
+
+def test_iter_youtube_entries_survives_truncated_xml():
+    entries = list(iter_youtube_entries(ATOM[: ATOM.index("<entry>", ATOM.index("mid2"))]))
+
+    assert [e.id for e in entries] == ["new1", "mid2"]
+
+
+def _podcast_html(work_examples, anchors="", next_data=None):
+    ld = {"@type": "PodcastSeries", "name": "Show", "workExample": work_examples}
+    scripts = f'<script name="schema:podcast-show" type="application/ld+json">{json.dumps(ld)}</script>'
+    if next_data is not None:
+        scripts += f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+    return f"<html><head>{scripts}</head><body>{anchors}</body></html>"
+
+
+def test_iter_xiaoyuzhou_entries_pairs_ids_by_episode_url():
+    html = _podcast_html(
+        [
+            {
+                "name": "同名标题",
+                "url": "https://www.xiaoyuzhoufm.com/episode/aaa111",
+                "datePublished": "2026-10-14T10:00:00.000Z",
+            },
+            {
+                "name": "同名标题",
+                "url": "https://www.xiaoyuzhoufm.com/episode/bbb222",
+                "datePublished": "2026-10-01T10:00:00.000Z",
+            },
+        ]
+    )
+
+    entries = list(iter_xiaoyuzhou_entries(html))
+
+    assert [(e.id, e.published) for e in entries] == [("aaa111", "2026-10-14"), ("bbb222", "2026-10-01")]
+
+
+def test_iter_xiaoyuzhou_entries_prefers_next_data():
+    next_data = {
+        "props": {
+            "pageProps": {
+                "podcast": {
+                    "episodes": [{"eid": "nd1", "title": "From Next", "pubDate": "2026-10-16T00:00:00Z"}]
+                }
+            }
+        }
+    }
+    html = _podcast_html([{"name": "From LD", "datePublished": "2026-10-16"}], next_data=next_data)
+
+    entries = list(iter_xiaoyuzhou_entries(html))
+
+    assert entries == [
+        FeedEntry("xiaoyuzhou", "nd1", "From Next", "2026-10-16", "https://www.xiaoyuzhoufm.com/episode/nd1")
+    ]
+
+
+def test_iter_xiaoyuzhou_entries_title_join_fallback_and_cutoff():
+    anchors = (
+        '<a href="/episode/ep1"><div class="jsx-1 title">新单集 <span>上</span></div></a>'
+        '<a href="/episode/ep2"><div class="episode-title">旧单集</div></a>'
+    )
+    html = _podcast_html(
+        [
+            {"name": "新单集 上", "datePublished": "2026-10-15T00:00:00Z"},
+            {"name": "旧单集", "datePublished": "2026-08-01T00:00:00Z"},
+        ],
+        anchors=anchors,
+    )
+
+    entries = list(iter_xiaoyuzhou_entries(html, cutoff=datetime(2026, 10, 1)))
+
+    assert [(e.id, e.title) for e in entries] == [("ep1", "新单集 上")]
+
+
+def test_iter_xiaoyuzhou_entries_anchor_only_fallback_has_no_date():
+    html = '<html><a href="/episode/x1"><div class="title">Only Link</div></a></html>'
+
+    entries = list(iter_xiaoyuzhou_entries(html))
+
+    assert entries == [
+        FeedEntry("xiaoyuzhou", "x1", "Only Link", "", "https://www.xiaoyuzhoufm.com/episode/x1")
+    ]
+
+
+def test_feed_entry_round_trips_through_dict():
+    entry = FeedEntry("youtube", "v1", "T", "2026-10-01", "https://www.youtube.com/watch?v=v1")
+
+    assert FeedEntry.from_dict(entry.to_dict()) == entry
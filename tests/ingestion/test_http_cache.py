@@ -0,0 +1,78 @@
+from ingestion.http_cache import HttpCache, cached_fetch
+
+URL = "https://www.youtube.com/feeds/videos.xml?channel_id=UC123"
+
+
+class FakeServer:
+    def __init__(self, body, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, url, headers, timeout):
+        self.requests.append(dict(headers))
+        if self.etag and headers.get("If-None-Match") == self.etag:
+            return 304, {}, ""
+        response_headers = {"etag": self.etag} if self.etag else {}
+        return 200, response_headers, self.body
+
+
+def test_first_fetch_is_changed_and_stores_validators(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    server = FakeServer("<feed>one</feed>")
+
+    result = cached_fetch(URL, cache=cache, transport=server)
+
+    assert result.changed
+    assert result.body == "<feed>one</feed>"
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"v1"'}
+
+
+def test_304_serves_cached_body_and_parsed_payload(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    server = FakeServer("<feed>one</feed>")
+    cached_fetch(URL, cache=cache, transport=server)
+    cache.save_parsed(URL, "rss", [{"id": "a"}])
+
+    result = cached_fetch(URL, cache=cache, transport=server)
+
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert result.not_modified
+    assert not result.changed
+    assert result.body == "<feed>one</feed>"
+    assert cache.load_parsed(URL, "rss") == [{"id": "a"}]
+
+
+def test_identical_body_without_validators_is_unchanged(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    server = FakeServer("<feed>same</feed>", etag="")
+
+    cached_fetch(URL, cache=cache, transport=server)
+    result = cached_fetch(URL, cache=cache, transport=server)
+
+    assert result.status == 200
+    assert not result.changed
+
+
+def test_changed_body_invalidates_parsed_payload(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    server = FakeServer("<feed>one</feed>", etag="")
+    cached_fetch(URL, cache=cache, transport=server)
+    cache.save_parsed(URL, "rss", [{"id": "a"}])
+
+    server.body = "<feed>two</feed>"
+    result = cached_fetch(URL, cache=cache, transport=server)
+
+    assert result.changed
+    assert cache.load_parsed(URL, "rss") is None
+    assert cache.cached_body(URL) == "<feed>two</feed>"
+
+
+def test_error_response_does_not_overwrite_cache(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cached_fetch(URL, cache=cache, transport=FakeServer("<feed>one</feed>"))
+
+    result = cached_fetch(URL, cache=cache, transport=lambda url, headers, timeout: (503, {}, "busy"))
+
+    assert result.status == 503
+    assert cache.cached_body(URL) == "<feed>one</feed>"
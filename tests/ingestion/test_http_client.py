@@ -0,0 +1,95 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ingestion.http_client import HttpClient
+
+AUDIO_BYTES = b"\x00\x01" * 50_000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/page":
+            body = "<html>中文标题</html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", '"abc"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/audio.m4a":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(AUDIO_BYTES)))
+            self.end_headers()
+            self.wfile.write(AUDIO_BYTES)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_fetch_text_decodes_utf8_without_charset(server_url):
+    client = HttpClient(retries=0)
+
+    status, headers, body = client.fetch_text(f"{server_url}/page")
+
+    assert status == 200
+    assert headers["etag"] == '"abc"'
+    assert body == "<html>中文标题</html>"
+
+
+def test_download_streams_to_disk_and_records_timing(server_url, tmp_path):
+    client = HttpClient(retries=0)
+    output = tmp_path / "audio.m4a"
+
+    written = client.download(f"{server_url}/audio.m4a", str(output))
+
+    assert written == len(AUDIO_BYTES)
+    assert output.read_bytes() == AUDIO_BYTES
+    assert not (tmp_path / "audio.m4a.part").exists()
+    stats = client.host_stats()
+    assert stats[server_url.split("//")[1]]["bytes"] == len(AUDIO_BYTES)
+
+
+def test_download_error_leaves_no_partial_file(server_url, tmp_path):
+    client = HttpClient(retries=0)
+    output = tmp_path / "missing.m4a"
+
+    with pytest.raises(requests.HTTPError):
+        client.download(f"{server_url}/missing.m4a", str(output))
+
+    assert not output.exists()
+    assert not (tmp_path / "missing.m4a.part").exists()
+
+
+def test_download_enforces_total_deadline(server_url, tmp_path):
+    client = HttpClient(retries=0)
+    output = tmp_path / "slow.m4a"
+
+    with pytest.raises(TimeoutError):
+        client.download(f"{server_url}/audio.m4a", str(output), max_seconds=-1, chunk_size=1024)
+
+    assert not output.exists()
+
+
+def test_connection_pool_is_reused(server_url):
+    client = HttpClient(retries=0)
+    for _ in range(3):
+        client.get(f"{server_url}/page")
+
+    assert len(client.timings) == 3
+    assert len(client.session.adapters["http://"].poolmanager.pools) == 1
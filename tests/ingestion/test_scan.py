@@ -0,0 +1,107 @@
+import threading
+import time
+
+from ingestion.scan import ScanJob, resolve_scan_settings, run_scan
+
+
+def _job(key, host, items, delay=0.0, hook=None):
+    def fn():
+        if hook:
+            hook()
+        time.sleep(delay)
+        return items
+
+    return ScanJob(key=key, host=host, fn=fn)
+
+
+def test_run_scan_preserves_job_order_regardless_of_completion_order():
+    jobs = [
+        _job("a", "h1", [{"id": "a"}], delay=0.15),
+        _job("b", "h2", [{"id": "b"}], delay=0.0),
+        _job("c", "h1", [{"id": "c"}], delay=0.05),
+    ]
+
+    results = run_scan(jobs, max_workers=4, host_limits={"h1": 2, "h2": 2})
+
+    assert [item["id"] for batch in results for item in batch] == ["a", "b", "c"]
+
+
+def test_run_scan_respects_per_host_limit():
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fn():
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return []
+
+    jobs = [ScanJob(key=str(i), host="slow.example.com", fn=fn) for i in range(6)]
+    run_scan(jobs, max_workers=6, host_limits={"slow.example.com": 2})
+
+    assert state["peak"] == 2
+
+
+def test_busy_host_does_not_hold_workers_from_other_hosts():
+    release = threading.Event()
+    other_started = threading.Event()
+    jobs = [ScanJob(key=f"yt{i}", host="h1", fn=lambda: release.wait(2) and []) for i in range(6)]
+    jobs.append(ScanJob(key="xyz", host="h2", fn=lambda: other_started.set() or [{"id": "xyz"}]))
+
+    started_early = []
+
+    def unblock():
+        # h1 的任务还没一个结束时，h2 的任务就应已开始
+        started_early.append(other_started.wait(1))
+        release.set()
+
+    watcher = threading.Thread(target=unblock)
+    watcher.start()
+    results = run_scan(jobs, max_workers=3, host_limits={"h1": 2, "h2": 2})
+    watcher.join()
+
+    assert started_early == [True]
+    assert results[-1] == [{"id": "xyz"}]
+
+
+def test_run_scan_runs_in_parallel():
+    jobs = [_job(str(i), f"h{i}", [], delay=0.2) for i in range(5)]
+
+    started = time.monotonic()
+    run_scan(jobs, max_workers=5)
+
+    assert time.monotonic() - started < 0.6
+
+
+def test_run_scan_isolates_failures():
+    def boom():
+        raise RuntimeError("network down")
+
+    jobs = [ScanJob(key="bad", host="h", fn=boom), _job("good", "h", [{"id": "ok"}])]
+
+    assert run_scan(jobs) == [[], [{"id": "ok"}]]
+
+
+def test_run_scan_deadline_drops_unfinished_jobs():
+    jobs = [_job("fast", "h1", [{"id": "fast"}]), _job("slow", "h2", [{"id": "slow"}], delay=1.0)]
+
+    started = time.monotonic()
+    results = run_scan(jobs, deadline_seconds=0.2)
+
+    assert time.monotonic() - started < 0.8
+    assert results == [[{"id": "fast"}], []]
+
+
+def test_resolve_scan_settings_env_overrides(monkeypatch):
+    monkeypatch.setenv("CHORA_SCAN_WORKERS", "3")
+    monkeypatch.setenv("CHORA_SCAN_DEADLINE_SECONDS", "0")
+
+    resolved = resolve_scan_settings({"scan_workers": 10, "scan_host_limits": {"www.youtube.com": 1}})
+
+    assert resolved["max_workers"] == 3
+    assert resolved["deadline_seconds"] is None
+    assert resolved["host_limits"]["www.youtube.com"] == 1
+    assert resolved["host_limits"]["www.xiaoyuzhoufm.com"] == 2
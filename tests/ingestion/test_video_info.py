@@ -0,0 +1,66 @@
+import subprocess
+
+from ingestion import video_info
+from ingestion.video_info import VideoInfo, VideoInfoCache, resolve_video_info
+
+
+def _fake_run(calls, lines):
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        ids = [arg.split("v=")[1] for arg in cmd if "watch?v=" in arg]
+        stdout = "\n".join(lines[vid] for vid in ids if vid in lines)
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    return run
+
+
+def test_resolve_video_info_batches_missing_ids_into_one_call(tmp_path, monkeypatch):
+    calls = []
+    lines = {"a1": "a1\t3600\t20260101", "b2": "b2\t1800.0\t20260102"}
+    monkeypatch.setattr(video_info.subprocess, "run", _fake_run(calls, lines))
+    cache = VideoInfoCache(str(tmp_path / "cache.json"))
+
+    infos = resolve_video_info(["a1", "b2", "zz"], cache=cache)
+
+    assert len(calls) == 1
+    assert infos["a1"].duration_minutes == 60
+    assert infos["b2"].upload_date == "20260102"
+    assert infos["zz"] == VideoInfo("zz")
+
+
+def test_resolve_video_info_never_reprobes_cached_videos(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(video_info.subprocess, "run", _fake_run(calls, {"a1": "a1\t3600\t20260101"}))
+    path = str(tmp_path / "cache.json")
+
+    resolve_video_info(["a1"], cache=VideoInfoCache(path))
+    infos = resolve_video_info(["a1"], cache=VideoInfoCache(path))
+
+    assert len(calls) == 1
+    assert infos["a1"].duration == 3600
+
+
+def test_resolve_video_info_splits_large_requests(tmp_path, monkeypatch):
+    calls = []
+    ids = [f"v{i}" for i in range(video_info.BATCH_SIZE + 3)]
+    lines = {vid: f"{vid}\t600\t20260101" for vid in ids}
+    monkeypatch.setattr(video_info.subprocess, "run", _fake_run(calls, lines))
+
+    infos = resolve_video_info(ids, cache=VideoInfoCache(str(tmp_path / "cache.json")))
+
+    assert len(calls) == 2
+    assert all(infos[vid].duration == 600 for vid in ids)
+
+
+def test_cache_put_many_keeps_known_fields(tmp_path):
+    cache = VideoInfoCache(str(tmp_path / "cache.json"))
+    cache.put_many([VideoInfo("a1", 900, "")])
+    cache.put_many([VideoInfo("a1", 0, "20260105")])
+
+    assert cache.get("a1") == VideoInfo("a1", 900, "20260105")
+
+
+def test_parse_print_output_tolerates_na_fields():
+    infos = video_info._parse_print_output("a1\tNA\tNA\nbroken line\n")
+
+    assert infos == [VideoInfo("a1", 0, "")]
@@ -0,0 +1,66 @@
+import random
+import threading
+from datetime import datetime
+
+from ingestion.scan import ScanJob
+from ingestion.watch import PollScheduler, WatchSettings, cadence_seconds, poll_interval, run_watch
+
+SETTINGS = WatchSettings(min_interval=600, max_interval=86400, default_interval=3600, cadence_fraction=0.02)
+NOW = datetime(2026, 10, 17, 12, 0).timestamp()
+
+
+def test_cadence_is_average_gap_with_one_hour_floor():
+    assert cadence_seconds(["2026-10-15", "2026-10-13", "2026-10-11"]) == 2 * 86400
+    assert cadence_seconds(["2026-10-15", "2026-10-15"]) == 3600
+    assert cadence_seconds(["2026-10-15"]) is None
+
+
+def test_active_channel_polls_every_few_minutes():
+    daily = ["2026-10-17", "2026-10-16", "2026-10-15", "2026-10-14"]
+    several_a_day = ["2026-10-17", "2026-10-17", "2026-10-17", "2026-10-16"]
+
+    assert poll_interval(daily, NOW, SETTINGS) == 86400 * 0.02
+    assert poll_interval(several_a_day, NOW, SETTINGS) == 600
+    assert poll_interval([], NOW, SETTINGS) == 3600
+
+
+def test_dormant_channel_backs_off_exponentially_up_to_cap():
+    weekly = ["2026-09-01", "2026-08-25", "2026-08-18"]
+    on_time = poll_interval(["2026-10-16", "2026-10-09", "2026-10-02"], NOW, SETTINGS)
+
+    overdue = poll_interval(weekly, NOW, SETTINGS)
+    assert overdue > on_time
+    assert poll_interval(["2025-01-08", "2025-01-01"], NOW, SETTINGS) == SETTINGS.max_interval
+
+
+def test_scheduler_polls_new_keys_immediately_then_waits():
+    clock = [NOW]
+    scheduler = PollScheduler(SETTINGS, lambda key: [], clock=lambda: clock[0], rng=random.Random(0))
+
+    assert scheduler.due(["a", "b"]) == ["a", "b"]
+    interval = scheduler.reschedule("a")
+    assert 3240 <= interval <= 3960
+    assert scheduler.due(["a", "b"]) == ["b"]
+
+    clock[0] += interval
+    assert scheduler.due(["a"]) == ["a"]
+
+
+def test_run_watch_scans_only_due_jobs_until_stopped():
+    stop = threading.Event()
+    calls = []
+    clock = [NOW]
+    scheduler = PollScheduler(SETTINGS, lambda key: [], clock=lambda: clock[0])
+    jobs = [ScanJob("x", "h", lambda: [{"id": "1"}]), ScanJob("y", "h", lambda: [])]
+
+    def on_results(due_jobs, results):
+        calls.append(([job.key for job in due_jobs], results))
+        if len(calls) == 1:
+            # 第二轮只让 y 到期
+            scheduler.next_poll["y"] = clock[0] - 1
+        else:
+            stop.set()
+
+    run_watch(lambda: jobs, scheduler, on_results, stop_event=stop, max_sleep=0.01)
+
+    assert calls == [(["x", "y"], [[{"id": "1"}], []]), (["y"], [[]])]
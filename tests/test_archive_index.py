@@ -0,0 +1,111 @@
+import os
+
+import archive_index
+from archive_index import ArchiveIndex, get_default_index, normalize_title, register_folder
+
+
+def _make_folder(root, date, name, title=None, url=None):
+    folder = root / date / name
+    folder.mkdir(parents=True)
+    if title is not None:
+        (folder / "metadata.md").write_text(
+            f"# {title}\n\n## 来源\nChannel\n\n## 原始链接\n{url}\n\n## 发布时间\n{date}\n", encoding="utf-8"
+        )
+    return folder
+
+
+def test_rebuild_indexes_full_title_and_source_id(tmp_path):
+    root = tmp_path / "content_archive"
+    title = "A very long interview title that goes well beyond fifty characters: part two"
+    _make_folder(
+        root, "2026-10-01", "youtube_Chan_A_very_long", title, "https://www.youtube.com/watch?v=abcdefghijk"
+    )
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+
+    assert index.rebuild(str(root)) == 1
+
+    assert index.find("youtube", source_id="abcdefghijk")
+    # 与日期目录无关，且按完整标题命中
+    assert index.find("youtube", title=title.upper())
+    assert not index.find("youtube", title=title[:50])
+    assert not index.find("xiaoyuzhou", source_id="abcdefghijk")
+
+
+def test_same_title_with_different_source_id_is_not_a_duplicate(tmp_path):
+    root = tmp_path / "content_archive"
+    _make_folder(
+        root, "2026-10-01", "xiaoyuzhou_Show_同名", "同名标题", "https://www.xiaoyuzhoufm.com/episode/aaa111"
+    )
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+    index.rebuild(str(root))
+
+    assert index.find("xiaoyuzhou", source_id="aaa111", title="同名标题")
+    assert not index.find("xiaoyuzhou", source_id="bbb222", title="同名标题")
+
+
+def test_folder_without_metadata_matches_exact_name_only(tmp_path):
+    root = tmp_path / "content_archive"
+    _make_folder(root, "2026-10-02", "youtube_My_Channel_Some_Talk")
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+    index.rebuild(str(root))
+
+    assert index.find("youtube", title="Some Talk", channel="My Channel")
+    assert not index.find("youtube", title="Some", channel="My Channel")
+
+
+def test_registered_folder_is_found_and_stale_entries_are_dropped(tmp_path):
+    folder = tmp_path / "content_archive" / "2026-10-03" / "xiaoyuzhou_Show_Ep"
+    folder.mkdir(parents=True)
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+    index.add(str(folder), platform="xiaoyuzhou", source_id="ep1", title="Ep")
+
+    assert index.find("xiaoyuzhou", source_id="ep1") == os.path.normpath(str(folder))
+
+    folder.rmdir()
+    assert index.find("xiaoyuzhou", source_id="ep1") is None
+    assert index._connect().execute("SELECT COUNT(*) FROM archive_folders").fetchone()[0] == 0
+
+
+def test_folders_added_after_build_are_picked_up(tmp_path):
+    root = tmp_path / "content_archive"
+    _make_folder(root, "2026-10-01", "youtube_Chan_Old", "Old", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+    index.ensure_built(str(root))
+
+    # 手动拷进已有日期目录和新日期目录
+    _make_folder(root, "2026-10-01", "youtube_Chan_Copied", "Copied", "https://youtu.be/bbbbbbbbbbb")
+    os.utime(root / "2026-10-01", ns=(0, 1))
+    _make_folder(root, "2026-10-05", "youtube_Chan_New", "New", "https://youtu.be/ccccccccccc")
+    index.ensure_built(str(root))
+
+    assert index.find("youtube", source_id="bbbbbbbbbbb")
+    assert index.find("youtube", source_id="ccccccccccc")
+    assert index.find("youtube", source_id="aaaaaaaaaaa")
+    # 没有变化的日期目录不再重扫
+    assert index.refresh(str(root)) == 0
+
+
+def test_default_index_refreshes_once_per_scan_not_per_lookup(tmp_path, monkeypatch):
+    root = tmp_path / "content_archive"
+    _make_folder(root, "2026-10-01", "youtube_Chan_Old", "Old", "https://youtu.be/aaaaaaaaaaa")
+    index = ArchiveIndex(str(tmp_path / "state.db"))
+    monkeypatch.setattr(archive_index, "_default_index", index)
+    monkeypatch.setattr(archive_index, "_synced_roots", set())
+    scans = []
+    monkeypatch.setattr(index, "refresh", lambda r: scans.append(r) or ArchiveIndex.refresh(index, r))
+
+    for _ in range(3):
+        get_default_index(str(root)).find("youtube", source_id="aaaaaaaaaaa")
+    folder = root / "2026-10-02" / "youtube_Chan_New"
+    folder.mkdir(parents=True)
+    register_folder(str(folder), platform="youtube", source_id="bbbbbbbbbbb", title="New")
+
+    assert len(scans) == 1
+    assert get_default_index(str(root)).find("youtube", source_id="bbbbbbbbbbb")
+
+    get_default_index(str(root), refresh=True)
+    assert len(scans) == 2
+
+
+def test_normalize_title_ignores_case_width_and_punctuation():
+    assert normalize_title("ＡＩ 时代：访谈（上）") == normalize_title("ai时代 访谈 上")
@@ -0,0 +1,208 @@
+import json
+
+import pytest
+
+from llm_client import (
+    PROVIDER_GEMINI,
+    PROVIDER_OPENAI,
+    GeminiProvider,
+    ImagePart,
+    LLMClient,
+    LLMEndpoint,
+    LLMError,
+    iter_sse_data,
+)
+
+GEMINI = LLMEndpoint(PROVIDER_GEMINI, "https://relay.example/v1beta/models/gemini-pro:generateContent", "k")
+OPENAI = LLMEndpoint(PROVIDER_OPENAI, "https://relay.example/v1/chat/completions", "k", "gpt-x")
+
+
+class _Response:
+    def __init__(self, status=200, body=b"", headers=None):
+        self.status_code = status
+        self.content = body
+        self.text = body.decode("utf-8", "replace")
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_lines(self):
+        return iter(self.content.splitlines())
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeHttp:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+def _sse(*events):
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return _Response(body=body.encode("utf-8"), headers={"content-type": "text/event-stream"})
+
+
+def _client(http, sleeps=None):
+    ticks = iter(range(100))
+    return LLMClient(
+        http=http, sleep=(sleeps.append if sleeps is not None else lambda _: None), clock=lambda: next(ticks)
+    )
+
+
+def test_gemini_stream_collects_text_usage_and_latency():
+    http = _FakeHttp(
+        _sse(
+            {"candidates": [{"content": {"parts": [{"text": "thinking", "thought": True}]}}]},
+            {"candidates": [{"content": {"parts": [{"text": "你好"}]}}]},
+            {
+                "candidates": [{"content": {"parts": [{"text": "世界"}]}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 4, "totalTokenCount": 14},
+            },
+        )
+    )
+    chunks = []
+
+    result = _client(http).generate(GEMINI, "hi", stream=True, on_text=chunks.append)
+
+    assert result.text == "你好世界"
+    assert chunks == ["你好", "世界"]
+    assert (result.usage.prompt_tokens, result.usage.completion_tokens) == (10, 4)
+    assert result.finish_reason == "STOP"
+    assert result.first_token_latency is not None and result.latency >= result.first_token_latency
+    assert http.calls[0][1].endswith("gemini-pro:streamGenerateContent?alt=sse")
+
+
+def test_openai_stream_and_payload():
+    http = _FakeHttp(
+        _sse(
+            {"choices": [{"delta": {"content": "a"}}]},
+            {"choices": [{"delta": {"content": "b"}, "finish_reason": "stop"}]},
+            {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}},
+        )
+    )
+
+    result = _client(http).generate(OPENAI, "hi", stream=True, max_tokens=16, temperature=0.1)
+
+    assert result.text == "ab"
+    assert result.usage.total_tokens == 5
+    _, url, kwargs = http.calls[0]
+    assert url == OPENAI.url
+    assert kwargs["json"] == {
+        "model": "gpt-x",
+        "messages": [{"role": "user", "content": "hi"}],
+        "temperature": 0.1,
+        "max_tokens": 16,
+        "stream": True,
+    }
+
+
+def test_json_array_body_is_decoded():
+    body = json.dumps(
+        [
+            {"candidates": [{"content": {"parts": [{"text": "x"}]}}]},
+            {"candidates": [{"content": {"parts": [{"text": "y"}]}}]},
+        ]
+    ).encode()
+    http = _FakeHttp(_Response(body=body, headers={"content-type": "application/json"}))
+
+    assert _client(http).generate(GEMINI, "hi").text == "xy"
+
+
+def test_retries_429_honouring_retry_after():
+    ok = _Response(body=json.dumps({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]}).encode())
+    http = _FakeHttp(_Response(429, headers={"retry-after": "7"}), _Response(503), ok)
+    sleeps = []
+
+    result = _client(http, sleeps).generate(GEMINI, "hi")
+
+    assert result.text == "ok"
+    assert result.attempts == 3
+    assert sleeps == [7.0, 10.0]
+
+
+def test_client_error_is_not_retried():
+    http = _FakeHttp(_Response(400, b"bad request"))
+    sleeps = []
+
+    with pytest.raises(LLMError) as exc_info:
+        _client(http, sleeps).generate(GEMINI, "hi")
+
+    assert exc_info.value.status == 400
+    assert sleeps == []
+    assert len(http.calls) == 1
+
+
+def test_empty_response_retries_then_fails():
+    http = _FakeHttp(*[_Response(body=b"{}") for _ in range(2)])
+
+    with pytest.raises(LLMError, match="empty response"):
+        _client(http).generate(GEMINI, "hi", max_attempts=2)
+
+
+def test_vision_parts_and_json_mode():
+    payload = GeminiProvider.payload(
+        GEMINI,
+        ["describe", ImagePart("image/png", "AAAA")],
+        stream=False,
+        temperature=0.2,
+        top_p=None,
+        top_k=40,
+        max_tokens=2048,
+        json_mode=True,
+    )
+
+    assert payload["contents"][0]["parts"] == [
+        {"text": "describe"},
+        {"inline_data": {"mime_type": "image/png", "data": "AAAA"}},
+    ]
+    assert payload["generationConfig"] == {
+        "temperature": 0.2,
+        "topK": 40,
+        "maxOutputTokens": 2048,
+        "responseMimeType": "application/json",
+    }
+
+
+def test_gemini_url_keeps_query_params():
+    endpoint = LLMEndpoint(
+        PROVIDER_GEMINI, "https://g.example/models/m:streamGenerateContent?alt=sse&key=K", ""
+    )
+
+    assert (
+        GeminiProvider.url(endpoint, True) == "https://g.example/models/m:streamGenerateContent?alt=sse&key=K"
+    )
+    assert GeminiProvider.url(endpoint, False) == "https://g.example/models/m:generateContent?key=K"
+
+
+def test_endpoint_from_config_detects_openai_compatible():
+    assert LLMEndpoint.from_config({"base_url": "https://x/v1/chat/completions"}).provider == PROVIDER_OPENAI
+    assert LLMEndpoint.from_config({"provider": "openai_compatible", "base_url": "https://x"}).provider == (
+        PROVIDER_OPENAI
+    )
+    assert LLMEndpoint.from_config({"provider": "third_party", "base_url": GEMINI.url}).provider == (
+        PROVIDER_GEMINI
+    )
+
+
+def test_iter_sse_data_joins_multiline_events_and_skips_comments():
+    lines = [b": keep-alive", b'data: {"a":', b"data: 1}", b"", b"data: [DONE]", b'data: {"b": 2}']
+
+    assert list(iter_sse_data(lines)) == [{"a": 1}]
+
+
+def test_listeners_see_every_attempt():
+    ok = _Response(body=json.dumps({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]}).encode())
+    http = _FakeHttp(_Response(429), ok)
+    client = _client(http)
+    events = []
+    client.add_listener(events.append)
+
+    client.generate(GEMINI, "hi")
+    client.remove_listener(events.append)
+
+    assert [(event.status, event.ok) for event in events] == [(429, False), (200, True)]
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import orchestrator
+from orchestrator import PipelineItem, Stage, StagePipeline, build_item, resolve_pool_sizes
+
+
+def _sleep_stage(pool, seconds, log, required=True, ok=True):
+    def run(job):
+        log.append((pool, job["n"], "start", time.monotonic()))
+        time.sleep(seconds)
+        log.append((pool, job["n"], "end", time.monotonic()))
+        return ok
+
+    return Stage(pool, run, required)
+
+
+def test_stages_overlap_across_items():
+    log = []
+    items = [
+        PipelineItem(
+            f"item{n}",
+            [_sleep_stage("fetch", 0.05, log), _sleep_stage("transcribe", 0.05, log)],
+            job={"n": n},
+        )
+        for n in range(4)
+    ]
+
+    started = time.monotonic()
+    StagePipeline({"fetch": 1, "transcribe": 1}).run(items)
+    elapsed = time.monotonic() - started
+
+    assert all(item.status == "done" for item in items)
+    # 串行需要 8 × 0.05s；流水线约 5 × 0.05s
+    assert elapsed < 0.35
+    transcribe_0_start = next(t for pool, n, ev, t in log if (pool, n, ev) == ("transcribe", 0, "start"))
+    fetch_1_end = next(t for pool, n, ev, t in log if (pool, n, ev) == ("fetch", 1, "end"))
+    assert transcribe_0_start < fetch_1_end
+
+
+def test_pool_size_bounds_concurrency_per_stage():
+    active = {"n": 0, "max": 0}
+    lock = threading.Lock()
+
+    def run(job):
+        with lock:
+            active["n"] += 1
+            active["max"] = max(active["max"], active["n"])
+        time.sleep(0.03)
+        with lock:
+            active["n"] -= 1
+        return True
+
+    items = [PipelineItem(str(n), [Stage("rewrite", run)]) for n in range(6)]
+    StagePipeline({"rewrite": 2}).run(items)
+
+    assert active["max"] == 2
+
+
+def test_required_failure_stops_item_but_optional_failure_continues():
+    log = []
+    failing = PipelineItem(
+        "a",
+        [_sleep_stage("fetch", 0, log, ok=False), _sleep_stage("rewrite", 0, log)],
+        job={"n": 0},
+    )
+    optional = PipelineItem(
+        "b",
+        [_sleep_stage("cover", 0, log, required=False, ok=False), _sleep_stage("distribute", 0, log)],
+        job={"n": 1},
+    )
+
+    def boom(job):
+        raise RuntimeError("boom")
+
+    raising = PipelineItem("c", [Stage("fetch", boom)])
+
+    StagePipeline().run([failing, optional, raising])
+
+    assert (failing.status, failing.failed_stage) == ("failed", "fetch")
+    assert ("rewrite", 0, "start") not in [(p, n, e) for p, n, e, _ in log]
+    assert optional.status == "done"
+    assert (raising.status, raising.failed_stage) == ("failed", "fetch")
+
+
+def _skip(job):
+    job["skipped"] = "重复音频"
+    return False
+
+
+def test_skipped_item_is_not_a_failure(monkeypatch):
+    log = []
+    skipped = PipelineItem("dup", [Stage("transcribe", _skip), _sleep_stage("rewrite", 0, log)], job={"n": 0})
+
+    StagePipeline().run([skipped])
+
+    assert (skipped.status, skipped.failed_stage) == ("skipped", "")
+    assert log == []
+
+    def run_urls(urls, settings=None):
+        items = [PipelineItem(url, [Stage("transcribe", _skip)]) for url in urls]
+        return StagePipeline().run(items)
+
+    monkeypatch.setattr(orchestrator, "run_urls", run_urls)
+    assert orchestrator.main(["https://youtu.be/abcdefghijk"]) == 0
+
+
+def test_resolve_pool_sizes_env_and_settings(monkeypatch):
+    monkeypatch.setenv("CHORA_PIPELINE_WORKERS_REWRITE", "5")
+
+    sizes = resolve_pool_sizes({"pipeline_workers": {"fetch": 6}})
+
+    assert sizes["rewrite"] == 5
+    assert sizes["fetch"] == 6
+    assert sizes["distribute"] == 1
+
+
+def test_build_item_picks_stages_by_platform():
+    podcast = build_item("https://www.xiaoyuzhoufm.com/episode/abc")
+    video = build_item("https://www.youtube.com/watch?v=abcdefghijk")
+
+    assert [s.pool for s in podcast.stages] == ["fetch", "transcribe", "rewrite", "cover", "distribute"]
+    assert [s.pool for s in video.stages] == ["fetch", "transcribe", "rewrite", "distribute"]
+    assert build_item("https://example.com/x") is None
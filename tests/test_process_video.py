@@ -0,0 +1,119 @@
+import process_video
+import youtube_service
+from ingestion import captions
+from ingestion.captions import CaptionCache
+from transcription.segments import Segment
+
+
+class _FakeDownload:
+    instances = []
+
+    def __init__(self, video_id, output_dir, settings=None):
+        self.output_dir = output_dir
+        self.cancelled = False
+        _FakeDownload.instances.append(self)
+
+    def wait(self):
+        path = f"{self.output_dir}/audio.webm"
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        return path
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _job(tmp_path):
+    return {
+        "content_id": "vid",
+        "output_dir": str(tmp_path),
+        "transcript_path": str(tmp_path / "transcript.md"),
+    }
+
+
+def _setup(monkeypatch, tmp_path, captions_result):
+    import process_podcast
+
+    _FakeDownload.instances = []
+    monkeypatch.setenv("CHORA_FINGERPRINT_DEDUPE", "0")
+    monkeypatch.setattr(captions, "_default_cache", CaptionCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(process_video, "get_caption_cache", captions.get_caption_cache)
+    monkeypatch.setattr(process_video, "AudioDownload", _FakeDownload)
+    monkeypatch.setattr(process_video, "record_stage", lambda *a, **k: None)
+    monkeypatch.setattr(process_podcast, "load_config", lambda: {"settings": {}})
+    monkeypatch.setattr(process_podcast, "transcribe_audio", lambda path, config: "whisper text")
+    monkeypatch.setattr(youtube_service, "_fetch_transcript_segments", lambda video_id: captions_result)
+
+
+def test_captions_win_and_cancel_the_audio_download(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, ([Segment(0, 2, "hello")], "en"))
+
+    assert process_video.fetch_video_transcript(_job(tmp_path))
+
+    assert [d.cancelled for d in _FakeDownload.instances] == [True]
+    assert (tmp_path / "transcript.md").read_text(encoding="utf-8").strip() == "hello"
+
+
+def test_audio_started_during_probe_is_used_when_captions_missing(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, (None, None))
+
+    assert process_video.fetch_video_transcript(_job(tmp_path))
+
+    assert [d.cancelled for d in _FakeDownload.instances] == [False]
+    assert (tmp_path / "transcript.md").read_text(encoding="utf-8") == "whisper text"
+
+
+def test_cached_captions_skip_youtube_and_audio(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, None)
+    captions.get_caption_cache().put("vid", [Segment(0, 2, "cached")], "en")
+
+    assert process_video.fetch_video_transcript(_job(tmp_path))
+
+    assert _FakeDownload.instances == []
+    assert (tmp_path / "transcript.md").read_text(encoding="utf-8").strip() == "cached"
+
+
+def test_audio_download_picks_smallest_speech_grade_stream(tmp_path):
+    calls = []
+
+    def popen(cmd, **kwargs):
+        calls.append(cmd)
+        return None
+
+    process_video.AudioDownload("vid", str(tmp_path), popen=popen)
+
+    cmd = calls[0]
+    assert cmd[cmd.index("-f") + 1] == "ba[abr>=32]/ba"
+    assert cmd[cmd.index("-S") + 1] == "acodec:opus,+abr"
+    assert "-x" not in cmd and "--audio-format" not in cmd
+
+
+def test_fingerprint_only_checked_when_whisper_is_needed(monkeypatch, tmp_path):
+    checked = []
+    _setup(monkeypatch, tmp_path, ([Segment(0, 2, "hello")], "en"))
+    monkeypatch.setattr(
+        process_video, "skip_if_duplicate", lambda vid, source, settings: checked.append(source)
+    )
+
+    assert process_video.fetch_video_transcript(_job(tmp_path))
+    assert checked == []
+
+    (tmp_path / "transcript.md").unlink()
+    captions.get_caption_cache().put("vid", None, None)
+    assert process_video.fetch_video_transcript(_job(tmp_path))
+    assert checked == [f"{tmp_path}/audio.webm"]
+
+
+def test_duplicate_audio_skips_whisper(monkeypatch, tmp_path):
+    import process_podcast
+
+    _setup(monkeypatch, tmp_path, (None, None))
+    transcribed = []
+    monkeypatch.setattr(process_video, "skip_if_duplicate", lambda vid, source, settings: True)
+    monkeypatch.setattr(process_podcast, "transcribe_audio", lambda path, config: transcribed.append(path))
+
+    job = _job(tmp_path)
+    assert not process_video.fetch_video_transcript(job)
+    assert job["skipped"]
+    assert transcribed == []
+    assert not (tmp_path / "transcript.md").exists()
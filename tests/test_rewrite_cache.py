@@ -0,0 +1,127 @@
+import pytest
+
+import rewrite_service
+from llm_client import LLMResult
+from rewrite_cache import RewriteCache, rewrite_cache_enabled, rewrite_cache_key
+
+ROOT = rewrite_service.__file__.rsplit("/", 1)[0]
+OUTPUT = (
+    "<METADATA_SECTION>\n## 金句\n> 一句\n</METADATA_SECTION>\n<REWRITE_SECTION>\n正文\n</REWRITE_SECTION>"
+)
+
+
+def test_key_changes_with_every_input():
+    base = rewrite_cache_key("转录", "模板", "model", 0.7)
+
+    assert base == rewrite_cache_key("转录", "模板", "model", 0.7)
+    assert base != rewrite_cache_key("转录!", "模板", "model", 0.7)
+    assert base != rewrite_cache_key("转录", "模板!", "model", 0.7)
+    assert base != rewrite_cache_key("转录", "模板", "model-2", 0.7)
+    assert base != rewrite_cache_key("转录", "模板", "model", 0.2)
+    # 字段边界不同不应碰撞
+    assert rewrite_cache_key("ab", "c", "m", 0.7) != rewrite_cache_key("a", "bc", "m", 0.7)
+
+
+def test_only_complete_outputs_are_stored(tmp_path):
+    cache = RewriteCache(str(tmp_path))
+
+    cache.put("k1", "truncated output without sections")
+    cache.put("k2", OUTPUT, model="m")
+
+    assert cache.get("k1") is None
+    assert cache.get("k2") == OUTPUT
+    assert cache.get("missing") is None
+
+
+def test_cut_off_outputs_are_not_stored(tmp_path):
+    cache = RewriteCache(str(tmp_path))
+
+    # 流在 REWRITE 段中途断开：有开标签，没有闭标签
+    cache.put("open", OUTPUT[: OUTPUT.index("</REWRITE_SECTION>")])
+    # 标签齐全但撞上了输出上限
+    cache.put("gemini", OUTPUT, finish_reason="MAX_TOKENS")
+    cache.put("openai", OUTPUT, finish_reason="length")
+    cache.put("ok", OUTPUT, finish_reason="STOP")
+
+    assert cache.get("open") is None
+    assert cache.get("gemini") is None
+    assert cache.get("openai") is None
+    assert cache.get("ok") == OUTPUT
+
+
+def test_env_disables_cache(monkeypatch):
+    monkeypatch.setenv("CHORA_REWRITE_CACHE", "0")
+    assert not rewrite_cache_enabled({"rewrite_cache": True})
+    monkeypatch.delenv("CHORA_REWRITE_CACHE")
+    assert rewrite_cache_enabled({})
+    assert not rewrite_cache_enabled({"rewrite_cache": False})
+
+
+class _CountingClient:
+    def __init__(self):
+        self.calls = 0
+        self.finish_reason = "STOP"
+
+    def generate(self, endpoint, prompt, **kwargs):
+        self.calls += 1
+        return LLMResult(OUTPUT, finish_reason=self.finish_reason)
+
+
+@pytest.fixture
+def item(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.delenv("CHORA_REWRITE_CACHE", raising=False)
+    config = {
+        "api_keys": {"llm": {"api_key": "k", "base_url": "https://x/v1/chat/completions", "model": "m"}}
+    }
+    monkeypatch.setattr(rewrite_service, "load_config", lambda: config)
+    cache = RewriteCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(rewrite_service, "get_rewrite_cache", lambda: cache)
+    client = _CountingClient()
+    monkeypatch.setattr(rewrite_service, "get_llm_client", lambda: client)
+    (tmp_path / "transcript.md").write_text("大家好，今天聊聊哲学。", encoding="utf-8")
+    (tmp_path / "metadata.md").write_text("# 标题\n", encoding="utf-8")
+    paths = [str(tmp_path / name) for name in ("transcript.md", "metadata.md", "rewritten.md")]
+    return client, paths
+
+
+def test_second_run_is_served_from_cache_even_after_metadata_update(item):
+    client, paths = item
+
+    assert rewrite_service.rewrite_content(*paths)
+    assert rewrite_service.rewrite_content(*paths)
+
+    assert client.calls == 1
+    with open(paths[2], encoding="utf-8") as f:
+        assert f.read().startswith("正文")
+
+
+def test_bypass_regenerates_and_refreshes_cache(item):
+    client, paths = item
+
+    rewrite_service.rewrite_content(*paths)
+    rewrite_service.rewrite_content(*paths, use_cache=False)
+    rewrite_service.rewrite_content(*paths)
+
+    assert client.calls == 2
+
+
+def test_changed_transcript_misses(item):
+    client, paths = item
+
+    rewrite_service.rewrite_content(*paths)
+    with open(paths[0], "a", encoding="utf-8") as f:
+        f.write("补充一句。")
+    rewrite_service.rewrite_content(*paths)
+
+    assert client.calls == 2
+
+
+def test_truncated_stream_is_regenerated_next_run(item):
+    client, paths = item
+    client.finish_reason = "MAX_TOKENS"
+
+    rewrite_service.rewrite_content(*paths)
+    rewrite_service.rewrite_content(*paths)
+
+    assert client.calls == 2
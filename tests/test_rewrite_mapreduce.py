@@ -0,0 +1,206 @@
+import threading
+
+import pytest
+
+import rewrite_mapreduce
+import rewrite_service
+from llm_client import LLMError, LLMResult
+from rewrite_mapreduce import (
+    TranscriptChunk,
+    reduce_input,
+    resolve_map_reduce_settings,
+    split_transcript,
+    summarize_chunks,
+)
+from rewrite_scheduler import AdaptiveConcurrency
+from transcription.segments import Segment, segments_path_for, write_segments
+
+ROOT = rewrite_service.__file__.rsplit("/", 1)[0]
+
+
+class _FakeClient:
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate(self, endpoint, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        return LLMResult(self.reply(prompt))
+
+
+def test_text_split_prefers_paragraph_ends_and_keeps_everything():
+    paragraph = "这是一句话。" * 100  # ~600 tokens
+    text = "\n\n".join(paragraph for _ in range(10))
+
+    chunks = split_transcript(text, None, 1500)
+
+    assert 3 <= len(chunks) <= 5
+    assert all(chunk.text.endswith("。") for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks).count("这是一句话。") == 1000
+    assert all(chunk.tokens <= 1500 * 5 // 4 + 600 for chunk in chunks)
+
+
+def test_text_split_hard_cuts_unpunctuated_text():
+    chunks = split_transcript("字" * 10000, None, 2000)
+
+    assert len(chunks) == 5
+    assert sum(len(chunk.text) for chunk in chunks) == 10000
+
+
+def test_segment_split_cuts_at_longest_pause():
+    segments = [Segment(i * 10.0, i * 10.0 + 9.0, "说" * 100) for i in range(20)]
+    # 第 8 段后有一次 30 秒长停顿
+    segments = segments[:8] + [Segment(s.start + 30, s.end + 30, s.text) for s in segments[8:]]
+    text = "".join(s.text for s in segments)
+
+    chunks = split_transcript(text, segments, 1000)
+
+    assert chunks[0].end == segments[7].end
+    assert chunks[1].start == segments[8].start
+    assert chunks[0].span() == "（0:00:00–0:01:19）"
+
+
+def test_segments_ignored_when_transcript_was_edited():
+    segments = [Segment(0.0, 5.0, "旧文本" * 10)]
+
+    chunks = split_transcript("完全不同的文本。" * 400, segments, 1000)
+
+    assert chunks[0].start is None
+
+
+def test_summarize_chunks_keeps_order(monkeypatch):
+    client = _FakeClient(lambda prompt: "笔记" + prompt.split("的第 ")[1].split("/")[0])
+    monkeypatch.setattr(rewrite_mapreduce, "get_llm_client", lambda: client)
+    chunks = [TranscriptChunk(f"段{i}", 10) for i in range(5)]
+
+    notes = summarize_chunks(object(), chunks, workers=3)
+
+    assert notes == ["笔记1", "笔记2", "笔记3", "笔记4", "笔记5"]
+
+
+class _PeakClient(_FakeClient):
+    def __init__(self, reply):
+        super().__init__(reply)
+        self.active = 0
+        self.peak = 0
+
+    def generate(self, endpoint, prompt, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        threading.Event().wait(0.02)
+        with self.lock:
+            self.active -= 1
+        return super().generate(endpoint, prompt, **kwargs)
+
+
+def test_map_pass_shares_the_batch_slots(monkeypatch):
+    client = _PeakClient(lambda prompt: "笔记" + prompt.split("的第 ")[1].split("/")[0])
+    monkeypatch.setattr(rewrite_mapreduce, "get_llm_client", lambda: client)
+    slots = AdaptiveConcurrency(3, initial=3)
+    # 本任务占一个槽，另一条改写占一个槽：map 只能再借到一个
+    assert slots.try_acquire() and slots.try_acquire()
+    chunks = [TranscriptChunk(f"段{i}", 10) for i in range(6)]
+
+    notes = summarize_chunks(object(), chunks, workers=4, slots=slots)
+
+    assert notes == [f"笔记{i}" for i in range(1, 7)]
+    assert client.peak <= 2
+    assert slots.in_flight == 2
+
+
+def test_map_pass_runs_in_callers_slot_when_batch_is_full(monkeypatch):
+    client = _PeakClient(lambda prompt: "笔记")
+    monkeypatch.setattr(rewrite_mapreduce, "get_llm_client", lambda: client)
+    slots = AdaptiveConcurrency(1, initial=1)
+    assert slots.try_acquire()
+
+    notes = summarize_chunks(object(), [TranscriptChunk("段", 10)] * 3, workers=4, slots=slots)
+
+    assert notes == ["笔记"] * 3
+    assert client.peak == 1
+    assert slots.in_flight == 1
+
+
+def test_reduce_input_lists_notes_in_time_order():
+    chunks = [TranscriptChunk("a", 1, 0.0, 60.0), TranscriptChunk("b", 1, 60.0, 3725.0)]
+
+    text = reduce_input(chunks, ["第一段笔记", "第二段笔记"], 50000)
+
+    assert "50000 tokens" in text
+    assert text.index("### 第 1/2 段（0:00:00–0:01:00）") < text.index("第二段笔记")
+    assert "（0:01:00–1:02:05）" in text
+
+
+def test_settings_env_overrides(monkeypatch):
+    monkeypatch.setenv("CHORA_REWRITE_MAP_REDUCE", "0")
+    monkeypatch.setenv("CHORA_REWRITE_MAP_REDUCE_THRESHOLD", "5000")
+
+    settings = resolve_map_reduce_settings({"rewrite_map_reduce": True, "rewrite_chunk_tokens": 8000})
+
+    assert not settings.enabled
+    assert settings.threshold_tokens == 5000
+    assert settings.chunk_tokens == 8000
+
+
+@pytest.fixture
+def long_item(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.delenv("CHORA_REWRITE_MAP_REDUCE", raising=False)
+    monkeypatch.setenv("CHORA_REWRITE_CACHE", "0")
+    config = {
+        "api_keys": {"llm": {"api_key": "k", "base_url": "https://x/v1/chat/completions", "model": "m"}},
+        "settings": {"rewrite_map_reduce_threshold_tokens": 2000, "rewrite_chunk_tokens": 1000},
+    }
+    monkeypatch.setattr(rewrite_service, "load_config", lambda: config)
+    segments = [Segment(i * 10.0, i * 10.0 + 9.0, "内容" * 100 + "。") for i in range(30)]
+    (tmp_path / "transcript.md").write_text("".join(s.text for s in segments), encoding="utf-8")
+    write_segments(segments_path_for(str(tmp_path)), segments, source="whisper")
+    (tmp_path / "metadata.md").write_text("# 标题\n\n## 来源\n播客\n", encoding="utf-8")
+    return tmp_path
+
+
+def _reply(prompt):
+    if "转录片段" in prompt:
+        return "## 话题与论点\n- 要点"
+    return "<METADATA_SECTION>\n## 嘉宾\n张三\n\n## 金句\n> 一句\n</METADATA_SECTION>\n<REWRITE_SECTION>\n正文\n</REWRITE_SECTION>"
+
+
+def test_rewrite_content_maps_long_transcripts_then_reduces(long_item, monkeypatch):
+    client = _FakeClient(_reply)
+    monkeypatch.setattr(rewrite_service, "get_llm_client", lambda: client)
+    monkeypatch.setattr(rewrite_mapreduce, "get_llm_client", lambda: client)
+
+    ok = rewrite_service.rewrite_content(
+        str(long_item / "transcript.md"), str(long_item / "metadata.md"), str(long_item / "rewritten.md")
+    )
+
+    assert ok
+    map_prompts = [p for p in client.prompts if "转录片段" in p]
+    reduce_prompt = client.prompts[-1]
+    assert len(map_prompts) >= 3
+    assert "内容内容" not in reduce_prompt
+    assert f"### 第 1/{len(map_prompts)} 段（0:00:00" in reduce_prompt
+    assert (long_item / "rewritten.md").read_text(encoding="utf-8").startswith("正文")
+    assert "## 嘉宾\n张三" in (long_item / "metadata.md").read_text(encoding="utf-8")
+
+
+def test_rewrite_content_fails_when_a_chunk_fails(long_item, monkeypatch):
+    class _Failing(_FakeClient):
+        def generate(self, endpoint, prompt, **kwargs):
+            if "的第 2/" in prompt:
+                raise LLMError("HTTP 500", 500)
+            return super().generate(endpoint, prompt, **kwargs)
+
+    client = _Failing(_reply)
+    monkeypatch.setattr(rewrite_service, "get_llm_client", lambda: client)
+    monkeypatch.setattr(rewrite_mapreduce, "get_llm_client", lambda: client)
+
+    ok = rewrite_service.rewrite_content(
+        str(long_item / "transcript.md"), str(long_item / "metadata.md"), str(long_item / "rewritten.md")
+    )
+
+    assert not ok
+    assert not (long_item / "rewritten.md").exists()
@@ -0,0 +1,155 @@
+import threading
+
+from llm_client import LLMCallEvent, estimate_tokens
+from rewrite_scheduler import AdaptiveConcurrency, QueueItem, latency_bucket, run_queue
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _ok(latency=1.0, prompt_tokens=0):
+    return LLMCallEvent(200, latency, latency, ok=True, prompt_tokens=prompt_tokens)
+
+
+def test_additive_increase_up_to_max():
+    controller = AdaptiveConcurrency(4, initial=1)
+
+    for _ in range(20):
+        controller.observe(_ok())
+
+    assert controller.limit == 4
+
+
+def test_overload_halves_once_per_cooldown():
+    clock = _Clock()
+    controller = AdaptiveConcurrency(8, initial=8, cooldown=10, clock=clock)
+
+    controller.observe(LLMCallEvent(429, 0.5))
+    controller.observe(LLMCallEvent(503, 0.5))
+    assert controller.limit == 4
+
+    clock.now = 11
+    controller.observe(LLMCallEvent(None, 0.5))
+    assert controller.limit == 2
+
+    clock.now = 30
+    for _ in range(3):
+        controller.observe(LLMCallEvent(429, 0.5))
+        clock.now += 11
+    assert controller.limit == 1
+
+
+def test_client_errors_do_not_change_limit():
+    controller = AdaptiveConcurrency(8, initial=4)
+
+    controller.observe(LLMCallEvent(400, 0.5))
+
+    assert controller.limit == 4
+
+
+def test_latency_above_baseline_backs_off_gently():
+    controller = AdaptiveConcurrency(8, initial=4)
+    controller.observe(_ok(2.0))
+    controller.observe(_ok(2.0))
+    assert controller.limit == 4
+
+    controller.observe(_ok(10.0))
+
+    assert controller.limit == 3
+
+
+def test_long_prompts_are_compared_with_long_prompts():
+    clock = _Clock()
+    controller = AdaptiveConcurrency(8, initial=4, clock=clock)
+    # 短稿首字 2 秒，长稿（预填充 4 万 token）首字 20 秒，都是正常延迟
+    for _ in range(3):
+        controller.observe(_ok(2.0, prompt_tokens=4000))
+        controller.observe(_ok(20.0, prompt_tokens=40000))
+        controller.observe(_ok(2.5, prompt_tokens=5000))
+    assert controller.limit == 5
+
+    # 同档长稿的首字延迟翻了三倍才算拥塞
+    clock.now = 100
+    controller.observe(_ok(60.0, prompt_tokens=45000))
+
+    assert controller.limit == 4
+
+
+def test_latency_buckets_double():
+    assert latency_bucket(0) == latency_bucket(1999) == 0
+    assert latency_bucket(2000) == latency_bucket(3999) == 1
+    assert latency_bucket(4000) == 2
+    assert latency_bucket(40000) == latency_bucket(45000) == 5
+
+
+def test_run_queue_keeps_limit_in_flight_and_starts_costliest_first():
+    controller = AdaptiveConcurrency(2, initial=2)
+    lock = threading.Lock()
+    started, peak, active = [], [0], [0]
+
+    def work(item):
+        with lock:
+            started.append(item.key)
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        threading.Event().wait(0.01)
+        with lock:
+            active[0] -= 1
+        return item.key != "b"
+
+    items = [QueueItem(key, tokens, {}) for key, tokens in (("a", 10), ("b", 30), ("c", 20), ("d", 5))]
+    done = []
+
+    results = run_queue(
+        items, work, controller, large_tokens=1000, on_done=lambda item, ok: done.append(item.key)
+    )
+
+    assert results == {"a": True, "b": False, "c": True, "d": True}
+    assert set(started[:2]) == {"b", "c"}
+    assert peak[0] <= 2
+    assert sorted(done) == ["a", "b", "c", "d"]
+    assert controller.in_flight == 0
+
+
+def test_large_items_hold_at_most_half_the_slots():
+    controller = AdaptiveConcurrency(4, initial=4)
+    lock = threading.Lock()
+    running_large, peak_large = [0], [0]
+
+    def work(item):
+        large = item.tokens > 100
+        with lock:
+            running_large[0] += large
+            peak_large[0] = max(peak_large[0], running_large[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running_large[0] -= large
+        return True
+
+    items = [QueueItem(f"L{i}", 500 + i, {}) for i in range(4)] + [
+        QueueItem(f"s{i}", 10, {}) for i in range(4)
+    ]
+
+    results = run_queue(items, work, controller, large_tokens=100)
+
+    assert all(results.values()) and len(results) == 8
+    assert peak_large[0] == 2
+
+
+def test_work_exceptions_count_as_failures():
+    controller = AdaptiveConcurrency(2)
+
+    def work(item):
+        raise RuntimeError("boom")
+
+    assert run_queue([QueueItem("x", 1, {})], work, controller, large_tokens=10) == {"x": False}
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("你好世界") == 4
+    assert estimate_tokens("a" * 40) == 10
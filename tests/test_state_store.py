@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from state_store import STATUS_FAILED, StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    legacy = tmp_path / "state.yaml"
+    legacy.write_text("processed_ids:\n- old1\n- old2\n", encoding="utf-8")
+    return StateStore(str(tmp_path / "state.db"), legacy_path=str(legacy))
+
+
+def test_imports_legacy_processed_ids_once(store, tmp_path):
+    assert store.is_processed("old1")
+    assert store.processed_ids() == {"old1", "old2"}
+
+    (tmp_path / "state.yaml").write_text("processed_ids:\n- late\n", encoding="utf-8")
+    reopened = StateStore(store.path, legacy_path=str(tmp_path / "state.yaml"))
+
+    assert not reopened.is_processed("late")
+
+
+def test_rewritten_stage_marks_item_processed(store):
+    store.record_item("v1", platform="youtube", title="Talk")
+    store.mark_stage("v1", "fetched")
+    store.mark_stage("v1", "transcribed")
+    assert not store.is_processed("v1")
+
+    store.mark_stage("v1", "rewritten")
+
+    assert store.is_processed("v1")
+    assert store.next_stage("v1") == "covered"
+
+
+def test_failed_stage_is_where_item_resumes(store):
+    store.mark_stage("e1", "fetched")
+    store.mark_stage("e1", "transcribed", STATUS_FAILED, "groq 429")
+
+    assert store.stage_status("e1", "transcribed") == "failed"
+    assert store.stages("e1")["transcribed"].detail == "groq 429"
+    assert store.pending_items() == [("e1", "transcribed")]
+
+
+def test_record_item_keeps_known_fields(store):
+    store.record_item("v2", platform="youtube", title="Title", url="https://x")
+    store.record_item("v2", folder="content_archive/2026-10-01/youtube_x")
+
+    item = store.item("v2")
+    assert (item["title"], item["url"], item["folder"]) == (
+        "Title",
+        "https://x",
+        "content_archive/2026-10-01/youtube_x",
+    )
+
+
+def test_unknown_stage_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.mark_stage("v3", "published")
+
+
+def test_concurrent_writers_from_threads(store):
+    def work(n):
+        for i in range(20):
+            store.mark_stage(f"t{n}-{i}", "rewritten")
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store.processed_ids()) == 2 + 80
+
+
+def test_scan_cursor_persists(store):
+    assert store.load_cursor("youtube:UC1") is None
+
+    store.save_cursor("youtube:UC1", {"published": "2026-10-15", "ids": ["a"], "filters": "f"})
+
+    assert StateStore(store.path).load_cursor("youtube:UC1")["ids"] == ["a"]
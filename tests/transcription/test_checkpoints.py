@@ -0,0 +1,75 @@
+import process_podcast
+from transcription.checkpoints import CheckpointStore, chunk_key
+from transcription.chunking import AudioChunk
+
+CONFIG = {"api_keys": {"groq": "test-key"}, "settings": {}}
+
+
+def test_store_persists_and_latest_record_wins(tmp_path):
+    path = str(tmp_path / "transcript_chunks.jsonl")
+    chunk = AudioChunk(0, 0.0, 600.0)
+    key = chunk_key(chunk, "ab" * 32)
+    store = CheckpointStore(path)
+
+    store.record_failed(key, chunk, "timeout")
+    store.record_done(key, chunk, "hello")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "half-written')
+
+    reloaded = CheckpointStore(path)
+    assert reloaded.done_text(key) == "hello"
+    assert reloaded.done_text(chunk_key(chunk, "cd" * 32)) is None
+
+
+def test_key_depends_on_audio_and_offsets():
+    chunk = AudioChunk(0, 0.0, 600.0)
+
+    assert chunk_key(chunk, "a" * 64) != chunk_key(AudioChunk(0, 0.0, 598.0), "a" * 64)
+    assert chunk_key(chunk, "a" * 64) != chunk_key(chunk, "b" * 64)
+
+
+def _fake_split(tmp_path):
+    def split_audio(audio_path, settings, work_dir):
+        chunks = []
+        for i, (start, end) in enumerate([(0, 600), (600, 1200), (1200, 1500)]):
+            path = tmp_path / f"chunk_{i}.ogg"
+            path.write_bytes(f"audio {i}".encode())
+            chunks.append(AudioChunk(i, start, end, path=str(path)))
+        return chunks
+
+    return split_audio
+
+
+class _Engine:
+    max_workers = 3
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = []
+
+    def transcribe(self, path, audio_seconds=0.0):
+        index = int(path.rsplit("_", 1)[1].split(".")[0])
+        self.calls.append(index)
+        if index in self.failing:
+            raise RuntimeError("server error")
+        return {"text": f"text {index}", "engine": "groq"}
+
+
+def test_rerun_only_transcribes_missing_chunks(monkeypatch, tmp_path):
+    failing = {1}
+    engine = _Engine(failing)
+    calls = engine.calls
+
+    monkeypatch.setattr(process_podcast, "split_audio", _fake_split(tmp_path))
+    monkeypatch.setattr(process_podcast, "build_engine", lambda config: engine)
+    checkpoint = str(tmp_path / "transcript_chunks.jsonl")
+
+    assert process_podcast.transcribe_audio("audio.m4a", CONFIG, checkpoint) is None
+    assert sorted(calls) == [0, 1, 2]
+
+    calls.clear()
+    failing.clear()
+    transcript = process_podcast.transcribe_audio("audio.m4a", CONFIG, checkpoint)
+
+    assert calls == [1]
+    assert transcript == "text 0\ntext 1\ntext 2"
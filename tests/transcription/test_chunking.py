@@ -0,0 +1,127 @@
+import subprocess
+
+from transcription.chunking import (
+    UPLOAD_BYTES_PER_SECOND,
+    AudioChunk,
+    ChunkSettings,
+    Silence,
+    extract_chunks,
+    join_transcripts,
+    merge_overlap,
+    parse_silencedetect,
+    plan_chunks,
+    resolve_chunk_settings,
+    transcode_for_upload,
+)
+
+SETTINGS = ChunkSettings(target_seconds=600, min_seconds=60, search_window=120, overlap_seconds=3)
+
+FFMPEG_STDERR = """\
+Input #0, mp3, from 'audio.mp3':
+  Duration: 01:02:03.50, start: 0.025057, bitrate: 128 kb/s
+[silencedetect @ 0x600] silence_start: -0.01
+[silencedetect @ 0x600] silence_end: 1.2 | silence_duration: 1.21
+[silencedetect @ 0x600] silence_start: 590.4
+[silencedetect @ 0x600] silence_end: 591.0 | silence_duration: 0.6
+[silencedetect @ 0x600] silence_start: 3720.0
+"""
+
+
+def test_parse_silencedetect_reads_duration_and_intervals():
+    duration, silences = parse_silencedetect(FFMPEG_STDERR)
+
+    assert duration == 3723.5
+    assert silences == [Silence(0.0, 1.2), Silence(590.4, 591.0), Silence(3720.0, 3723.5)]
+
+
+def test_plan_cuts_at_pause_closest_to_target():
+    silences = [Silence(500, 501), Silence(640, 641), Silence(1250, 1252)]
+
+    chunks = plan_chunks(1800, silences, SETTINGS)
+
+    assert [(c.start, c.end) for c in chunks] == [(0, 640.5), (640.5, 1251), (1251, 1800)]
+    assert all(c.overlap == 0 for c in chunks)
+
+
+def test_short_audio_is_a_single_chunk():
+    assert plan_chunks(650, [], SETTINGS) == [AudioChunk(0, 0.0, 650)]
+
+
+def test_no_pause_hard_cuts_with_overlap():
+    chunks = plan_chunks(1500, [Silence(100, 101)], SETTINGS)
+
+    assert chunks[0].end == 600
+    assert chunks[1].start == 597 and chunks[1].overlap == 3
+    assert chunks[-1].end == 1500
+
+
+def test_byte_limit_caps_chunk_length():
+    # 1 MB at the Opus upload rate is ~262 s, below the 600 s target
+    settings = ChunkSettings(target_seconds=600, max_upload_bytes=1024 * 1024)
+    max_len = settings.max_upload_bytes / UPLOAD_BYTES_PER_SECOND
+
+    chunks = plan_chunks(3600, [], settings)
+
+    assert len(chunks) > 12
+    assert all(c.duration <= max_len for c in chunks)
+
+
+def test_two_hour_episode_needs_far_fewer_requests():
+    silences = [Silence(t, t + 0.8) for t in range(30, 7200, 45)]
+
+    assert len(plan_chunks(7200, silences, SETTINGS)) <= 13
+
+
+def test_merge_overlap_drops_repeated_prefix():
+    previous = "我们今天聊的是分布式系统里的一致性问题，尤其是"
+    current = "系统里的一致性问题，尤其是在网络分区的时候"
+
+    assert merge_overlap(previous, current) == "在网络分区的时候"
+    assert merge_overlap("完全不同的内容在这里结束了", current) == current
+
+
+def test_join_only_dedupes_overlapping_chunks():
+    chunks = [AudioChunk(0, 0, 600), AudioChunk(1, 597, 1200, overlap=3), AudioChunk(2, 1200, 1500)]
+    texts = [
+        "and that is why the protocol needs a quorum of replicas",
+        "a quorum of replicas before it commits anything",
+        "a quorum of replicas is the next topic",
+    ]
+
+    assert join_transcripts(texts, chunks).splitlines() == [
+        texts[0],
+        "before it commits anything",
+        texts[2],
+    ]
+
+
+def test_resolve_chunk_settings_env_overrides(monkeypatch):
+    monkeypatch.setenv("CHORA_CHUNK_TARGET_SECONDS", "900")
+
+    settings = resolve_chunk_settings(
+        {"transcribe_max_upload_mb": 10, "transcribe_chunk_target_seconds": 300}
+    )
+
+    assert settings.target_seconds == 900
+    assert settings.max_upload_bytes == 10 * 1024 * 1024
+
+
+def test_transcode_once_then_stream_copy(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr=FFMPEG_STDERR)
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    compact = str(tmp_path / "all.ogg")
+
+    duration, _ = transcode_for_upload("audio.m4a", compact, SETTINGS)
+    chunks = extract_chunks(compact, plan_chunks(duration, [], SETTINGS), str(tmp_path))
+
+    transcode, *cuts = calls
+    assert transcode[transcode.index("-ar") + 1] == "16000"
+    assert transcode[transcode.index("-c:a") + 1] == "libopus"
+    assert len(cuts) == len(chunks) > 1
+    assert all(cmd[cmd.index("-c") + 1] == "copy" and cmd[cmd.index("-i") + 1] == compact for cmd in cuts)
+    assert chunks[0].path.endswith("temp_chunk_000.ogg")
@@ -0,0 +1,101 @@
+import sys
+import types
+
+import pytest
+
+from transcription import engines
+from transcription.engines import LocalWhisperEngine, RemoteSaturated, SpilloverRouter, build_engine
+
+
+class _Remote:
+    max_workers = 3
+
+    def __init__(self, wait):
+        self.wait = wait
+        self.calls = []
+
+    def transcribe(self, path, audio_seconds=0.0, *, max_wait=None):
+        self.calls.append(max_wait)
+        if max_wait is not None and self.wait > max_wait:
+            raise RemoteSaturated(self.wait)
+        return {"text": "remote", "engine": "groq"}
+
+
+class _Local:
+    max_workers = 1
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, path, audio_seconds=0.0):
+        self.calls += 1
+        return {"text": "local", "engine": "local"}
+
+
+def test_router_uses_remote_while_limiter_has_room():
+    router = SpilloverRouter(_Remote(wait=5), _Local(), spill_after=30)
+
+    assert router.transcribe("chunk.ogg", 600)["engine"] == "groq"
+    assert router.max_workers == 4
+
+
+def test_router_spills_to_local_when_remote_saturated():
+    local = _Local()
+    router = SpilloverRouter(_Remote(wait=120), local, spill_after=30)
+
+    assert router.transcribe("chunk.ogg", 600)["engine"] == "local"
+    assert local.calls == 1
+
+
+def test_router_queues_for_remote_when_local_slots_busy():
+    remote = _Remote(wait=120)
+    router = SpilloverRouter(remote, _Local(), spill_after=30)
+    router._claim_local()
+
+    assert router.transcribe("chunk.ogg", 600)["engine"] == "groq"
+    assert remote.calls == [None]
+
+
+def test_local_engine_returns_verbose_json_payload(monkeypatch):
+    segment = types.SimpleNamespace(start=0.0, end=2.0, text=" 你好")
+
+    class WhisperModel:
+        def __init__(self, size, **kwargs):
+            assert kwargs["compute_type"] == "int8" and kwargs["device"] == "cpu"
+
+        def transcribe(self, path, **kwargs):
+            return iter([segment]), types.SimpleNamespace(language="zh")
+
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=WhisperModel))
+
+    payload = LocalWhisperEngine().transcribe("chunk.ogg")
+
+    assert payload == {
+        "text": "你好",
+        "language": "zh",
+        "segments": [{"start": 0.0, "end": 2.0, "text": " 你好"}],
+        "engine": "local",
+    }
+
+
+@pytest.mark.parametrize(
+    "mode, available, expected",
+    [
+        ("auto", True, SpilloverRouter),
+        ("auto", False, engines.GroqWhisperEngine),
+        ("groq", True, engines.GroqWhisperEngine),
+        ("local", True, LocalWhisperEngine),
+    ],
+)
+def test_build_engine_selection(monkeypatch, mode, available, expected):
+    monkeypatch.setattr(engines, "local_engine_available", lambda: available)
+    monkeypatch.setattr(engines, "get_groq_limiter", lambda settings: None)
+    monkeypatch.setenv("CHORA_TRANSCRIBE_ENGINE", mode)
+
+    assert isinstance(build_engine({"api_keys": {"groq": "test-key"}, "settings": {}}), expected)
+
+
+def test_local_mode_without_faster_whisper_is_unusable(monkeypatch):
+    monkeypatch.setattr(engines, "local_engine_available", lambda: False)
+
+    assert build_engine({"api_keys": {}, "settings": {"transcribe_engine": "local"}}) is None
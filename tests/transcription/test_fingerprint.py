@@ -0,0 +1,114 @@
+import math
+import random
+
+import pytest
+
+from state_store import StateStore
+from transcription import fingerprint
+from transcription.fingerprint import (
+    FINGERPRINT_RATE,
+    best_match,
+    find_duplicate,
+    fingerprint_samples,
+    resolve_fingerprint_settings,
+    skip_if_duplicate,
+)
+
+SECONDS = 30
+
+
+def _speechlike(seed, seconds=SECONDS):
+    """Tone bursts separated by short noisy gaps (stand-in for syllables)."""
+    rng = random.Random(seed)
+    samples = []
+    while len(samples) < seconds * FINGERPRINT_RATE:
+        freq, amp = rng.uniform(100, 1800), rng.uniform(2000, 9000)
+        burst = int(rng.uniform(0.05, 0.3) * FINGERPRINT_RATE)
+        start = len(samples)
+        samples += [amp * math.sin(2 * math.pi * freq * (start + i) / FINGERPRINT_RATE) for i in range(burst)]
+        samples += [rng.gauss(0, 50) for _ in range(int(rng.uniform(0.01, 0.1) * FINGERPRINT_RATE))]
+    return samples[: seconds * FINGERPRINT_RATE]
+
+
+@pytest.fixture(scope="module")
+def original():
+    return _speechlike(1)
+
+
+@pytest.fixture(scope="module")
+def reupload(original):
+    # 不同片头、音量和底噪的重新上传
+    rng = random.Random(2)
+    intro = [rng.gauss(0, 300) for _ in range(int(4.5 * FINGERPRINT_RATE))]
+    return (intro + [0.7 * x + rng.gauss(0, 200) for x in original])[: SECONDS * FINGERPRINT_RATE]
+
+
+def test_reupload_matches_at_consistent_offset(original, reupload):
+    hits = [(hash_, "xyz", frame) for hash_, frame in fingerprint_samples(original)]
+
+    match = best_match(fingerprint_samples(reupload), hits)
+
+    assert match.content_id == "xyz"
+    assert match.matches >= 20
+    assert match.offset_seconds == pytest.approx(-4.5, abs=0.1)
+    assert match.coverage >= 0.5
+
+
+def test_different_audio_does_not_match(original):
+    hits = [(hash_, "xyz", frame) for hash_, frame in fingerprint_samples(original)]
+
+    match = best_match(fingerprint_samples(_speechlike(3)), hits)
+
+    assert match is None or match.matches < 5
+
+
+def test_shared_intro_with_different_bodies_is_not_a_duplicate(monkeypatch, tmp_path):
+    store = StateStore(str(tmp_path / "state.db"), legacy_path=None)
+    jingle = _speechlike(9, seconds=8)
+    audio = {
+        "ep1.m4a": jingle + _speechlike(10, seconds=SECONDS - 8),
+        "ep2.m4a": jingle + _speechlike(11, seconds=SECONDS - 8),
+    }
+    monkeypatch.setattr(fingerprint, "decode_pcm", lambda source, seconds: audio[source])
+
+    assert find_duplicate("ep-1", "ep1.m4a", {}, store=store) is None
+    store.mark_processed("ep-1")
+    query = fingerprint_samples(audio["ep2.m4a"])
+    match = best_match(query, store.fingerprint_hits([hash_ for hash_, _ in query]))
+
+    # 片头本身对齐命中很多，但只覆盖窗口开头
+    assert match.content_id == "ep-1" and match.matches >= 20
+    assert match.coverage < 0.5
+    assert not skip_if_duplicate("ep-2", "ep2.m4a", {}, store=store)
+    assert not store.is_processed("ep-2")
+
+
+def test_unfinished_items_are_not_duplicate_targets(monkeypatch, tmp_path, original, reupload):
+    store = StateStore(str(tmp_path / "state.db"), legacy_path=None)
+    audio = {"a.m4a": original, "b.webm": reupload}
+    monkeypatch.setattr(fingerprint, "decode_pcm", lambda source, seconds: audio[source])
+
+    assert find_duplicate("episode-1", "a.m4a", {}, store=store) is None
+    # episode-1 中途失败，从未处理完成
+
+    assert not skip_if_duplicate("video-1", "b.webm", {}, store=store)
+    assert not store.is_processed("video-1")
+
+
+def test_duplicate_is_skipped_and_marked_processed(monkeypatch, tmp_path, original, reupload):
+    store = StateStore(str(tmp_path / "state.db"), legacy_path=None)
+    audio = {"a.m4a": original, "b.webm": reupload}
+    monkeypatch.setattr(fingerprint, "decode_pcm", lambda source, seconds: audio[source])
+
+    assert find_duplicate("episode-1", "a.m4a", {}, store=store) is None
+    store.mark_processed("episode-1")
+    assert find_duplicate("episode-1", "a.m4a", {}, store=store) is None  # 重跑不会匹配自己
+    assert skip_if_duplicate("video-1", "b.webm", {}, store=store)
+    assert store.is_processed("video-1")
+    assert store.stages("video-1")["transcribed"].detail == "duplicate of episode-1"
+
+
+def test_settings_env_override(monkeypatch):
+    assert resolve_fingerprint_settings({"fingerprint_seconds": 90}).seconds == 90
+    monkeypatch.setenv("CHORA_FINGERPRINT_DEDUPE", "0")
+    assert not resolve_fingerprint_settings({"fingerprint_dedupe": True}).enabled
@@ -0,0 +1,107 @@
+import pytest
+
+from transcription.engines import GroqWhisperEngine
+from transcription.rate_limit import Bucket, RateLimiter, groq_buckets, parse_duration, parse_retry_hint
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _limiter(tmp_path, clock, buckets=None):
+    buckets = buckets or {"requests": Bucket(capacity=2, refill_per_second=1 / 3)}
+    return RateLimiter("test", buckets, state_dir=str(tmp_path), clock=clock, sleep=clock.sleep)
+
+
+@pytest.mark.parametrize(
+    "text, seconds",
+    [("2m24s", 144), ("1m36.5s", 96.5), ("7.66s", 7.66), ("1h2m", 3720), ("120ms", 0.12), ("30", 30)],
+)
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == pytest.approx(seconds)
+
+
+def test_parse_retry_hint():
+    message = "Rate limit reached for model whisper-large-v3. Please try again in 2m24s. Visit ..."
+
+    assert parse_retry_hint(message) == 144
+    assert parse_retry_hint("internal server error") is None
+
+
+def test_requests_are_paced_after_burst(tmp_path):
+    clock = FakeClock()
+    limiter = _limiter(tmp_path, clock)
+
+    waits = [limiter.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0, 0]
+    assert waits[2] == pytest.approx(3) and waits[3] == pytest.approx(3)
+
+
+def test_audio_seconds_bucket_charges_chunk_duration(tmp_path):
+    clock = FakeClock()
+    limiter = _limiter(tmp_path, clock, groq_buckets({"groq_audio_seconds_per_hour": 3600}))
+
+    assert limiter.try_acquire({"audio_seconds": 600}) == 0
+    assert limiter.try_acquire({"audio_seconds": 600}) == pytest.approx(600)
+
+
+def test_block_is_shared_between_instances(tmp_path):
+    clock = FakeClock()
+    first, second = _limiter(tmp_path, clock), _limiter(tmp_path, clock)
+
+    first.block_for(90)
+
+    assert second.try_acquire() == pytest.approx(90)
+    clock.now += 90
+    assert second.try_acquire() == 0
+
+
+def test_exhausted_headers_pause_until_reset(tmp_path):
+    clock = FakeClock()
+    limiter = _limiter(tmp_path, clock)
+
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "9s"})
+    assert limiter.try_acquire() == 0
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m0s"})
+    assert limiter.try_acquire() == pytest.approx(60)
+
+
+class _RawResponse:
+    headers = {"x-ratelimit-remaining-requests": "10"}
+
+    def parse(self):
+        return {"text": "hello world", "segments": [{"start": 0.0, "end": 1.5, "text": "hello world"}]}
+
+
+class _FlakyTranscriptions:
+    def __init__(self):
+        self.calls = 0
+        self.with_raw_response = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("Error code: 429 - Please try again in 4s")
+        return _RawResponse()
+
+
+def test_groq_engine_pauses_limiter_on_429(tmp_path):
+    clock = FakeClock()
+    limiter = _limiter(tmp_path, clock)
+    transcriptions = _FlakyTranscriptions()
+    client = type("Client", (), {"audio": type("Audio", (), {"transcriptions": transcriptions})})()
+    chunk = tmp_path / "temp_chunk_000.ogg"
+    chunk.write_bytes(b"audio")
+
+    assert GroqWhisperEngine(client, limiter).transcribe(str(chunk), 600)["text"] == "hello world"
+    assert transcriptions.calls == 2
+    # 4s hint + 5s margin, spent waiting in the limiter rather than a per-thread sleep
+    assert clock.now == pytest.approx(1009)
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from transcription import scratch
+from transcription.scratch import ScratchSettings, resolve_scratch_settings, scratch_dir, scratch_root
+
+
+def test_scratch_dirs_are_private_and_removed(tmp_path):
+    settings = ScratchSettings(root=str(tmp_path))
+
+    with scratch_dir(settings) as first, scratch_dir(settings) as second:
+        assert first != second
+        assert os.path.dirname(first) == str(tmp_path)
+        open(os.path.join(first, "temp_chunk_000.ogg"), "wb").close()
+
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+def test_scratch_dir_removed_on_failure(tmp_path):
+    with pytest.raises(RuntimeError):
+        with scratch_dir(ScratchSettings(root=str(tmp_path))) as path:
+            open(os.path.join(path, "audio.ogg"), "wb").close()
+            raise RuntimeError("transcription failed")
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_tmpfs_used_only_with_room(monkeypatch, tmp_path):
+    shm = tmp_path / "shm"
+    shm.mkdir()
+    monkeypatch.setattr(scratch, "TMPFS_ROOT", str(shm))
+    disk = str(tmp_path / "disk")
+
+    assert scratch_root(ScratchSettings(root=disk, tmpfs=True, min_free_bytes=1)) == str(shm)
+    assert scratch_root(ScratchSettings(root=disk, tmpfs=True, min_free_bytes=1 << 60)) == disk
+    assert scratch_root(ScratchSettings(root=disk)) == disk
+
+
+def test_resolve_scratch_settings_env_overrides(monkeypatch):
+    monkeypatch.setenv("CHORA_SCRATCH_TMPFS", "1")
+
+    settings = resolve_scratch_settings({"transcribe_scratch_tmpfs": False, "transcribe_scratch_dir": "/x"})
+
+    assert settings.tmpfs is True
+    assert settings.root == "/x"
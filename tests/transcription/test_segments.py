@@ -0,0 +1,86 @@
+import process_podcast
+from transcription.chunking import AudioChunk
+from transcription.segments import (
+    Segment,
+    load_segments,
+    merge_chunk_segments,
+    segments_between,
+    segments_from_whisper,
+    segments_path_for,
+    segments_text,
+    write_segments,
+)
+
+
+def test_whisper_segments_get_chunk_offset():
+    payload = {
+        "text": "a b",
+        "segments": [{"start": 0.0, "end": 2.5, "text": " a"}, {"start": 2.5, "end": 4, "text": " "}],
+    }
+
+    assert segments_from_whisper(payload, 600) == [Segment(600.0, 602.5, " a")]
+
+
+def test_overlap_deduplicated_at_midpoint():
+    chunks = [AudioChunk(0, 0, 600), AudioChunk(1, 597, 1200, overlap=3)]
+    first = [Segment(590, 596, " one"), Segment(596, 599.8, " two")]
+    second = [Segment(597.2, 599.9, " two"), Segment(599.9, 604, " three")]
+
+    kept = merge_chunk_segments(chunks, [first, second])
+
+    assert segments_text(kept[0] + kept[1]) == "one two three"
+
+
+def test_sidecar_roundtrip_and_range(tmp_path):
+    path = segments_path_for(str(tmp_path))
+    segments = [Segment(0, 4.123, "大家好"), Segment(4.123, 9, "今天聊聊")]
+
+    write_segments(path, segments, source="whisper", language="zh")
+
+    loaded = load_segments(path)
+    assert loaded[0] == Segment(0, 4.12, "大家好")
+    assert segments_between(loaded, 5, 6) == [loaded[1]]
+    assert load_segments(str(tmp_path / "missing.json")) == []
+
+
+def test_transcribe_audio_writes_time_coded_sidecar(monkeypatch, tmp_path):
+    def split_audio(audio_path, settings, work_dir):
+        chunks = []
+        for i, (start, end, overlap) in enumerate([(0, 600, 0), (597, 900, 3)]):
+            path = tmp_path / f"chunk_{i}.ogg"
+            path.write_bytes(f"audio {i}".encode())
+            chunks.append(AudioChunk(i, start, end, overlap, path=str(path)))
+        return chunks
+
+    responses = {
+        0: {
+            "text": " hello there",
+            "language": "english",
+            "segments": [
+                {"start": 0, "end": 598.5, "text": " hello"},
+                {"start": 598.5, "end": 600, "text": " there"},
+            ],
+        },
+        1: {
+            "text": " there friend",
+            "segments": [
+                {"start": 1.6, "end": 2.9, "text": " there"},
+                {"start": 2.9, "end": 300, "text": " friend"},
+            ],
+        },
+    }
+    monkeypatch.setattr(process_podcast, "split_audio", split_audio)
+    engine = type(
+        "Engine",
+        (),
+        {"max_workers": 2, "transcribe": lambda self, path, seconds: responses[int(path[-5])]},
+    )()
+    monkeypatch.setattr(process_podcast, "build_engine", lambda config: engine)
+    config = {"api_keys": {"groq": "test-key"}, "settings": {}}
+
+    transcript = process_podcast.transcribe_audio(
+        "audio.m4a", config, str(tmp_path / "transcript_chunks.jsonl")
+    )
+
+    assert transcript == "hello\nthere friend"
+    assert [s.start for s in load_segments(segments_path_for(str(tmp_path)))] == [0, 598.6, 599.9]
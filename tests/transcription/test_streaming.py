@@ -0,0 +1,106 @@
+import io
+from dataclasses import replace
+
+import pytest
+
+import process_podcast
+from transcription import streaming
+from transcription.chunking import ChunkPlanner, ChunkSettings, Silence, plan_chunks
+from transcription.streaming import StreamingError, StreamingTranscoder, stream_chunks, streaming_enabled
+
+SETTINGS = ChunkSettings(target_seconds=600, min_seconds=60, search_window=120, overlap_seconds=3)
+SILENCES = [Silence(t, t + 0.8) for t in (130, 640, 1190, 1260, 2050)]
+
+
+def test_incremental_planner_matches_whole_file_plan():
+    planner = ChunkPlanner(SETTINGS)
+    chunks = []
+    for settled in range(0, 2600, 25):
+        known = [s for s in SILENCES if s.end <= settled]
+        chunks += planner.ready(known, settled)
+    chunks += planner.finish(2600, SILENCES)
+
+    assert chunks == plan_chunks(2600, SILENCES, SETTINGS)
+
+
+def test_planner_waits_for_the_search_window():
+    planner = ChunkPlanner(SETTINGS)
+
+    assert planner.ready(SILENCES[:2], 700) == []
+    assert [c.end for c in planner.ready(SILENCES[:2], 721)] == [640.4]
+
+
+class _FakeProc:
+    def __init__(self, stdout, stderr, returncode=0):
+        self.stdin = io.BytesIO()
+        self.stdout = io.BytesIO(stdout.encode())
+        self.stderr = io.BytesIO(stderr.encode())
+        self.returncode = returncode
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+def _transcoder(tmp_path, stdout, stderr, returncode=0):
+    proc = _FakeProc(stdout, stderr, returncode)
+    return StreamingTranscoder(str(tmp_path / "audio.ogg"), SETTINGS, popen=lambda *a, **k: proc), proc
+
+
+def test_stream_chunks_from_ffmpeg_output(monkeypatch, tmp_path):
+    monkeypatch.setattr(streaming, "extract_chunk", lambda path, chunk, work_dir: replace(chunk, path="x"))
+    stderr = "[silencedetect @ 0x1] silence_start: 640\n[silencedetect @ 0x1] silence_end: 640.8 | d: 0.8\n"
+    stdout = "out_time_us=500000000\nout_time_us=900000000\nprogress=end\n"
+    transcoder, proc = _transcoder(tmp_path, stdout, stderr)
+
+    transcoder.feed(b"audio bytes")
+    chunks = list(stream_chunks(transcoder, ChunkPlanner(SETTINGS), str(tmp_path), poll_seconds=0.01))
+
+    assert proc.stdin.getvalue() == b"audio bytes"
+    assert [(c.start, c.end) for c in chunks] == [(0, 640.4), (640.4, 900)]
+
+
+def test_ffmpeg_failure_raises_streaming_error(tmp_path):
+    transcoder, _ = _transcoder(tmp_path, "", "moov atom not found\n", returncode=1)
+
+    with pytest.raises(StreamingError, match="moov atom not found"):
+        list(stream_chunks(transcoder, ChunkPlanner(SETTINGS), str(tmp_path), poll_seconds=0.01))
+
+
+def test_streaming_falls_back_to_downloaded_file(monkeypatch, tmp_path):
+    audio_path = str(tmp_path / "audio.m4a")
+
+    def download_audio(url, path, on_chunk=None):
+        on_chunk(b"data")
+        with open(path, "wb") as f:
+            f.write(b"data")
+        return True
+
+    monkeypatch.setattr(process_podcast, "download_audio", download_audio)
+    monkeypatch.setattr(
+        process_podcast,
+        "StreamingTranscoder",
+        lambda output, settings: _transcoder(tmp_path, "", "Invalid data\n", returncode=1)[0],
+    )
+    monkeypatch.setattr(
+        process_podcast, "build_engine", lambda config: type("Engine", (), {"max_workers": 3})()
+    )
+    monkeypatch.setattr(process_podcast, "transcribe_audio", lambda path, config, checkpoint: f"batch:{path}")
+    config = {"api_keys": {"groq": "test-key"}, "settings": {}}
+
+    assert (
+        process_podcast.transcribe_audio_streaming("https://x/a.m4a", audio_path, config)
+        == f"batch:{audio_path}"
+    )
+
+
+def test_streaming_enabled_env_override(monkeypatch):
+    assert streaming_enabled({}) is True
+    assert streaming_enabled({"transcribe_streaming": False}) is False
+    monkeypatch.setenv("CHORA_TRANSCRIBE_STREAMING", "0")
+    assert streaming_enabled({"transcribe_streaming": True}) is False
@@ -0,0 +1,27 @@
+"""Audio transcription helpers used by ``process_podcast.py`` / ``process_video.py``.
+
+Submodules:
+
+* :mod:`transcription.chunking` — transcode-once 16 kHz mono Opus upload
+  audio, silence-aware chunk planner (cut points at natural pauses, upload
+  byte limit, overlap + dedupe when no pause is found), stream-copy split.
+* :mod:`transcription.scratch` — per-job scratch directories (optionally on
+  tmpfs) removed on success or failure, so episodes can transcribe in parallel.
+* :mod:`transcription.rate_limit` — token-bucket limiter for Groq Whisper shared
+  across threads and processes (file lock), fed by rate-limit headers and
+  ``try again in`` hints.
+* :mod:`transcription.checkpoints` — per-episode chunk checkpoints keyed by
+  chunk audio hash + offsets; re-runs only transcribe missing/failed chunks.
+* :mod:`transcription.segments` — time-coded ``transcript_segments.json``
+  sidecar (Whisper ``verbose_json`` / YouTube captions, chunk offsets applied,
+  overlap de-duplicated by timestamp).
+* :mod:`transcription.streaming` — transcribe while downloading: ffmpeg reads
+  the download from a pipe and chunks are dispatched as soon as their audio
+  has been encoded.
+* :mod:`transcription.engines` — pluggable transcription engines: Groq
+  Whisper, local CPU Whisper (faster-whisper, int8) and a router that spills
+  chunks to the local engine while the Groq limiter is saturated.
+* :mod:`transcription.fingerprint` — landmark-hash audio fingerprints over
+  the first minutes of audio, indexed in ``config/state.db``; re-uploaded
+  episodes are skipped before any paid API call.
+"""
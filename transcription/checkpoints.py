@@ -0,0 +1,146 @@
+"""
+分片级转写断点（每期节目一个 ``transcript_chunks.jsonl``）。
+
+每个分片转写完成（或永久失败）立即追加一行记录，键为「分片音频哈希 + 起止偏移」。
+重新运行时已完成的分片直接取用，只重转缺失或失败的分片；``transcript.md`` 由断点记录拼接，
+任何分片仍失败时不写入，避免把 ``[Chunk N transcription failed]`` 当成正文。
+
+同一键出现多行时以最后一行为准（追加写，进程崩溃最多丢失正在写的那一行）。
+分片音频用 ``-fflags +bitexact`` 编码，同一源文件重新切片得到相同哈希。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+from transcription.chunking import AudioChunk
+
+CHECKPOINT_FILENAME = "transcript_chunks.jsonl"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_key(chunk: AudioChunk, audio_hash: str) -> str:
+    return f"{audio_hash[:16]}@{chunk.start:.3f}-{chunk.end:.3f}"
+
+
+@dataclass(frozen=True)
+class ChunkRecord:
+    key: str
+    index: int
+    start: float
+    end: float
+    status: str
+    text: str = ""
+    error: str = ""
+    updated_at: str = ""
+    language: str = ""
+    # ``[start, end, text]``，已加上分片偏移（见 ``transcription.segments``）
+    segments: list[list[Any]] = field(default_factory=list)
+    # 转写该分片的引擎（groq / local，见 ``transcription.engines``）
+    engine: str = ""
+
+
+class CheckpointStore:
+    """Append-only JSONL of per-chunk results; the latest line for a key wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: dict[str, ChunkRecord] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                data = json.loads(line)
+                record = ChunkRecord(**data)
+            except (ValueError, TypeError):
+                # 崩溃时写了一半的行
+                continue
+            self._records[record.key] = record
+
+    def get(self, key: str) -> ChunkRecord | None:
+        return self._records.get(key)
+
+    def done_text(self, key: str) -> str | None:
+        record = self._records.get(key)
+        return record.text if record and record.status == STATUS_DONE else None
+
+    def _append(self, record: ChunkRecord) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[record.key] = record
+
+    def record_done(
+        self,
+        key: str,
+        chunk: AudioChunk,
+        text: str,
+        segments: list[list[Any]] = (),
+        *,
+        language: str = "",
+        engine: str = "",
+    ) -> None:
+        self._append(
+            self._record(
+                key, chunk, STATUS_DONE, text=text, segments=segments, language=language, engine=engine
+            )
+        )
+
+    def record_failed(self, key: str, chunk: AudioChunk, error: str) -> None:
+        self._append(self._record(key, chunk, STATUS_FAILED, error=error))
+
+    @staticmethod
+    def _record(
+        key: str,
+        chunk: AudioChunk,
+        status: str,
+        *,
+        text: str = "",
+        error: str = "",
+        segments=(),
+        language: str = "",
+        engine: str = "",
+    ) -> ChunkRecord:
+        return ChunkRecord(
+            key=key,
+            index=chunk.index,
+            start=chunk.start,
+            end=chunk.end,
+            status=status,
+            text=text,
+            error=error,
+            updated_at=datetime.now().isoformat(timespec="seconds"),
+            language=language,
+            segments=list(segments),
+            engine=engine,
+        )
+
+
+def checkpoint_path_for(audio_path: str) -> str:
+    """Checkpoint file next to the episode's audio (i.e. in its archive folder)."""
+    return os.path.join(os.path.dirname(os.path.abspath(audio_path)), CHECKPOINT_FILENAME)
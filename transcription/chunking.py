@@ -0,0 +1,299 @@
+"""
+静音感知的转写分片规划。
+
+原来的 ``split_audio`` 按固定 300 秒切片：每个边界都可能把一句话切成两半，
+2 小时的节目固定产生 24+ 次 Whisper 请求。现在的做法：
+
+1. 一次 ffmpeg 解码：重采样为 16 kHz 单声道、编码为 24 kbps Opus（语音识别足够，
+   体积约为 MP3 ``-q:a 4`` 的 1/6），同一遍里用 ``silencedetect`` 得到总时长与全部静音区间；
+2. 从当前起点出发，在「目标时长 ± 搜索窗口」内挑离目标最近的静音，在静音中点切开；
+3. 分片时长同时受上传字节上限约束（按编码码率换算成秒数）；
+4. 窗口内没有静音时在目标处硬切，下一片向前重叠几秒，拼接转写文本时去掉重复的开头；
+5. 各分片从压缩后的文件按流复制（``-c copy``）切出，不再重新编码。
+
+配置（sources.yaml ``settings``，CHORA_CHUNK_* 环境变量优先）：
+- transcribe_chunk_target_seconds（默认 600）
+- transcribe_max_upload_mb（默认 24，Groq 上限 25 MB）
+- transcribe_chunk_overlap_seconds（默认 3）
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+from dataclasses import dataclass, replace
+from difflib import SequenceMatcher
+
+UPLOAD_SAMPLE_RATE = 16000
+UPLOAD_BITRATE = "24k"
+UPLOAD_EXTENSION = ".ogg"
+# 24 kbps Opus，按 32 kbps 估算留出 Ogg 封装开销
+UPLOAD_BYTES_PER_SECOND = 32_000 / 8
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+@dataclass(frozen=True)
+class ChunkSettings:
+    target_seconds: float = 600.0
+    min_seconds: float = 60.0
+    search_window: float = 120.0
+    max_upload_bytes: int = 24 * 1024 * 1024
+    overlap_seconds: float = 3.0
+    noise_db: float = -35.0
+    min_silence: float = 0.4
+
+
+@dataclass(frozen=True)
+class Silence:
+    start: float
+    end: float
+
+    @property
+    def midpoint(self) -> float:
+        return (self.start + self.end) / 2
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    """One planned chunk; ``overlap`` is how many leading seconds repeat the previous chunk."""
+
+    index: int
+    start: float
+    end: float
+    overlap: float = 0.0
+    path: str = ""
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _env_float(name: str) -> float | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def resolve_chunk_settings(settings: dict | None) -> ChunkSettings:
+    """Merge sources.yaml ``settings`` with CHORA_CHUNK_* overrides."""
+    settings = settings or {}
+
+    def pick(env: str, key: str, default: float) -> float:
+        value = _env_float(env)
+        if value is None:
+            value = settings.get(key, default)
+        return float(value)
+
+    return ChunkSettings(
+        target_seconds=pick("CHORA_CHUNK_TARGET_SECONDS", "transcribe_chunk_target_seconds", 600),
+        max_upload_bytes=int(pick("CHORA_CHUNK_MAX_UPLOAD_MB", "transcribe_max_upload_mb", 24) * 1024 * 1024),
+        overlap_seconds=pick("CHORA_CHUNK_OVERLAP_SECONDS", "transcribe_chunk_overlap_seconds", 3),
+    )
+
+
+# -----------------------------------------------------------------------------
+# 静音检测
+# -----------------------------------------------------------------------------
+
+
+def parse_silencedetect(output: str) -> tuple[float | None, list[Silence]]:
+    """``(duration, silences)`` from ffmpeg's stderr; a trailing open silence runs to the end."""
+    duration = None
+    match = _DURATION.search(output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silences: list[Silence] = []
+    start = None
+    for line in output.splitlines():
+        begin = _SILENCE_START.search(line)
+        if begin:
+            start = max(0.0, float(begin.group(1)))
+            continue
+        end = _SILENCE_END.search(line)
+        if end and start is not None:
+            silences.append(Silence(start, float(end.group(1))))
+            start = None
+    if start is not None and duration is not None and duration > start:
+        silences.append(Silence(start, duration))
+    return duration, silences
+
+
+def transcode_for_upload(
+    file_path: str, output_path: str, settings: ChunkSettings
+) -> tuple[float | None, list[Silence]]:
+    """Decode ``file_path`` once: write 16 kHz mono Opus to ``output_path`` and detect silences."""
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        file_path,
+        "-vn",
+        "-af",
+        f"silencedetect=noise={settings.noise_db:g}dB:d={settings.min_silence:g}",
+        "-ac",
+        "1",
+        "-ar",
+        str(UPLOAD_SAMPLE_RATE),
+        "-c:a",
+        "libopus",
+        "-b:a",
+        UPLOAD_BITRATE,
+        "-application",
+        "voip",
+        # 固定 Ogg 流序号等：同一源文件重复转码得到相同字节（断点按分片哈希复用）
+        "-fflags",
+        "+bitexact",
+        "-flags:a",
+        "+bitexact",
+        output_path,
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True, errors="replace")
+    return parse_silencedetect(result.stderr)
+
+
+# -----------------------------------------------------------------------------
+# 规划
+# -----------------------------------------------------------------------------
+
+
+class ChunkPlanner:
+    """Incremental planner: emits each chunk once the audio its cut point depends on is known.
+
+    :func:`plan_chunks` runs it over a complete file; the streaming mode
+    (``transcription.streaming``) feeds it as audio is decoded. Both produce
+    the same chunks for the same audio.
+    """
+
+    def __init__(self, settings: ChunkSettings, bytes_per_second: float = UPLOAD_BYTES_PER_SECOND):
+        self.settings = settings
+        self.max_len = settings.max_upload_bytes / bytes_per_second
+        self.target = min(settings.target_seconds, self.max_len * 0.9)
+        self.window = min(settings.search_window, self.target / 2)
+        self.overlap = min(settings.overlap_seconds, settings.min_seconds / 2)
+        self.start = 0.0
+        self.lead = 0.0
+        self.index = 0
+
+    @property
+    def horizon(self) -> float:
+        """Audio needed past the current start before the next cut can be decided."""
+        return self.start + min(self.max_len, self.target + self.window)
+
+    def _emit(self, end: float, next_start: float, next_lead: float) -> AudioChunk:
+        chunk = AudioChunk(self.index, self.start, end, self.lead)
+        self.index += 1
+        self.start, self.lead = next_start, next_lead
+        return chunk
+
+    def ready(self, silences: list[Silence], settled: float) -> list[AudioChunk]:
+        """Chunks whose cut is settled, given audio (and silences) known up to ``settled`` seconds."""
+        midpoints = sorted(s.midpoint for s in silences)
+        chunks = []
+        while settled > self.horizon:
+            ideal = self.start + self.target
+            low = self.start + max(self.settings.min_seconds, self.target - self.window)
+            candidates = [m for m in midpoints if low <= m <= self.horizon]
+            if candidates:
+                cut = min(candidates, key=lambda m: abs(m - ideal))
+                chunks.append(self._emit(cut, cut, 0.0))
+            else:
+                # 找不到停顿：硬切，下一片回退 overlap 秒，拼接时去重
+                cut = min(ideal, self.start + self.max_len)
+                chunks.append(self._emit(cut, cut - self.overlap, self.overlap))
+        return chunks
+
+    def finish(self, duration: float, silences: list[Silence]) -> list[AudioChunk]:
+        """Remaining chunks once the total duration is known."""
+        chunks = self.ready(silences, duration)
+        chunks.append(self._emit(duration, duration, 0.0))
+        return chunks
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[Silence],
+    settings: ChunkSettings,
+    bytes_per_second: float = UPLOAD_BYTES_PER_SECOND,
+) -> list[AudioChunk]:
+    """Cut ``[0, duration)`` at pauses near the target length, within the upload byte limit."""
+    return ChunkPlanner(settings, bytes_per_second).finish(duration, silences)
+
+
+def extract_chunk(
+    file_path: str, chunk: AudioChunk, output_dir: str = ".", prefix: str = "temp_chunk_"
+) -> AudioChunk:
+    """Cut one planned span out of the compact file by stream copy; returns the chunk with ``path`` set."""
+    extension = os.path.splitext(file_path)[1] or UPLOAD_EXTENSION
+    path = os.path.join(output_dir, f"{prefix}{chunk.index:03d}{extension}")
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        f"{chunk.start:.3f}",
+        "-t",
+        f"{chunk.duration:.3f}",
+        "-i",
+        file_path,
+        "-c",
+        "copy",
+        "-fflags",
+        "+bitexact",
+        "-loglevel",
+        "error",
+        path,
+    ]
+    subprocess.run(cmd, check=True)
+    return replace(chunk, path=path)
+
+
+def extract_chunks(
+    file_path: str, chunks: list[AudioChunk], output_dir: str = ".", prefix: str = "temp_chunk_"
+) -> list[AudioChunk]:
+    """:func:`extract_chunk` for every planned span."""
+    return [extract_chunk(file_path, chunk, output_dir, prefix) for chunk in chunks]
+
+
+# -----------------------------------------------------------------------------
+# 重叠去重
+# -----------------------------------------------------------------------------
+
+
+def merge_overlap(
+    previous: str, current: str, *, window: int = 200, slack: int = 60, min_match: int = 12
+) -> str:
+    """Drop the start of ``current`` that repeats the end of ``previous``.
+
+    Whisper rarely transcribes the overlapping seconds identically, so the
+    longest common run between the tail of ``previous`` and the head of
+    ``current`` is used instead of an exact suffix/prefix match. The run must
+    sit within ``slack`` characters of both edges.
+    """
+    tail, head = previous[-window:], current[:window]
+    match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+    if match.size < min_match or match.b > slack or len(tail) - (match.a + match.size) > slack:
+        return current
+    return current[match.b + match.size :].lstrip()
+
+
+def join_transcripts(texts: list[str | None], chunks: list[AudioChunk]) -> str:
+    """Join per-chunk transcripts in order, de-duplicating overlapping chunk starts."""
+    parts: list[str] = []
+    for text, chunk in zip(texts, chunks):
+        if not text:
+            continue
+        if chunk.overlap and parts:
+            text = merge_overlap(parts[-1], text)
+        parts.append(text)
+    return "\n".join(parts)
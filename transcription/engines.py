@@ -0,0 +1,237 @@
+"""
+可插拔的转写引擎。
+
+所有引擎提供同一个接口 ``transcribe(path, audio_seconds) -> dict``，返回
+``verbose_json`` 形式的结果（``text`` / ``language`` / ``segments``，另加 ``engine`` 名称）：
+
+- :class:`GroqWhisperEngine`：Groq ``whisper-large-v3``，经共享限流器（``transcription.rate_limit``）；
+- :class:`LocalWhisperEngine`：本机 CPU 转写，faster-whisper（CTranslate2，int8 量化），
+  无 GPU 的 Linux 机器也能跑；可选依赖，``pip install faster-whisper``；
+- :class:`SpilloverRouter`：默认走 Groq，限流器需要等待超过 ``spill_after`` 秒时
+  （包括 429 之后整体暂停），把分片交给本地引擎，吞吐不再因限流停摆。
+
+配置（CHORA_* 环境变量优先于 sources.yaml ``settings``）：
+- transcribe_engine：auto（默认，有 Groq key 用 Groq，装了 faster-whisper 时自动溢出到本地）
+  / groq / local
+- local_whisper_model（默认 small）、local_whisper_compute_type（默认 int8）
+- local_whisper_workers：本地同时转写的分片数（默认 1）
+- transcribe_spill_after_seconds：限流等待超过多少秒就溢出到本地（默认 30）
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import threading
+
+from groq import Groq
+
+from transcription.rate_limit import RateLimiter, get_groq_limiter, parse_retry_hint
+from transcription.segments import response_payload
+
+GROQ_MODEL = "whisper-large-v3"
+ENGINE_MODES = ("auto", "groq", "local")
+
+
+class RemoteSaturated(RuntimeError):
+    """The remote engine would have to wait longer than the caller allows."""
+
+    def __init__(self, wait: float):
+        super().__init__(f"remote engine rate-limited for {wait:.0f}s")
+        self.wait = wait
+
+
+class GroqWhisperEngine:
+    """Groq Whisper with shared rate limiting; 429s pause every user of the limiter."""
+
+    name = "groq"
+    # Reduced workers to be less aggressive with rate limits
+    max_workers = 3
+
+    def __init__(self, client: Groq, limiter: RateLimiter, *, max_retries: int = 12):
+        self.client = client
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def transcribe(self, path: str, audio_seconds: float = 0.0, *, max_wait: float | None = None) -> dict:
+        """Transcribe one chunk file.
+
+        With ``max_wait`` set, raises :class:`RemoteSaturated` instead of waiting
+        longer than that for the limiter.
+        """
+        costs = {"audio_seconds": audio_seconds}
+        print(f"  Transcribing {path}...")
+
+        for attempt in range(self.max_retries):
+            if max_wait is not None:
+                wait = self.limiter.peek_wait(costs)
+                if wait > max_wait:
+                    raise RemoteSaturated(wait)
+            waited = self.limiter.acquire(costs)
+            if waited >= 1:
+                print(f"  ⏳ Waited {waited:.0f}s for Groq rate limit before {path}")
+            try:
+                with open(path, "rb") as file:
+                    response = self.client.audio.transcriptions.with_raw_response.create(
+                        file=(os.path.basename(path), file.read()),
+                        model=GROQ_MODEL,
+                        response_format="verbose_json",
+                        timeout=300.0,
+                    )
+                self.limiter.observe_headers(response.headers)
+                return {**response_payload(response.parse()), "engine": self.name}
+            except Exception as e:
+                self.limiter.observe_headers(getattr(getattr(e, "response", None), "headers", None))
+                error_str = str(e).lower()
+                if "429" in error_str or "rate limit" in error_str:
+                    # Prefer Groq's hint ("Please try again in 2m24s"); otherwise back off from 60s
+                    wait_time = parse_retry_hint(error_str)
+                    wait_time = wait_time + 5 if wait_time is not None else 60 * (1.5**attempt)
+
+                    # Cap wait time to 15 mins
+                    wait_time = min(wait_time, 900)
+                    self.limiter.block_for(wait_time)
+
+                    print(
+                        f"  ⚠️ Rate limit hit (429) on {path}. Pausing all Groq requests for {wait_time:.1f}s... "
+                        f"(Attempt {attempt+1}/{self.max_retries})"
+                    )
+                    continue
+                print(f"Error transcribing {path}: {e}")
+                raise
+
+        raise Exception(f"Failed to transcribe {path} after {self.max_retries} retries due to rate limits.")
+
+
+def local_engine_available() -> bool:
+    return importlib.util.find_spec("faster_whisper") is not None
+
+
+class LocalWhisperEngine:
+    """CPU Whisper via faster-whisper (int8-quantized CTranslate2); the model loads on first use."""
+
+    name = "local"
+
+    def __init__(
+        self, model_size: str = "small", compute_type: str = "int8", *, workers: int = 1, cpu_threads=0
+    ):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.max_workers = max(1, workers)
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                print(f"  🖥️ Loading local Whisper model '{self.model_size}' ({self.compute_type}, CPU)...")
+                self._model = WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.max_workers,
+                )
+            return self._model
+
+    def transcribe(self, path: str, audio_seconds: float = 0.0) -> dict:
+        print(f"  Transcribing {path} locally...")
+        segments, info = self._load().transcribe(path, beam_size=1)
+        rows = [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+        return {
+            "text": "".join(row["text"] for row in rows).strip(),
+            "language": getattr(info, "language", "") or "",
+            "segments": rows,
+            "engine": self.name,
+        }
+
+
+class SpilloverRouter:
+    """Remote engine first; chunks spill to the local engine while the remote limiter is saturated."""
+
+    name = "auto"
+
+    def __init__(self, remote: GroqWhisperEngine, local: LocalWhisperEngine, *, spill_after: float = 30.0):
+        self.remote = remote
+        self.local = local
+        self.spill_after = spill_after
+        self.local_workers = local.max_workers
+        # 本地引擎有自己的并发槽位，溢出时不占用 Groq 的线程
+        self.max_workers = remote.max_workers + local.max_workers
+        self._local_busy = 0
+        self._lock = threading.Lock()
+
+    def _claim_local(self) -> bool:
+        with self._lock:
+            if self._local_busy >= self.local_workers:
+                return False
+            self._local_busy += 1
+            return True
+
+    def _release_local(self) -> None:
+        with self._lock:
+            self._local_busy -= 1
+
+    def transcribe(self, path: str, audio_seconds: float = 0.0) -> dict:
+        while True:
+            with self._lock:
+                local_free = self._local_busy < self.local_workers
+            try:
+                return self.remote.transcribe(
+                    path, audio_seconds, max_wait=self.spill_after if local_free else None
+                )
+            except RemoteSaturated as exc:
+                wait = exc.wait
+            if not self._claim_local():
+                # 本地槽位刚被其它线程占用：继续排队等 Groq
+                continue
+            try:
+                print(f"  ↪️ Groq rate-limited for {wait:.0f}s; transcribing {path} on the local engine")
+                return self.local.transcribe(path, audio_seconds)
+            finally:
+                self._release_local()
+
+
+def _setting(settings: dict, env: str, key: str, default):
+    raw = os.environ.get(env)
+    if raw is not None and raw.strip():
+        return raw.strip()
+    return settings.get(key, default)
+
+
+def build_engine(config: dict):
+    """Engine for ``transcribe_audio`` from sources.yaml; None (with a message) when none is usable."""
+    settings = config.get("settings") or {}
+    mode = str(_setting(settings, "CHORA_TRANSCRIBE_ENGINE", "transcribe_engine", "auto")).lower()
+    if mode not in ENGINE_MODES:
+        print(f"⚠️ Unknown transcribe_engine '{mode}', using auto.")
+        mode = "auto"
+
+    api_key = config.get("api_keys", {}).get("groq")
+    remote = None
+    if api_key and mode in ("auto", "groq"):
+        # Groq client is generally thread-safe for requests
+        remote = GroqWhisperEngine(Groq(api_key=api_key), get_groq_limiter(settings))
+
+    local = None
+    if mode in ("auto", "local") and local_engine_available():
+        local = LocalWhisperEngine(
+            model_size=str(_setting(settings, "CHORA_LOCAL_WHISPER_MODEL", "local_whisper_model", "small")),
+            compute_type=str(settings.get("local_whisper_compute_type", "int8")),
+            workers=int(settings.get("local_whisper_workers", 1)),
+        )
+
+    if remote and local:
+        return SpilloverRouter(
+            remote, local, spill_after=float(settings.get("transcribe_spill_after_seconds", 30))
+        )
+    if remote or local:
+        return remote or local
+    if mode == "local":
+        print("Error: local transcription needs faster-whisper (pip install faster-whisper).")
+    else:
+        print("Error: Groq API key not found in config.")
+    return None
@@ -0,0 +1,293 @@
+"""
+声学指纹去重（同一期访谈在小宇宙与 YouTube 各发一次、或换标题重发）。
+
+``is_already_processed`` 与 ``is_folder_exists`` 只认 ID 和标题，重复内容会再下载、
+转写、改写一遍。转写前先对音频开头几分钟计算地标哈希（Shazam / chromaprint 思路）：
+
+1. ffmpeg 只解码开头 ``fingerprint_seconds`` 秒（URL 也可以，只读取所需的前缀），
+   重采样为 4 kHz 单声道；
+2. 64 ms 窗、32 ms 步长的频谱，在 4 个频带（约 60 Hz–2 kHz）里各取时间邻域内的能量峰；
+3. 每个峰与其后约 1 秒内的 3 个峰组成地标：``(f1, f2, Δt)`` → 20 位哈希，附带锚点帧号；
+4. 哈希存入 ``config/state.db`` 的 ``audio_fingerprints`` 倒排表。
+
+新内容的地标在索引中命中同一条目、且时间偏移一致（同一 ``frame_db - frame_query``，
+允许 ±1 帧）。只有数量达到 ``fingerprint_min_matches``、并且这些对齐命中分布在查询窗口
+``fingerprint_min_coverage`` 以上的时间（按 5 秒分桶）时才判为重复：只共用片头音乐 /
+转场音效的不同节目，对齐命中集中在开头十几秒，不会被误判。判为重复的内容记为已处理并跳过，
+不会产生任何付费 API 调用。编码格式、码率、音量与底噪不影响匹配；
+重新上传多出的片头只会降低时间覆盖率，过长时可能漏判（宁可多转写一次，不误删）。
+
+只与已处理完成（``is_processed``）的条目比对：中途失败的条目虽已登记指纹，
+不会让之后的重新上传被当成它的重复而跳过。
+
+纯 Python 实现，不依赖 numpy / chromaprint；两分钟音频约 1–3 秒 CPU。
+指纹计算失败（ffmpeg 缺失、源无法解码）只打印警告，流程照常继续。
+
+配置（CHORA_* 环境变量优先于 sources.yaml ``settings``）：
+- fingerprint_dedupe（默认 true；CHORA_FINGERPRINT_DEDUPE=0 关闭）
+- fingerprint_seconds（默认 120）
+- fingerprint_min_matches（默认 20）
+- fingerprint_min_coverage（默认 0.5，对齐命中覆盖查询窗口时间的比例）
+"""
+
+from __future__ import annotations
+
+import cmath
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+
+FINGERPRINT_RATE = 4000
+WINDOW = 256
+HOP = 128
+# FFT 频点（每点约 15.6 Hz）划分的频带
+BANDS = ((4, 16), (16, 32), (32, 64), (64, 128))
+PEAK_NEIGHBOURHOOD = 8
+FAN_OUT = 3
+TARGET_FRAMES = 32
+FRAME_SECONDS = HOP / FINGERPRINT_RATE
+COVERAGE_BUCKET_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class FingerprintSettings:
+    enabled: bool = True
+    seconds: float = 120.0
+    min_matches: int = 20
+    min_coverage: float = 0.5
+
+
+def resolve_fingerprint_settings(settings: dict | None) -> FingerprintSettings:
+    settings = settings or {}
+    raw = os.environ.get("CHORA_FINGERPRINT_DEDUPE")
+    if raw is not None and raw.strip():
+        enabled = raw.strip().lower() not in ("0", "false", "no", "off")
+    else:
+        enabled = bool(settings.get("fingerprint_dedupe", True))
+    raw_seconds = os.environ.get("CHORA_FINGERPRINT_SECONDS")
+    try:
+        seconds = float(raw_seconds) if raw_seconds and raw_seconds.strip() else None
+    except ValueError:
+        seconds = None
+    return FingerprintSettings(
+        enabled=enabled,
+        seconds=seconds or float(settings.get("fingerprint_seconds", 120)),
+        min_matches=int(settings.get("fingerprint_min_matches", 20)),
+        min_coverage=float(settings.get("fingerprint_min_coverage", 0.5)),
+    )
+
+
+def decode_pcm(source: str, seconds: float, *, run=subprocess.run) -> array:
+    """First ``seconds`` of ``source`` (file path or URL) as 4 kHz mono signed 16-bit samples."""
+    cmd = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-t",
+        f"{seconds:g}",
+        "-i",
+        source,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(FINGERPRINT_RATE),
+        "-f",
+        "s16le",
+        "pipe:1",
+    ]
+    result = run(cmd, check=True, capture_output=True, timeout=max(60.0, seconds * 2))
+    samples = array("h")
+    samples.frombytes(result.stdout[: len(result.stdout) // 2 * 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples
+
+
+# ----------------------------------------------------------------------
+# 频谱与地标
+# ----------------------------------------------------------------------
+
+_HANN = [0.5 - 0.5 * math.cos(2 * math.pi * i / WINDOW) for i in range(WINDOW)]
+_BITS = WINDOW.bit_length() - 1
+_REVERSED = [int(format(i, f"0{_BITS}b")[::-1], 2) for i in range(WINDOW)]
+_TWIDDLES = [cmath.exp(-2j * math.pi * k / WINDOW) for k in range(WINDOW // 2)]
+
+
+def _fft(values: list[float]) -> list[complex]:
+    """Iterative radix-2 FFT of a ``WINDOW``-long real frame."""
+    data = [complex(values[i]) for i in _REVERSED]
+    size = 2
+    while size <= WINDOW:
+        half = size // 2
+        step = WINDOW // size
+        for start in range(0, WINDOW, size):
+            for k in range(half):
+                twiddled = _TWIDDLES[k * step] * data[start + k + half]
+                even = data[start + k]
+                data[start + k] = even + twiddled
+                data[start + k + half] = even - twiddled
+        size *= 2
+    return data
+
+
+def spectrogram(samples) -> list[list[float]]:
+    """Log-magnitude frames (bins ``0 .. WINDOW/2``) of the Hann-windowed signal."""
+    frames = []
+    for start in range(0, len(samples) - WINDOW + 1, HOP):
+        spectrum = _fft([samples[start + i] * _HANN[i] for i in range(WINDOW)])
+        frames.append([math.log1p(abs(value)) for value in spectrum[: WINDOW // 2]])
+    return frames
+
+
+def find_peaks(frames: list[list[float]]) -> list[tuple[int, int]]:
+    """``(frame, bin)`` of each band's strongest bin that also dominates its time neighbourhood."""
+    if not frames:
+        return []
+    loudness = sorted(max(frame) for frame in frames)
+    floor = loudness[len(loudness) // 4]
+    peaks = []
+    for low, high in BANDS:
+        best = []
+        for frame in frames:
+            band = frame[low:high]
+            value = max(band)
+            best.append((value, low + band.index(value)))
+        for t, (value, f) in enumerate(best):
+            if value <= floor:
+                continue
+            window = best[max(0, t - PEAK_NEIGHBOURHOOD) : t + PEAK_NEIGHBOURHOOD + 1]
+            if all(value >= other for other, _ in window):
+                peaks.append((t, f))
+    peaks.sort()
+    return peaks
+
+
+def landmarks(peaks: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """``(hash, anchor_frame)`` pairs from each peak and the next ``FAN_OUT`` peaks within ~1 s."""
+    result = []
+    for i, (t1, f1) in enumerate(peaks):
+        paired = 0
+        for t2, f2 in peaks[i + 1 :]:
+            dt = t2 - t1
+            if dt > TARGET_FRAMES:
+                break
+            if dt == 0:
+                continue
+            result.append(((f1 << 13) | (f2 << 6) | dt, t1))
+            paired += 1
+            if paired == FAN_OUT:
+                break
+    return result
+
+
+def fingerprint_samples(samples) -> list[tuple[int, int]]:
+    return landmarks(find_peaks(spectrogram(samples)))
+
+
+# ----------------------------------------------------------------------
+# 匹配
+# ----------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    content_id: str
+    matches: int
+    offset_seconds: float
+    # 对齐命中覆盖的查询时间比例（5 秒分桶）
+    coverage: float = 0.0
+
+
+def _buckets(frames) -> set[int]:
+    return {int(frame * FRAME_SECONDS // COVERAGE_BUCKET_SECONDS) for frame in frames}
+
+
+def best_match(
+    query: list[tuple[int, int]], hits: list[tuple[int, str, int]], *, exclude: str = ""
+) -> DuplicateMatch | None:
+    """Item whose landmarks line up with ``query`` at one consistent time offset most often."""
+    frames_by_hash: dict[int, list[int]] = {}
+    for hash_, frame in query:
+        frames_by_hash.setdefault(hash_, []).append(frame)
+    offsets: dict[tuple[str, int], list[int]] = {}
+    for hash_, content_id, frame in hits:
+        if content_id == exclude:
+            continue
+        for query_frame in frames_by_hash.get(hash_, ()):
+            offsets.setdefault((content_id, frame - query_frame), []).append(query_frame)
+    if not offsets:
+        return None
+    # 重采样 / 编码造成的 ±1 帧抖动并入同一偏移
+    scored = [
+        (
+            len(frames) + len(offsets.get((cid, delta - 1), ())) + len(offsets.get((cid, delta + 1), ())),
+            cid,
+            delta,
+        )
+        for (cid, delta), frames in offsets.items()
+    ]
+    score, content_id, delta = max(scored)
+    aligned = [frame for d in (delta - 1, delta, delta + 1) for frame in offsets.get((content_id, d), ())]
+    coverage = len(_buckets(aligned)) / len(_buckets(frame for _, frame in query))
+    return DuplicateMatch(content_id, score, delta * FRAME_SECONDS, coverage)
+
+
+def _default_store():
+    from state_store import get_default_store
+
+    return get_default_store()
+
+
+def find_duplicate(
+    content_id: str, source: str, settings: dict | None, *, store=None
+) -> DuplicateMatch | None:
+    """Fingerprint ``source`` and return the earlier item it duplicates, registering it otherwise.
+
+    Returns None when dedupe is disabled or the audio cannot be fingerprinted.
+    """
+    fp_settings = resolve_fingerprint_settings(settings)
+    if not fp_settings.enabled or not source:
+        return None
+    try:
+        query = fingerprint_samples(decode_pcm(source, fp_settings.seconds))
+        if not query:
+            return None
+        store = store or _default_store()
+        # 只与已处理完成的条目比对（中途失败的条目不算）
+        processed = store.processed_ids()
+        hits = [hit for hit in store.fingerprint_hits([hash_ for hash_, _ in query]) if hit[1] in processed]
+        match = best_match(query, hits, exclude=content_id)
+        if match and match.matches >= fp_settings.min_matches and match.coverage >= fp_settings.min_coverage:
+            return match
+        store.save_fingerprint(content_id, query)
+    except (OSError, subprocess.SubprocessError, sqlite3.Error) as e:
+        print(f"  ⚠️ Audio fingerprint skipped: {e}")
+    return None
+
+
+def skip_if_duplicate(content_id: str, source: str, settings: dict | None, *, store=None) -> bool:
+    """Flag ``content_id`` as a re-upload of an earlier item; True means skip all paid stages."""
+    match = find_duplicate(content_id, source, settings, store=store)
+    if not match:
+        return False
+    from state_store import STATUS_SKIPPED
+
+    print(
+        f"⏭️ Audio matches already-processed item {match.content_id} "
+        f"({match.matches} landmarks over {match.coverage:.0%} of the window, "
+        f"offset {match.offset_seconds:+.1f}s); skipping as duplicate."
+    )
+    store = store or _default_store()
+    try:
+        store.mark_stage(content_id, "transcribed", STATUS_SKIPPED, f"duplicate of {match.content_id}")
+        # 记为已处理：fetch_feed 不会再把它列为新内容
+        store.mark_processed(content_id)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ 状态台账写入失败 ({content_id}): {e}")
+    return True
@@ -0,0 +1,220 @@
+"""
+跨线程、跨进程共享的令牌桶限流（Groq Whisper）。
+
+原来每个转写线程各自请求、各自遇到 429 后睡眠最长 15 分钟：三个线程加上同时运行的其它
+``process_podcast`` / ``process_video`` 进程一起猛打 API，然后一起停摆。现在所有请求
+先向同一个限流器取令牌：
+
+- 状态（各桶剩余令牌、统一的「暂停到」时间）存于 ``.chora_cache/rate_limits/<name>.json``，
+  读写时对同目录的 ``.lock`` 文件加 ``flock`` 排他锁，同机所有进程共享；
+- 两个桶：请求数（RPM）与音频秒数（每小时音频时长），每次请求按分片时长扣除；
+  桶容量只有约 10 秒 / 10 分钟的额度，请求按可持续速率均匀发出，而不是先爆发再停摆；
+- API 响应头（``retry-after``、``x-ratelimit-remaining-*`` 为 0 时的 ``x-ratelimit-reset-*``）
+  与错误信息里的 ``try again in 2m24s`` 会把整个限流器暂停到指定时间。
+
+配置（CHORA_GROQ_* 环境变量优先于 sources.yaml ``settings``）：
+- groq_requests_per_minute（默认 20，Groq 免费档）
+- groq_audio_seconds_per_hour（默认 7200，Groq 免费档）
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Mapping
+
+from config_loader import get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows：只在进程内共享
+    fcntl = None
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_RETRY_HINT = re.compile(r"try again in\s+((?:[\d.]+(?:ms|h|m|s))+)", re.IGNORECASE)
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(text: str) -> float | None:
+    """Seconds in a Groq-style duration (``"2m24s"``, ``"7.66s"``, ``"1h2m"``, ``"120ms"``, ``"30"``)."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(value + unit for value, unit in parts) != text:
+        return None
+    return sum(float(value) * _UNIT_SECONDS[unit] for value, unit in parts)
+
+
+def parse_retry_hint(message: str) -> float | None:
+    """Wait from a ``"Please try again in 2m24s"`` error message."""
+    match = _RETRY_HINT.search(message or "")
+    return parse_duration(match.group(1)) if match else None
+
+
+@dataclass(frozen=True)
+class Bucket:
+    capacity: float
+    refill_per_second: float
+
+
+def _env_float(name: str) -> float | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def groq_buckets(settings: dict | None) -> dict[str, Bucket]:
+    """Request and audio-seconds buckets from sources.yaml ``settings`` / CHORA_GROQ_* overrides."""
+    settings = settings or {}
+    rpm = _env_float("CHORA_GROQ_RPM") or float(settings.get("groq_requests_per_minute", 20))
+    ash = _env_float("CHORA_GROQ_AUDIO_SECONDS_PER_HOUR") or float(
+        settings.get("groq_audio_seconds_per_hour", 7200)
+    )
+    return {
+        "requests": Bucket(capacity=max(1.0, rpm / 6), refill_per_second=rpm / 60),
+        "audio_seconds": Bucket(capacity=ash / 6, refill_per_second=ash / 3600),
+    }
+
+
+class RateLimiter:
+    """Token buckets persisted in a JSON file and guarded by an exclusive file lock."""
+
+    def __init__(
+        self,
+        name: str,
+        buckets: dict[str, Bucket],
+        *,
+        state_dir: str | None = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.buckets = buckets
+        state_dir = state_dir or get_cache_dir("rate_limits")
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, f"{name}.json")
+        self.lock_path = os.path.join(state_dir, f"{name}.lock")
+        self.clock = clock
+        self.sleep = sleep
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _state(self) -> Iterator[dict]:
+        with self._thread_lock, open(self.lock_path, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                yield state
+                tmp_path = f"{self.state_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refill(self, state: dict, now: float) -> dict[str, dict]:
+        levels = state.setdefault("buckets", {})
+        for key, bucket in self.buckets.items():
+            level = levels.get(key) or {"tokens": bucket.capacity, "updated": now}
+            elapsed = max(0.0, now - level["updated"])
+            level["tokens"] = min(bucket.capacity, level["tokens"] + elapsed * bucket.refill_per_second)
+            level["updated"] = now
+            levels[key] = level
+        return levels
+
+    def _shortfall_wait(self, state: dict, costs: Mapping[str, float], now: float) -> float:
+        blocked = state.get("blocked_until", 0.0) - now
+        if blocked > 0:
+            return blocked
+        levels = self._refill(state, now)
+        wait = 0.0
+        for key, cost in costs.items():
+            bucket = self.buckets.get(key)
+            if not bucket:
+                continue
+            # 单次成本超过桶容量时按容量计，避免永远等不到
+            shortfall = min(cost, bucket.capacity) - levels[key]["tokens"]
+            if shortfall > 0:
+                wait = max(wait, shortfall / bucket.refill_per_second)
+        return wait
+
+    def try_acquire(self, costs: Mapping[str, float] | None = None) -> float:
+        """Take tokens if available and return 0; otherwise return the seconds to wait."""
+        costs = {"requests": 1.0, **(costs or {})}
+        with self._state() as state:
+            wait = self._shortfall_wait(state, costs, self.clock())
+            if wait > 0:
+                return wait
+            levels = state["buckets"]
+            for key, cost in costs.items():
+                if key in self.buckets:
+                    levels[key]["tokens"] -= min(cost, self.buckets[key].capacity)
+            return 0.0
+
+    def peek_wait(self, costs: Mapping[str, float] | None = None) -> float:
+        """Seconds a request with ``costs`` would wait right now, without taking tokens."""
+        with self._state() as state:
+            return self._shortfall_wait(state, {"requests": 1.0, **(costs or {})}, self.clock())
+
+    def acquire(self, costs: Mapping[str, float] | None = None) -> float:
+        """Block until the request may be sent; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(costs)
+            if wait <= 0:
+                return waited
+            # 分段睡眠：其它进程的暂停 / 恢复能及时生效
+            step = min(wait, 30.0)
+            self.sleep(step)
+            waited += step
+
+    def block_for(self, seconds: float) -> None:
+        """Pause every user of this limiter for ``seconds`` (e.g. after a 429)."""
+        if seconds <= 0:
+            return
+        with self._state() as state:
+            until = self.clock() + seconds
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), until)
+
+    def observe_headers(self, headers: Mapping[str, str] | None) -> None:
+        """Apply ``retry-after`` and exhausted ``x-ratelimit-*`` headers from an API response."""
+        if not headers:
+            return
+        waits = [parse_duration(headers.get("retry-after") or "") or 0.0]
+        for kind in ("requests", "tokens", "audio-seconds"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is not None and remaining.strip() in ("0", "0.0"):
+                waits.append(parse_duration(headers.get(f"x-ratelimit-reset-{kind}") or "") or 0.0)
+        self.block_for(max(waits))
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_groq_limiter(settings: dict | None = None) -> RateLimiter:
+    """Process-wide limiter for Groq Whisper; state shared with other processes on this machine."""
+    with _limiters_lock:
+        if "groq_whisper" not in _limiters:
+            _limiters["groq_whisper"] = RateLimiter("groq_whisper", groq_buckets(settings))
+        return _limiters["groq_whisper"]
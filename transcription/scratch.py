@@ -0,0 +1,78 @@
+"""
+转写任务的独立临时目录。
+
+每次 ``transcribe_audio`` 在自己的目录里生成压缩音频与分片，结束时（成功、失败或 Ctrl+C）
+整个目录删除，多个节目可以在同一台机器上并行转写而互不干扰。
+
+目录位置（CHORA_SCRATCH_* 环境变量优先于 sources.yaml ``settings``）：
+- transcribe_scratch_dir：临时目录的父目录，默认系统临时目录；
+- transcribe_scratch_tmpfs：为 true 时优先放在 ``/dev/shm``（内存盘），
+  剩余空间不足 ``min_free_mb``（默认 512）时退回磁盘。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+TMPFS_ROOT = "/dev/shm"
+SCRATCH_PREFIX = "chora-transcribe-"
+
+
+@dataclass(frozen=True)
+class ScratchSettings:
+    root: str = ""
+    tmpfs: bool = False
+    min_free_bytes: int = 512 * 1024 * 1024
+
+
+def _env_flag(name: str) -> bool | None:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return None
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def resolve_scratch_settings(settings: dict | None) -> ScratchSettings:
+    """Merge sources.yaml ``settings`` with CHORA_SCRATCH_* overrides."""
+    settings = settings or {}
+    tmpfs = _env_flag("CHORA_SCRATCH_TMPFS")
+    if tmpfs is None:
+        tmpfs = bool(settings.get("transcribe_scratch_tmpfs", False))
+    return ScratchSettings(
+        root=os.environ.get("CHORA_SCRATCH_DIR") or settings.get("transcribe_scratch_dir") or "",
+        tmpfs=tmpfs,
+    )
+
+
+def _has_room(path: str, min_free_bytes: int) -> bool:
+    try:
+        return os.access(path, os.W_OK) and shutil.disk_usage(path).free >= min_free_bytes
+    except OSError:
+        return False
+
+
+def scratch_root(settings: ScratchSettings) -> str:
+    """Parent directory for job scratch dirs: tmpfs when requested and roomy, else disk."""
+    if settings.tmpfs and os.path.isdir(TMPFS_ROOT) and _has_room(TMPFS_ROOT, settings.min_free_bytes):
+        return TMPFS_ROOT
+    if settings.root:
+        os.makedirs(settings.root, exist_ok=True)
+        return settings.root
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def scratch_dir(settings: ScratchSettings | None = None, label: str = "") -> Iterator[str]:
+    """Private directory for one transcription job, removed on exit whatever the outcome."""
+    root = scratch_root(settings or ScratchSettings())
+    prefix = f"{SCRATCH_PREFIX}{label}-" if label else SCRATCH_PREFIX
+    path = tempfile.mkdtemp(prefix=prefix, dir=root)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,129 @@
+"""
+带时间码的转写片段（``transcript_segments.json``，与 ``transcript.md`` 同目录）。
+
+Whisper 用 ``verbose_json`` 返回逐段起止时间，YouTube 字幕本身带时间码；
+两者都整理成 ``[start, end, text]`` 列表（秒，保留两位小数，已加上分片偏移）：
+
+```json
+{"version": 1, "source": "whisper", "language": "zh", "segments": [[0.0, 4.2, "大家好"], ...]}
+```
+
+相邻分片有重叠时按时间去重：前一片只保留重叠区中点之前开始的片段，
+后一片中与这些片段在时间上重合过半的片段视为重复丢弃。
+
+后续阶段可以据此检索、引用精确时间段或只重转某一段，无需重新处理音频。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from transcription.chunking import AudioChunk
+
+SEGMENTS_FILENAME = "transcript_segments.json"
+SEGMENTS_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: float
+    end: float
+    text: str
+
+    def to_row(self) -> list[Any]:
+        return [round(self.start, 2), round(self.end, 2), self.text]
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> "Segment":
+        return cls(float(row[0]), float(row[1]), str(row[2]))
+
+
+def response_payload(result: Any) -> dict[str, Any]:
+    """Normalise a Whisper response (``str`` / dict / SDK model) to a dict with ``text``."""
+    if isinstance(result, str):
+        return {"text": result}
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, "model_dump"):
+        return result.model_dump()
+    return {"text": str(result)}
+
+
+def segments_from_whisper(payload: dict[str, Any], offset: float = 0.0) -> list[Segment]:
+    """``verbose_json`` segments shifted by the chunk's start offset."""
+    segments = []
+    for item in payload.get("segments") or []:
+        text = item.get("text") or ""
+        if not text.strip():
+            continue
+        segments.append(Segment(offset + float(item["start"]), offset + float(item["end"]), text))
+    return segments
+
+
+def segments_from_snippets(snippets: Iterable[Any]) -> list[Segment]:
+    """YouTube caption snippets (``start`` / ``duration`` / ``text``) as segments."""
+    return [
+        Segment(float(s.start), float(s.start) + float(s.duration), s.text)
+        for s in snippets
+        if (s.text or "").strip()
+    ]
+
+
+def _repeats(segment: Segment, previous: list[Segment]) -> bool:
+    """At least half of ``segment`` lies under segments already kept from the previous chunk."""
+    shared = sum(max(0.0, min(p.end, segment.end) - max(p.start, segment.start)) for p in previous)
+    return shared >= 0.5 * max(segment.end - segment.start, 1e-6)
+
+
+def merge_chunk_segments(chunks: list[AudioChunk], per_chunk: list[list[Segment]]) -> list[list[Segment]]:
+    """Drop segments duplicated across overlapping chunk boundaries, by timestamp."""
+    kept = [list(segments) for segments in per_chunk]
+    for i, chunk in enumerate(chunks):
+        if not chunk.overlap or i == 0:
+            continue
+        # 前一片在结尾处被截断：重叠区后半段开始的片段以后一片为准
+        boundary = chunk.start + chunk.overlap / 2
+        kept[i - 1] = [s for s in kept[i - 1] if s.start < boundary]
+        tail = [s for s in kept[i - 1] if s.end > chunk.start]
+        kept[i] = [s for s in kept[i] if not _repeats(s, tail)]
+    return kept
+
+
+def segments_text(segments: Iterable[Segment]) -> str:
+    """Plain text of segments (Whisper segment texts carry their own leading spaces)."""
+    return "".join(s.text for s in segments).strip()
+
+
+def segments_path_for(transcript_dir: str) -> str:
+    return os.path.join(transcript_dir, SEGMENTS_FILENAME)
+
+
+def write_segments(path: str, segments: list[Segment], *, source: str, language: str = "") -> None:
+    data = {
+        "version": SEGMENTS_VERSION,
+        "source": source,
+        "language": language or "",
+        "segments": [s.to_row() for s in segments],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_segments(path: str) -> list[Segment]:
+    """Segments from a sidecar; empty list when missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [Segment.from_row(row) for row in data.get("segments") or []]
+
+
+def segments_between(segments: list[Segment], start: float, end: float) -> list[Segment]:
+    """Segments overlapping ``[start, end)`` — for quoting or re-transcribing a time range."""
+    return [s for s in segments if s.end > start and s.start < end]
@@ -0,0 +1,214 @@
+"""
+边下载边转写。
+
+原流程先用 10 分钟下完整个音频，再整体转码、切片，最后才开始上传。流式模式下：
+
+1. 下载线程把每个数据块同时写入 ``audio.m4a`` 和一个 ffmpeg 进程的 stdin；
+2. ffmpeg 边解码边写 16 kHz Opus（``-flush_packets 1``），stderr 输出 ``silencedetect``、
+   stdout 输出 ``-progress`` 已编码时长；
+3. :class:`~transcription.chunking.ChunkPlanner` 在切点所需的音频都已到达后立即给出分片，
+   分片从正在写入的 Opus 文件中流复制切出，马上提交给转写线程池。
+
+长节目的总耗时约为 max(下载, 转写) 而不是两者之和。切点规则与整文件规划相同，
+但总时长取自 ffmpeg 的已编码时长（整文件模式取容器时长），分片也是另一次转码切出的字节；
+分片断点（``transcript_chunks.jsonl``，键含分片哈希与起止时间）只在同一模式重跑时复用，
+两种模式之间不通用。
+
+源文件无法从管道解码时（例如 moov 在文件末尾的 m4a），ffmpeg 失败并抛出
+:class:`StreamingError`，调用方等下载完成后退回整文件流程。
+
+配置：sources.yaml ``settings.transcribe_streaming``（默认 true），
+环境变量 CHORA_TRANSCRIBE_STREAMING=0 关闭。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Iterator
+
+from transcription.chunking import (
+    UPLOAD_BITRATE,
+    UPLOAD_SAMPLE_RATE,
+    AudioChunk,
+    ChunkPlanner,
+    ChunkSettings,
+    Silence,
+    extract_chunk,
+)
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_OUT_TIME_US = re.compile(r"^out_time_us=(\d+)")
+
+# 已编码时长与磁盘上可安全切出的位置之间留的余量（Ogg 页 / 编码器延迟）
+SAFETY_MARGIN_SECONDS = 2.0
+
+
+class StreamingError(RuntimeError):
+    """The streaming transcode could not decode the source; fall back to the whole-file path."""
+
+
+def streaming_enabled(settings: dict | None) -> bool:
+    raw = os.environ.get("CHORA_TRANSCRIBE_STREAMING")
+    if raw is not None and raw.strip():
+        return raw.strip().lower() not in ("0", "false", "no", "off")
+    return bool((settings or {}).get("transcribe_streaming", True))
+
+
+@dataclass(frozen=True)
+class TranscodeProgress:
+    silences: list[Silence]
+    settled: float
+    finished: bool
+
+
+class StreamingTranscoder:
+    """ffmpeg reading the source from stdin while it downloads; tracks silences and encoded time."""
+
+    def __init__(self, output_path: str, settings: ChunkSettings, *, popen=subprocess.Popen):
+        self.output_path = output_path
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-hide_banner",
+            "-nostats",
+            "-progress",
+            "pipe:1",
+            "-i",
+            "pipe:0",
+            "-vn",
+            "-af",
+            f"silencedetect=noise={settings.noise_db:g}dB:d={settings.min_silence:g}",
+            "-ac",
+            "1",
+            "-ar",
+            str(UPLOAD_SAMPLE_RATE),
+            "-c:a",
+            "libopus",
+            "-b:a",
+            UPLOAD_BITRATE,
+            "-application",
+            "voip",
+            "-fflags",
+            "+bitexact",
+            "-flags:a",
+            "+bitexact",
+            "-flush_packets",
+            "1",
+            output_path,
+        ]
+        self.proc = popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._cond = threading.Condition()
+        self._silences: list[Silence] = []
+        self._open_silence: float | None = None
+        self._encoded = 0.0
+        self._finished = False
+        self._stderr_tail: list[str] = []
+        self._broken = False
+        self._readers = [
+            threading.Thread(target=self._read_progress, daemon=True),
+            threading.Thread(target=self._read_stderr, daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    # ------------------------------------------------------------------
+    # 输入
+    # ------------------------------------------------------------------
+
+    def feed(self, data: bytes) -> None:
+        """Write downloaded bytes to ffmpeg; a dead ffmpeg is ignored (the download carries on)."""
+        if self._broken:
+            return
+        try:
+            self.proc.stdin.write(data)
+        except (BrokenPipeError, OSError, ValueError):
+            self._broken = True
+
+    def close(self) -> None:
+        """End of input: ffmpeg drains and exits."""
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def abort(self) -> None:
+        self._broken = True
+        self.proc.kill()
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 输出解析
+    # ------------------------------------------------------------------
+
+    def _read_progress(self) -> None:
+        for raw in iter(self.proc.stdout.readline, b""):
+            match = _OUT_TIME_US.match(raw.decode("utf-8", "replace").strip())
+            if match:
+                with self._cond:
+                    self._encoded = max(self._encoded, int(match.group(1)) / 1_000_000)
+                    self._cond.notify_all()
+
+    def _read_stderr(self) -> None:
+        for raw in iter(self.proc.stderr.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            with self._cond:
+                begin = _SILENCE_START.search(line)
+                end = _SILENCE_END.search(line)
+                if begin:
+                    self._open_silence = max(0.0, float(begin.group(1)))
+                elif end and self._open_silence is not None:
+                    self._silences.append(Silence(self._open_silence, float(end.group(1))))
+                    self._open_silence = None
+                elif "silencedetect" not in line:
+                    self._stderr_tail = (self._stderr_tail + [line.strip()])[-20:]
+                self._cond.notify_all()
+
+    def progress(self, timeout: float | None = None) -> TranscodeProgress:
+        """Wait up to ``timeout`` for new output, then report what is settled on disk."""
+        if not self._finished:
+            with self._cond:
+                self._cond.wait(timeout)
+            if self.proc.poll() is not None:
+                for reader in self._readers:
+                    reader.join()
+                self._finished = True
+        with self._cond:
+            settled = self._encoded - SAFETY_MARGIN_SECONDS
+            if self._open_silence is not None:
+                # 静音尚未结束，中点未知：切点只能定在它开始之前
+                settled = min(settled, self._open_silence)
+            return TranscodeProgress(list(self._silences), settled, self._finished)
+
+    def result(self) -> tuple[float, list[Silence]]:
+        """``(duration, silences)`` after ffmpeg exited; raises :class:`StreamingError` on failure."""
+        self.proc.wait()
+        for reader in self._readers:
+            reader.join()
+        self._finished = True
+        if self.proc.returncode != 0 or self._encoded <= 0:
+            detail = " | ".join(self._stderr_tail[-3:])
+            raise StreamingError(f"ffmpeg exited with {self.proc.returncode}: {detail}")
+        silences = list(self._silences)
+        if self._open_silence is not None:
+            silences.append(Silence(self._open_silence, self._encoded))
+        return self._encoded, silences
+
+
+def stream_chunks(
+    transcoder: StreamingTranscoder, planner: ChunkPlanner, work_dir: str, poll_seconds: float = 1.0
+) -> Iterator[AudioChunk]:
+    """Yield extracted chunks as soon as their audio is encoded; the last ones once ffmpeg exits."""
+    while True:
+        progress = transcoder.progress(poll_seconds)
+        if progress.finished:
+            break
+        for chunk in planner.ready(progress.silences, progress.settled):
+            yield extract_chunk(transcoder.output_path, chunk, work_dir)
+    duration, silences = transcoder.result()
+    for chunk in planner.finish(duration, silences):
+        yield extract_chunk(transcoder.output_path, chunk, work_dir)
@@ -2,7 +2,7 @@
 content_archive 自动清理工具。
 
 策略：
-- 默认删除超过 30 天的音频文件（audio.m4a / audio.mp3），释放磁盘空间。
+- 默认删除超过 30 天的音频文件（audio.m4a / audio.mp3 / audio.webm / audio.opus），释放磁盘空间。
 - 保留核心文件：metadata.md、transcript.md、rewritten.md、cover.*、distribution/。
 - 支持 --dry-run 预览、--days 自定义天数、--remove-covers 同时清理旧封面。
 
@@ -52,9 +52,9 @@ def parse_args():
 def should_remove_file(filename, remove_covers):
     """判断文件是否属于可清理的大文件类型。"""
     lower = filename.lower()
-    if lower in ("audio.m4a", "audio.mp3"):
+    if lower in ("audio.m4a", "audio.mp3", "audio.webm", "audio.opus"):
         return True
-    if lower.startswith("temp_chunk_") and lower.endswith((".mp3", ".m4a")):
+    if lower.startswith("temp_chunk_") and lower.endswith((".mp3", ".m4a", ".ogg")):
         return True
     if (
         remove_covers
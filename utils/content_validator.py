@@ -18,7 +18,7 @@ REQUIRED_FILES = {
 }
 
 # 可选文件
-OPTIONAL_FILES = ["audio.m4a", "audio.mp3", "cover_optimized.png"]
+OPTIONAL_FILES = ["audio.m4a", "audio.mp3", "audio.webm", "audio.opus", "cover_optimized.png"]
 
 
 def check_directory(dir_path: str, verbose: bool = False) -> dict:
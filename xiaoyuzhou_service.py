@@ -10,7 +10,6 @@ from __future__ import annotations
 
 import json
 import re
-import subprocess
 import time
 from dataclasses import dataclass
 from datetime import datetime
@@ -18,6 +17,9 @@ from html.parser import HTMLParser
 from typing import Any
 from urllib.parse import urlparse
 
+from ingestion.http_cache import FetchResult, cached_fetch
+from ingestion.http_cache import get_default_cache as get_http_cache
+
 
 class _MetaExtractor(HTMLParser):
     """Lightweight HTML meta tag / JSON-LD extractor."""
@@ -97,36 +99,29 @@ def extract_episode_id(url_or_id: str) -> str | None:
     return None
 
 
-def _run_curl(url: str, timeout: int = 30) -> str:
-    headers = [
-        "-H",
-        "User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "-H",
-        "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "-H",
-        "Accept-Language: zh-CN,zh;q=0.9,en;q=0.8",
-    ]
-    result = subprocess.run(
-        ["curl", "-s", "-L", "--max-time", str(timeout)] + headers + [url],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"curl failed for {url}: {result.stderr.strip()}")
-    return result.stdout
+_BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
 
 
-def fetch_page(url: str, retries: int = 3, backoff: float = 2.0, timeout: int = 30) -> str:
-    """Fetch page HTML with retries and exponential backoff."""
+def fetch_page_result(url: str, retries: int = 3, backoff: float = 2.0, timeout: int = 30) -> FetchResult:
+    """Conditional GET with retries and exponential backoff.
+
+    ``FetchResult.changed`` is False when the server answered 304 or the body
+    hash matches the cached copy, so callers can reuse their previous parse.
+    """
     last_error: Exception | None = None
     for attempt in range(retries):
         try:
-            html = _run_curl(url, timeout=timeout)
-            if len(html.strip()) < 200:
-                raise RuntimeError(f"Response too short ({len(html)} chars); possible block/captcha")
-            return html
+            result = cached_fetch(url, headers=_BROWSER_HEADERS, timeout=timeout)
+            if result.status not in (200, 304):
+                raise RuntimeError(f"HTTP {result.status}")
+            if len(result.body.strip()) < 200:
+                raise RuntimeError(f"Response too short ({len(result.body)} chars); possible block/captcha")
+            return result
         except Exception as exc:
             last_error = exc
             if attempt < retries - 1:
@@ -138,6 +133,11 @@ def fetch_page(url: str, retries: int = 3, backoff: float = 2.0, timeout: int =
     raise RuntimeError(f"Failed to fetch {url} after {retries} attempts: {last_error}")
 
 
+def fetch_page(url: str, retries: int = 3, backoff: float = 2.0, timeout: int = 30) -> str:
+    """Fetch page HTML with retries and exponential backoff."""
+    return fetch_page_result(url, retries=retries, backoff=backoff, timeout=timeout).body
+
+
 def _parse_next_data(html: str) -> dict[str, Any] | None:
     """Parse __NEXT_DATA__ script if present."""
     match = re.search(
@@ -306,21 +306,8 @@ def extract_guests_from_description(description: str) -> str:
     return ""
 
 
-def get_episode_metadata(url_or_id: str) -> EpisodeMetadata:
-    """Fetch and normalize metadata for a XiaoyuZhou episode.
-
-    Raises:
-        ValueError: if the episode ID cannot be extracted.
-        RuntimeError: if the page cannot be fetched or no metadata is found.
-    """
-    episode_id = extract_episode_id(url_or_id)
-    if not episode_id:
-        raise ValueError(f"Cannot extract XiaoyuZhou episode ID from {url_or_id!r}")
-
-    url = f"https://www.xiaoyuzhoufm.com/episode/{episode_id}"
-    print(f"Fetching metadata from {url}...")
-
-    html = fetch_page(url)
+def _parse_episode_page(html: str) -> dict[str, Any]:
+    """Run every extraction strategy over an episode page, most reliable first."""
     parser = _MetaExtractor()
     parser.feed(html)
 
@@ -345,6 +332,37 @@ def get_episode_metadata(url_or_id: str) -> EpisodeMetadata:
     if html_extracted:
         candidates.append(html_extracted)
 
+    return {
+        "next_data": next_data,
+        "json_ld": parser.json_ld,
+        "meta": parser.meta,
+        "candidates": candidates,
+    }
+
+
+def get_episode_metadata(url_or_id: str) -> EpisodeMetadata:
+    """Fetch and normalize metadata for a XiaoyuZhou episode.
+
+    Raises:
+        ValueError: if the episode ID cannot be extracted.
+        RuntimeError: if the page cannot be fetched or no metadata is found.
+    """
+    episode_id = extract_episode_id(url_or_id)
+    if not episode_id:
+        raise ValueError(f"Cannot extract XiaoyuZhou episode ID from {url_or_id!r}")
+
+    url = f"https://www.xiaoyuzhoufm.com/episode/{episode_id}"
+    print(f"Fetching metadata from {url}...")
+
+    page = fetch_page_result(url)
+    http_cache = get_http_cache()
+    # 页面未变化（304 / 正文哈希相同）时直接复用上次的解析结果
+    raw = None if page.changed else http_cache.load_parsed(url, "xiaoyuzhou_episode")
+    if raw is None:
+        raw = _parse_episode_page(page.body)
+        http_cache.save_parsed(url, "xiaoyuzhou_episode", raw)
+    candidates: list[dict[str, Any]] = raw["candidates"]
+
     if not candidates:
         raise RuntimeError(f"Could not extract any metadata for {url}")
 
@@ -376,12 +394,7 @@ def get_episode_metadata(url_or_id: str) -> EpisodeMetadata:
         description=description,
         guests=guests,
         source_url=url,
-        raw={
-            "next_data": next_data,
-            "json_ld": parser.json_ld,
-            "meta": parser.meta,
-            "candidates": candidates,
-        },
+        raw=raw,
     )
 
 
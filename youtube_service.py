@@ -10,7 +10,10 @@ import os
 import re
 import subprocess
 
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, YouTubeTranscriptApi
+
+from ingestion.captions import get_caption_cache
+from transcription.segments import segments_from_snippets
 
 
 def clean_vtt_text(vtt_content):
@@ -123,87 +126,105 @@ def get_youtube_transcript(video_id):
     """
     Fetches the transcript for a YouTube video using youtube-transcript-api.
     优先获取中文字幕，如果没有则尝试翻译英文字幕为中文。
+    返回 (纯文本, 语言代码)；带时间码的片段见 get_youtube_transcript_segments。
     """
-    print(f"Fetching transcript for video ID: {video_id}")
+    segments, lang = get_youtube_transcript_segments(video_id)
+    if not segments:
+        return None, None
+    return segments_text_from_captions(segments), lang
+
+
+def segments_text_from_captions(segments):
+    """Flat transcript text from caption segments (snippets joined with spaces)."""
+    return " ".join(segment.text for segment in segments) + " "
 
-    try:
-        yt_api = YouTubeTranscriptApi()
-
-        # 第一步：列出所有可用字幕
-        print("Listing available transcripts...")
-        transcript_list = yt_api.list(video_id)
-
-        available_langs = []
-        translatable_transcript = None
-        chinese_transcript = None
-
-        for t in transcript_list:
-            lang_info = f"{t.language} ({t.language_code})"
-            if t.is_generated:
-                lang_info += " [auto-generated]"
-            if t.is_translatable:
-                lang_info += " [translatable]"
-            available_langs.append(lang_info)
-            print(f"  Found: {lang_info}")
-
-            # 检查是否有中文字幕
-            if t.language_code in ["zh-Hans", "zh-Hant", "zh", "zh-CN", "zh-TW"]:
-                chinese_transcript = t
-
-            # 记录可翻译的字幕（优先英文）
-            if t.is_translatable and t.language_code == "en":
-                translatable_transcript = t
-            elif t.is_translatable and not translatable_transcript:
-                translatable_transcript = t
-
-        # 第二步：优先使用中文字幕
-        if chinese_transcript:
-            print(f"Using Chinese transcript: {chinese_transcript.language}")
-            fetched = chinese_transcript.fetch()
-            full_text = ""
-            for snippet in fetched:
-                full_text += snippet.text + " "
-            print(f"Fetched {len(fetched)} snippets in Chinese.")
-            return full_text, chinese_transcript.language_code
-
-        # 第三步：如果没有中文，尝试翻译
-        if translatable_transcript:
-            print(
-                f"No Chinese transcript found. Translating from {translatable_transcript.language} to Chinese..."
-            )
-            try:
-                translated = translatable_transcript.translate("zh-Hans")
-                fetched = translated.fetch()
-                full_text = ""
-                for snippet in fetched:
-                    full_text += snippet.text + " "
-                print(f"Successfully translated {len(fetched)} snippets to Chinese.")
-                return full_text, "zh-Hans (translated)"
-            except Exception as e:
-                print(f"Translation failed: {e}")
-                # 如果翻译失败，回退到原语言
-                print(f"Falling back to original language: {translatable_transcript.language}")
-                fetched = translatable_transcript.fetch()
-                full_text = ""
-                for snippet in fetched:
-                    full_text += snippet.text + " "
-                return full_text, translatable_transcript.language_code
-
-        # 第四步：如果都不行，尝试直接 fetch
-        print("No translatable transcript found. Attempting direct fetch...")
-        try:
-            fetched = yt_api.fetch(video_id, languages=["zh-Hans", "zh-Hant", "zh", "en"])
-            full_text = ""
-            for snippet in fetched:
-                full_text += snippet.text + " "
-            return full_text, fetched.language_code
-        except Exception as e:
-            print(f"Direct fetch failed: {e}")
-            return None, None
 
+def get_youtube_transcript_segments(video_id, use_cache=True):
+    """
+    Same caption selection as get_youtube_transcript, keeping each snippet's timing.
+    返回 (list[Segment], 语言代码)，失败时 (None, None)。
+    结果按 video ID + 语言缓存（见 ingestion.captions），重新运行不再访问 YouTube。
+    """
+    cache = get_caption_cache()
+    if use_cache:
+        cached = cache.get(video_id)
+        if cached is not None:
+            print(f"Using cached captions for {video_id} ({cached.language or 'none available'})")
+            return cached.segments, cached.language
+
+    try:
+        segments, lang = _fetch_transcript_segments(video_id)
+    except (TranscriptsDisabled, NoTranscriptFound) as e:
+        print(f"No captions available: {e}")
+        cache.put(video_id, None, None)
+        return None, None
     except Exception as e:
         print(f"Failed to get transcript: {e}")
         return None, None
+    cache.put(video_id, segments, lang)
+    return segments, lang
+
+
+def _fetch_transcript_segments(video_id):
+    print(f"Fetching transcript for video ID: {video_id}")
+
+    yt_api = YouTubeTranscriptApi()
+
+    # 第一步：列出所有可用字幕
+    print("Listing available transcripts...")
+    transcript_list = yt_api.list(video_id)
+
+    available_langs = []
+    translatable_transcript = None
+    chinese_transcript = None
+
+    for t in transcript_list:
+        lang_info = f"{t.language} ({t.language_code})"
+        if t.is_generated:
+            lang_info += " [auto-generated]"
+        if t.is_translatable:
+            lang_info += " [translatable]"
+        available_langs.append(lang_info)
+        print(f"  Found: {lang_info}")
+
+        # 检查是否有中文字幕
+        if t.language_code in ["zh-Hans", "zh-Hant", "zh", "zh-CN", "zh-TW"]:
+            chinese_transcript = t
+
+        # 记录可翻译的字幕（优先英文）
+        if t.is_translatable and t.language_code == "en":
+            translatable_transcript = t
+        elif t.is_translatable and not translatable_transcript:
+            translatable_transcript = t
+
+    # 第二步：优先使用中文字幕
+    if chinese_transcript:
+        print(f"Using Chinese transcript: {chinese_transcript.language}")
+        fetched = chinese_transcript.fetch()
+        print(f"Fetched {len(fetched)} snippets in Chinese.")
+        return segments_from_snippets(fetched), chinese_transcript.language_code
+
+    # 第三步：如果没有中文，尝试翻译
+    if translatable_transcript:
+        print(
+            f"No Chinese transcript found. Translating from {translatable_transcript.language} to Chinese..."
+        )
+        try:
+            translated = translatable_transcript.translate("zh-Hans")
+            fetched = translated.fetch()
+            print(f"Successfully translated {len(fetched)} snippets to Chinese.")
+            return segments_from_snippets(fetched), "zh-Hans (translated)"
+        except Exception as e:
+            print(f"Translation failed: {e}")
+            # 如果翻译失败，回退到原语言
+            print(f"Falling back to original language: {translatable_transcript.language}")
+            fetched = translatable_transcript.fetch()
+            return segments_from_snippets(fetched), translatable_transcript.language_code
+
+    # 第四步：如果都不行，尝试直接 fetch
+    print("No translatable transcript found. Attempting direct fetch...")
+    fetched = yt_api.fetch(video_id, languages=["zh-Hans", "zh-Hant", "zh", "en"])
+    return segments_from_snippets(fetched), fetched.language_code
 
 
 if __name__ == "__main__":